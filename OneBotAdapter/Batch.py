@@ -0,0 +1,154 @@
+# OneBotAdapter/Batch.py
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
+
+from .Codec import PayloadTemplate
+from .RateLimit import TokenBucket
+
+
+class BatchSend:
+    """
+    同一条消息发往多个目标的批量发送
+
+    消息只转换、编码一次，之后每个目标只需把目标ID与 echo 拼进预编码的请求中；
+    bytes 媒体与本地文件同样只编码（或分块上传）一次。
+    固定数量的工作协程依次领取目标，同时在途的请求数不超过 concurrency；
+    rate 大于 0 时额外限制本批次每秒发出的数量（账户的发送限速仍然生效）。
+
+    结果可以逐个迭代（按完成顺序），也可以直接 await 得到按目标顺序排列的列表。
+    单个目标失败不会中断批次，该目标的结果是对应的异常对象。
+    同一个批次只能消费一次。
+
+    :example:
+    >>> async for target_id, result in onebot.Send.To("group", 0).Batch(group_ids, "公告"):
+    >>>     if isinstance(result, Exception) or result["status"] != "ok":
+    >>>         failed.append(target_id)
+    >>>
+    >>> results = await onebot.Send.To("user", 0).Batch(user_ids, "通知", concurrency=32, rate=20)
+    """
+
+    def __init__(
+        self,
+        adapter,
+        account_id: Optional[str],
+        target_type: str,
+        target_ids: Sequence[Union[int, str]],
+        message: List[Dict],
+        concurrency: int = 16,
+        rate: float = 0.0,
+    ):
+        """
+        :param adapter: 适配器实例
+        :param account_id: 账户名或bot_id
+        :param target_type: "group" 或 "user"
+        :param target_ids: 目标ID列表
+        :param message: OneBot11 消息段数组
+        :param concurrency: 同时在途的请求数上限
+        :param rate: 本批次每秒最多发出的请求数，0 表示不限
+        """
+        self._adapter = adapter
+        self._account_id = account_id
+        self._target_type = target_type
+        self._target_ids = list(target_ids)
+        self._message = message
+        self._concurrency = max(1, concurrency)
+        self._rate = rate
+
+        self._results: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+        # 统计数据
+        self.total = len(self._target_ids)
+        self.succeeded = 0
+        self.failed = 0
+
+    def _start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _template(self) -> PayloadTemplate:
+        adapter = self._adapter
+        if self._target_type == "user":
+            params = {"message_type": "private", "message": self._message}
+            target_field = "user_id"
+        else:
+            params = {"message_type": "group", "message": self._message}
+            target_field = "group_id"
+
+        # bytes 媒体与本地文件在批次开始前处理一次，所有目标共用同一份编码结果
+        if adapter.media.has_media(self._message):
+            account_name, account = adapter._resolve_account(self._account_id)
+            if adapter._is_same_host(account_name, account):
+                params["message"] = adapter.media.passthrough_local_files(params["message"])
+            params = await adapter._upload_large_media(account_name, params, None)
+            if adapter.media.has_media(params["message"]):
+                # 不使用缓存引用：引用失效时整批都会失败，无法逐个目标重发
+                prepared = await adapter.media.prepare(
+                    adapter.codec, "send_msg", params, target_field, use_refs=False
+                )
+                return prepared.template
+        return PayloadTemplate(adapter.codec, "send_msg", params, target_field)
+
+    async def _run(self):
+        try:
+            template = await self._template()
+            targets = iter(enumerate(self._target_ids))
+            # 突发上限为 1：按固定间隔匀速发出
+            bucket = TokenBucket(self._rate, 1, time.monotonic()) if self._rate > 0 else None
+
+            async def worker():
+                # 所有工作协程共用同一个目标迭代器
+                for index, target_id in targets:
+                    if bucket is not None:
+                        delay = bucket.reserve(time.monotonic())
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                    try:
+                        result = await self._adapter._send_prepared(
+                            self._account_id, self._target_type, target_id, template
+                        )
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        result = e
+                    if isinstance(result, Exception) or result.get("status") != "ok":
+                        self.failed += 1
+                    else:
+                        self.succeeded += 1
+                    self._results.put_nowait((index, target_id, result))
+
+            workers = min(self._concurrency, self.total)
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        finally:
+            self._results.put_nowait(None)
+
+    async def _iterate(self) -> AsyncIterator[Tuple[int, Union[int, str], Any]]:
+        self._start()
+        while True:
+            item = await self._results.get()
+            if item is None:
+                break
+            yield item
+        # 批次本身出错（如账户不存在）时抛出
+        await asyncio.wait([self._task])
+        if not self._task.cancelled() and self._task.exception() is not None:
+            raise self._task.exception()
+
+    async def __aiter__(self) -> AsyncIterator[Tuple[Union[int, str], Any]]:
+        async for _, target_id, result in self._iterate():
+            yield target_id, result
+
+    async def _collect(self) -> List[Any]:
+        results: List[Any] = [None] * self.total
+        async for index, _, result in self._iterate():
+            results[index] = result
+        return results
+
+    def __await__(self):
+        return self._collect().__await__()
+
+    def cancel(self):
+        """取消尚未发出的部分"""
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,189 @@
+# OneBotAdapter/Codec.py
+import json
+import re
+from typing import Any, Dict, List, Optional, Type, Union
+
+
+class JsonCodec:
+    """
+    标准库 JSON 编解码器
+
+    所有编解码器都提供相同的三个方法，适配器只依赖这组接口；
+    loads 同时接受 str 和 bytes，避免二进制帧多做一次解码。
+    """
+
+    name = "json"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return self.dumps(obj).encode("utf-8")
+
+
+class OrjsonCodec(JsonCodec):
+    """orjson 编解码器（原生输出 bytes）"""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._loads = orjson.loads
+        self._dumps = orjson.dumps
+        self._option = orjson.OPT_NON_STR_KEYS
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return self._dumps(obj, option=self._option).decode("utf-8")
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return self._dumps(obj, option=self._option)
+
+
+class MsgspecCodec(JsonCodec):
+    """msgspec 编解码器（原生输出 bytes）"""
+
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        self._decode_error = msgspec.DecodeError
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except self._decode_error as e:
+            # 统一为 json.JSONDecodeError，调用方只需捕获一种异常
+            raise json.JSONDecodeError(str(e), "", 0) from e
+
+    def dumps(self, obj: Any) -> str:
+        return self._encoder.encode(obj).decode("utf-8")
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+
+CODECS: Dict[str, Type[JsonCodec]] = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "json": JsonCodec,
+}
+
+
+def get_codec(name: Optional[str] = None) -> JsonCodec:
+    """
+    获取 JSON 编解码器
+
+    :param name: 编解码器名称（orjson/msgspec/json），为空或 "auto" 时按顺序选择第一个可用的
+    :return: 编解码器实例
+    :raises ValueError: 指定的编解码器不存在或对应的库未安装
+    """
+    if name and name != "auto":
+        if name not in CODECS:
+            raise ValueError(f"未知的JSON编解码器: {name}")
+        try:
+            return CODECS[name]()
+        except ImportError:
+            raise ValueError(f"JSON编解码器 {name} 所需的库未安装")
+
+    for codec_class in CODECS.values():
+        try:
+            return codec_class()
+        except ImportError:
+            continue
+    return JsonCodec()
+
+
+class PayloadTemplate:
+    """
+    预编码的 API 请求模板
+
+    同一请求发往大量目标时，参数（尤其是消息内容）只编码一次，
+    每次发送只需把目标ID与 echo 拼接进已编码的片段中。
+    同一模板既可生成 WebSocket 请求帧，也可只生成参数部分作为 HTTP 请求体。
+    """
+
+    _TARGET_MARK = "__ob11_target__"
+
+    def __init__(
+        self,
+        codec: JsonCodec,
+        action: str,
+        params: Dict[str, Any],
+        target_field: Optional[str] = None,
+        raw_strings: Optional[Dict[str, List[bytes]]] = None,
+    ):
+        """
+        :param codec: 编解码器
+        :param action: API 名称
+        :param params: 除目标ID外的参数
+        :param target_field: 目标ID的参数名（group_id/user_id），为空时目标已包含在 params 中
+        :param raw_strings: {占位字符串: 内容片段}，片段原样拼入对应的 JSON 字符串，
+                            必须是无需转义的 ASCII（如 base64），用于跳过大段数据的 JSON 编码
+        :raises ValueError: 参数中恰好包含模板占位符
+        """
+        self._codec = codec
+        params = dict(params)
+        if target_field:
+            params[target_field] = self._TARGET_MARK
+        encoded = codec.dumps_bytes(params)
+        # 请求帧为 {"action":...,"params":<参数>,"echo":...}，参数之外的部分在发送时拼接
+        self._head = b'{"action":' + codec.dumps_bytes(action) + b',"params":'
+
+        # 占位符 → 替换内容（None 表示发送时填入的目标ID）
+        slots: Dict[bytes, Optional[List[bytes]]] = {}
+        if target_field:
+            slots[codec.dumps_bytes(self._TARGET_MARK)] = None
+        for mark, raw in (raw_strings or {}).items():
+            slots[codec.dumps_bytes(mark)] = [b'"', *raw, b'"']
+
+        self._target_index = -1
+        if not slots:
+            self._pieces: List[Optional[bytes]] = [encoded]
+            return
+
+        pattern = re.compile(b"|".join(re.escape(mark) for mark in slots))
+        tokens = pattern.split(encoded)
+        marks = pattern.findall(encoded)
+        if sorted(marks) != sorted(slots):
+            raise ValueError("请求参数中包含模板占位符")
+
+        # 只拼接片段列表，大段内容不会被复制
+        pieces: List[Optional[bytes]] = [tokens[0]]
+        for mark, token in zip(marks, tokens[1:]):
+            raw = slots[mark]
+            if raw is not None:
+                pieces.extend(raw)
+            else:
+                self._target_index = len(pieces)
+                pieces.append(None)
+            pieces.append(token)
+        self._pieces = pieces
+
+    def render(self, target_id: Optional[Union[int, str]], echo: Optional[str]) -> bytes:
+        """
+        生成发往单个目标的请求
+
+        :param target_id: 目标ID（保持调用方传入的 int/str 类型），模板不含目标时忽略
+        :param echo: 本次请求的 echo；为 None 时只生成参数部分（HTTP 请求体）
+        """
+        pieces = self._pieces.copy()
+        if self._target_index >= 0:
+            if type(target_id) is int:
+                pieces[self._target_index] = str(target_id).encode()
+            else:
+                pieces[self._target_index] = self._codec.dumps_bytes(target_id)
+        if echo is None:
+            return b"".join(pieces)
+        return b"".join(
+            (self._head, *pieces, b',"echo":', self._codec.dumps_bytes(echo), b"}")
+        )
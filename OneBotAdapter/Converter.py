@@ -1,10 +1,52 @@
 # OneBotAdapter/Converter.py
+import sys
 import time
-import uuid
-from typing import Dict, Optional, List, Any
+from typing import Callable, Dict, Optional, List, Any, Tuple
+from .Event import EventIdGenerator
+from .Segments import OB11_PREFIX, SegmentRegistry
+
+
+def _cq_unescape(text: str) -> str:
+    """还原CQ码转义字符（&amp; 最后还原，避免 &amp;#91; 被还原两次）"""
+    if "&" not in text:
+        return text
+    return (
+        text.replace("&#91;", "[").replace("&#93;", "]").replace("&#44;", ",").replace("&amp;", "&")
+    )
+
+
+# 各 post_type 中区分具体事件的字段
+_EVENT_TYPE_FIELDS = {
+    "message": "message_type",
+    "notice": "notice_type",
+    "request": "request_type",
+    "meta_event": "meta_event_type",
+}
+
+# 事件处理函数：接收原始事件与已填充基础字段的事件，返回转换结果（None 表示丢弃）
+EventHandler = Callable[[Dict, Dict], Optional[Dict]]
+
+# 不保留原始数据时会被驻留（intern）的 ID 字段
+_INTERNED_ID_FIELDS = ("user_id", "group_id", "operator_id", "target_id")
+# 不保留原始数据时一并移除的原始数据别名（与 onebot11_raw 为同一对象）
+_RAW_ALIAS_FIELDS = ("onebot11_notice", "onebot11_request", "onebot11_meta")
+
 
 class OneBot11Converter:
-    def __init__(self):
+    def __init__(
+        self,
+        segments: Optional[SegmentRegistry] = None,
+        keep_raw: bool = True,
+    ):
+        """
+        :param segments: 消息段转换表
+        :param keep_raw: 是否保留 onebot11_raw 及其别名。关闭后事件只含标准字段，
+            同时驻留重复的 ID 字符串、复用 self 字段（原生事件处理器将收不到事件）
+        """
+        self.segments = segments or SegmentRegistry()
+        self.keep_raw = keep_raw
+        self._self_info_cache: Dict[str, Dict] = {}
+        self._ids = EventIdGenerator()
         self._setup_event_mapping()
     
     def _setup_event_mapping(self):
@@ -29,6 +71,83 @@ class OneBot11Converter:
             "notify": "notify"
         }
 
+        self._setup_handlers()
+
+    def _setup_handlers(self):
+        """
+        初始化事件处理表
+
+        表键为 (post_type, 事件类型, sub_type)，查找时依次尝试
+        (post_type, 事件类型, sub_type) → (post_type, 事件类型, None) → (post_type, None, None)
+        """
+        self._type_fields: Dict[str, str] = dict(_EVENT_TYPE_FIELDS)
+        self._handlers: Dict[Tuple[str, Optional[str], Optional[str]], EventHandler] = {}
+
+        register = self.register_handler
+        register(self._handle_message, "message")
+        register(self._handle_message, "message", "private")
+        register(self._handle_message, "message", "group")
+
+        register(self._handle_notice, "notice")
+        register(self._handle_notice_group_upload, "notice", "group_upload")
+        register(self._handle_notice_group_admin, "notice", "group_admin")
+        register(self._handle_notice_group_member, "notice", "group_increase")
+        register(self._handle_notice_group_member, "notice", "group_decrease")
+        register(self._handle_notice_group_ban, "notice", "group_ban")
+        register(self._handle_notice_friend, "notice", "friend_add")
+        register(self._handle_notice_friend, "notice", "friend_delete")
+        register(self._handle_notice_recall, "notice", "group_recall")
+        register(self._handle_notice_recall, "notice", "friend_recall")
+        register(self._handle_notice, "notice", "notify")
+        register(self._handle_notice_honor, "notice", "notify", "honor")
+        register(self._handle_notice_poke, "notice", "notify", "poke")
+        register(self._handle_notice_lucky_king, "notice", "notify", "lucky_king")
+
+        register(self._handle_request, "request")
+        register(self._handle_request_friend, "request", "friend")
+        register(self._handle_request_group, "request", "group")
+
+        register(self._handle_meta_event, "meta_event")
+        register(self._handle_meta_lifecycle, "meta_event", "lifecycle")
+        register(self._handle_meta_heartbeat, "meta_event", "heartbeat")
+
+    def register_handler(
+        self,
+        handler: EventHandler,
+        post_type: str,
+        event_type: Optional[str] = None,
+        sub_type: Optional[str] = None,
+        type_field: Optional[str] = None,
+    ):
+        """
+        注册事件处理函数（可用于厂商扩展事件，同键已有的处理函数会被覆盖）
+
+        :param handler: 处理函数 (raw_event, base_event) -> 事件或None
+        :param post_type: 原始事件的 post_type
+        :param event_type: message_type/notice_type/request_type/meta_event_type 的值，None 表示该 post_type 的默认处理
+        :param sub_type: 原始事件的 sub_type，None 表示不区分
+        :param type_field: 新 post_type 中区分事件类型的字段名（如 NapCat 的 message_sent 使用 message_type）
+
+        :example:
+        >>> def handle_emoji_like(raw_event, base_event):
+        >>>     base_event.update({
+        >>>         "type": "notice",
+        >>>         "detail_type": "onebot11_group_msg_emoji_like",
+        >>>         "group_id": str(raw_event.get("group_id")),
+        >>>         "user_id": str(raw_event.get("user_id")),
+        >>>         "message_id": str(raw_event.get("message_id")),
+        >>>         "likes": raw_event.get("likes", []),
+        >>>     })
+        >>>     return base_event
+        >>> converter.register_handler(handle_emoji_like, "notice", "group_msg_emoji_like")
+        """
+        if type_field:
+            self._type_fields[post_type] = type_field
+        elif post_type not in self._type_fields:
+            self._type_fields[post_type] = f"{post_type}_type"
+        self.event_map.setdefault(post_type, post_type)
+        self._handlers[(post_type, event_type, sub_type)] = handler
+
     # OneBotAdapter/Converter.py
     def convert(self, raw_event: Dict) -> Optional[Dict]:
         """
@@ -41,28 +160,67 @@ class OneBot11Converter:
             raise ValueError("事件数据必须是字典类型")
 
         post_type = raw_event.get("post_type")
-        if post_type not in self.event_map:
+        type_field = self._type_fields.get(post_type)
+        if type_field is None:
+            return None
+
+        handlers = self._handlers
+        event_type = raw_event.get(type_field)
+        sub_type = raw_event.get("sub_type")
+        handler = (
+            handlers.get((post_type, event_type, sub_type))
+            or handlers.get((post_type, event_type, None))
+            or handlers.get((post_type, None, None))
+        )
+        if handler is None:
             return None
 
         # 基础事件结构
         onebot_event = {
-            "id": str(raw_event.get("echo", str(uuid.uuid4()))),
+            "id": self._event_id(raw_event, post_type),
             "time": self._convert_timestamp(raw_event.get("time", int(time.time()))),
             "platform": "onebot11",
-            "self": {
-                "platform": "onebot11",
-                "user_id": str(raw_event.get("self_id", ""))
-            },
+            "self": self._self_info(str(raw_event.get("self_id", ""))),
             "onebot11_raw": raw_event,  # 保留原始数据
             "onebot11_raw_type": post_type  # 原始事件类型字段
         }
 
-        # 根据事件类型分发处理
-        handler = getattr(self, f"_handle_{post_type}", None)
-        if handler:
-            return handler(raw_event, onebot_event)
-        
-        return None
+        event = handler(raw_event, onebot_event)
+        if not self.keep_raw and event is not None:
+            self._compact(event)
+        return event
+
+    def _event_id(self, raw_event: Dict, post_type: str) -> str:
+        """生成事件 ID：优先使用 echo，消息事件由 message_id 推导，其余按序生成"""
+        echo = raw_event.get("echo")
+        if echo is not None:
+            return str(echo)
+        # 撤回等通知也带有 message_id，但指向的是被撤回的消息，不能用来推导
+        if post_type == "message":
+            message_id = raw_event.get("message_id")
+            if message_id is not None:
+                return self._ids.derive(raw_event.get("self_id", ""), message_id)
+        return self._ids.next()
+
+    def _self_info(self, self_id: str) -> Dict:
+        """构造 self 字段，不保留原始数据时同一机器人的所有事件共用一个对象（请勿原地修改）"""
+        if self.keep_raw:
+            return {"platform": "onebot11", "user_id": self_id}
+        info = self._self_info_cache.get(self_id)
+        if info is None:
+            info = {"platform": "onebot11", "user_id": sys.intern(self_id)}
+            self._self_info_cache[self_id] = info
+        return info
+
+    def _compact(self, event: Dict):
+        """不保留原始数据：驻留 ID 字符串，移除 onebot11_raw 及其别名"""
+        for key in _INTERNED_ID_FIELDS:
+            value = event.get(key)
+            if type(value) is str:
+                event[key] = sys.intern(value)
+        for key in _RAW_ALIAS_FIELDS:
+            event.pop(key, None)
+        event.pop("onebot11_raw", None)
 
     def _convert_timestamp(self, ts) -> int:
         """转换时间戳为10位秒级"""
@@ -118,168 +276,68 @@ class OneBot11Converter:
         if isinstance(message, str):
             # 简单文本消息
             if "[CQ:" not in message:
-                return [{"type": "text", "data": {"text": message}}]
-            
+                return [{"type": "text", "data": {"text": _cq_unescape(message)}}]
+
             # 包含CQ码的复杂消息
-            segments = []
-            last_pos = 0
-            
-            while True:
-                cq_start = message.find("[CQ:", last_pos)
-                if cq_start == -1:
-                    # 添加剩余文本
-                    if last_pos < len(message):
-                        text = message[last_pos:]
-                        if text:
-                            segments.append({"type": "text", "data": {"text": text}})
-                    break
-                
-                # 添加CQ码前的文本
-                if cq_start > last_pos:
-                    text = message[last_pos:cq_start]
-                    if text:
-                        segments.append({"type": "text", "data": {"text": text}})
-                
-                # 解析CQ码
-                cq_end = message.find("]", cq_start)
-                if cq_end == -1:
-                    # 格式错误，当作普通文本处理
-                    segments.append({"type": "text", "data": {"text": message[cq_start:]}})
-                    break
-                
-                cq_content = message[cq_start+4:cq_end]  # 去掉[CQ:和]
-                parts = cq_content.split(",", 1)
-                cq_type = parts[0]
-                cq_data = {}
-                
-                if len(parts) > 1:
-                    data_str = parts[1]
-                    # 简单解析参数（注意：实际CQ码参数可能包含转义字符）
-                    data_parts = data_str.split(",")
-                    for part in data_parts:
-                        if "=" in part:
-                            key, value = part.split("=", 1)
-                            cq_data[key] = value
-                
-                # 转换CQ码类型
-                if cq_type == "text":
-                    segments.append({"type": "text", "data": {"text": cq_data.get("text", "")}})
-                elif cq_type == "image":
-                    segments.append({
-                        "type": "image",
-                        "data": {
-                            "file": cq_data.get("file"),
-                            "url": cq_data.get("url"),
-                            "cache": cq_data.get("cache", "1"),
-                        }
-                    })
-                elif cq_type == "record":
-                    segments.append({
-                        "type": "audio",
-                        "data": {
-                            "file": cq_data.get("file"),
-                            "url": cq_data.get("url"),
-                            "magic": cq_data.get("magic", "0")
-                        }
-                    })
-                elif cq_type == "at":
-                    segments.append({
-                        "type": "mention",
-                        "data": {
-                            "user_id": cq_data.get("qq"),
-                            "user_name": cq_data.get("name", "")
-                        }
-                    })
-                elif cq_type == "face":
-                    segments.append({
-                        "type": "face",
-                        "data": {
-                            "id": cq_data.get("id"),
-                        }
-                    })
-                elif cq_type == "reply":
-                    segments.append({
-                        "type": "reply",
-                        "data": {
-                            "message_id": cq_data.get("id"),
-                            "user_id": cq_data.get("qq", ""),
-                        }
-                    })
-                else:
-                    # 保留原始CQ码类型
-                    segments.append({
-                        "type": f"onebot11_{cq_type}",
-                        "data": cq_data
-                    })
-                
-                last_pos = cq_end + 1
-            
-            return segments
-        
+            return self._parse_cq_string(message)
+
         # 处理数组格式的消息
-        elif isinstance(message, list):
-            segments = []
-            for segment in message:
-                if isinstance(segment, str):
-                    segments.append({"type": "text", "data": {"text": segment}})
-                elif isinstance(segment, dict):
-                    cq_type = segment.get("type", "")
-                    cq_data = segment.get("data", {})
-                    
-                    if cq_type == "text":
-                        segments.append({"type": "text", "data": {"text": cq_data.get("text", "")}})
-                    elif cq_type == "image":
-                        segments.append({
-                            "type": "image",
-                            "data": {
-                                "file": cq_data.get("file"),
-                                "url": cq_data.get("url"),
-                                "cache": cq_data.get("cache", "1"),
-                            }
-                        })
-                    elif cq_type == "record":
-                        segments.append({
-                            "type": "audio",
-                            "data": {
-                                "file": cq_data.get("file"),
-                                "url": cq_data.get("url"),
-                                "magic": cq_data.get("magic", "0")
-                            }
-                        })
-                    elif cq_type == "at":
-                        segments.append({
-                            "type": "mention",
-                            "data": {
-                                "user_id": cq_data.get("qq"),
-                                "user_name": cq_data.get("name", "")
-                            }
-                        })
-                    elif cq_type == "face":
-                        segments.append({
-                            "type": "face",
-                            "data": {
-                                "id": cq_data.get("id"),
-                            }
-                        })
-                    elif cq_type == "reply":
-                        segments.append({
-                            "type": "reply",
-                            "data": {
-                                "message_id": cq_data.get("id"),
-                                "user_id": cq_data.get("qq", ""),
-                            }
-                        })
-                    else:
-                        # 保留原始CQ码类型
-                        segments.append({
-                            "type": f"onebot11_{cq_type}",
-                            "data": cq_data
-                        })
-            return segments
+        if isinstance(message, list):
+            return self.segments.convert_to_ob12(message)
         
         # 其他情况当作纯文本处理
         return [{"type": "text", "data": {"text": str(message)}}]
 
+    def _parse_cq_string(self, message: str) -> List[Dict]:
+        """
+        单次扫描将CQ码字符串直接转换为OneBot12消息段
+
+        按 "[CQ:" 切开后，每段开头到 "]" 为一个CQ码，其后为普通文本；
+        切分出的参数直接交给消息段转换表，不经过中间的OneBot11消息段数组。
+        文本与参数值中的转义字符（&amp; &#91; &#93; &#44;）会被还原，
+        未闭合的CQ码及其后的内容按普通文本保留。
+        """
+        chunks = message.split("[CQ:")
+        segments = []
+        append = segments.append
+        get_converter = self.segments._to_ob12.get
+        unescape = _cq_unescape
+
+        text = chunks[0]
+        if text:
+            append({"type": "text", "data": {"text": unescape(text) if "&" in text else text}})
+
+        for i in range(1, len(chunks)):
+            body, closed, following = chunks[i].partition("]")
+            if not closed:
+                rest = "[CQ:" + "[CQ:".join(chunks[i:])
+                if text:
+                    # 与紧邻的前一段文本合并
+                    segments.pop()
+                    rest = text + rest
+                append({"type": "text", "data": {"text": unescape(rest)}})
+                break
+
+            seg_type, _, params = body.partition(",")
+            cq_data = {}
+            if params:
+                for part in params.split(","):
+                    key, sep, value = part.partition("=")
+                    if sep:
+                        cq_data[key] = unescape(value) if "&" in value else value
+            converter = get_converter(seg_type)
+            if converter is not None:
+                append(converter(cq_data))
+            else:
+                # 保留原始CQ码类型
+                append({"type": f"{OB11_PREFIX}{seg_type}", "data": cq_data})
+
+            text = following
+            if text:
+                append({"type": "text", "data": {"text": unescape(text) if "&" in text else text}})
+
+        return segments
+
     def _generate_alt_message(self, segments: List[Dict]) -> str:
         """生成替代文本消息"""
         parts = []
@@ -301,9 +359,8 @@ class OneBot11Converter:
         return "".join(parts)
 
     def _handle_notice(self, raw_event: Dict, base_event: Dict) -> Dict:
-        """处理通知事件"""
+        """处理通知事件（通用字段，未单独注册的通知类型只保留这些字段）"""
         notice_type = raw_event["notice_type"]
-        sub_type = raw_event.get("sub_type", "")
         
         # 映射通知子类型
         detail_type = self.notice_subtypes.get(notice_type, notice_type)
@@ -313,107 +370,136 @@ class OneBot11Converter:
             "detail_type": detail_type,
             "onebot11_notice": raw_event
         })
-        
-        # 处理不同类型的通知
-        if notice_type == "group_upload":
-            base_event.update({
-                "group_id": str(raw_event.get("group_id")),
-                "user_id": str(raw_event.get("user_id")),
-                "onebot11_file": raw_event.get("file")
-            })
-        elif notice_type == "group_admin":
-            base_event.update({
-                "group_id": str(raw_event.get("group_id")),
-                "user_id": str(raw_event.get("user_id")),
-                "sub_type": "set" if sub_type == "set" else "unset"
-            })
-        elif notice_type in ["group_increase", "group_decrease"]:
-            base_event.update({
-                "group_id": str(raw_event.get("group_id")),
-                "user_id": str(raw_event.get("user_id")),
-                "operator_id": str(raw_event.get("operator_id", "")),
-                "sub_type": sub_type
-            })
-        elif notice_type == "group_ban":
-            base_event.update({
-                "group_id": str(raw_event.get("group_id")),
-                "operator_id": str(raw_event.get("operator_id")),
-                "user_id": str(raw_event.get("user_id")),
-                "duration": raw_event.get("duration", 0)
-            })
-        elif notice_type in ["friend_add", "friend_delete"]:
-            base_event.update({
-                "user_id": str(raw_event.get("user_id"))
-            })
-        elif notice_type in ["group_recall", "friend_recall"]:
-            base_event.update({
-                "message_id": str(raw_event.get("message_id")),
-                "user_id": str(raw_event.get("user_id")),
-                "group_id": str(raw_event.get("group_id", "")) if notice_type == "group_recall" else None
-            })
-        elif notice_type == "notify":
-            if sub_type == "honor":
-                base_event.update({
-                    "group_id": str(raw_event.get("group_id")),
-                    "user_id": str(raw_event.get("user_id")),
-                    "honor_type": raw_event.get("honor_type")
-                })
-            elif sub_type == "poke":
-                base_event.update({
-                    "group_id": str(raw_event.get("group_id", "")),
-                    "user_id": str(raw_event.get("user_id")),
-                    "target_id": str(raw_event.get("target_id"))
-                })
-            elif sub_type == "lucky_king":
-                base_event.update({
-                    "group_id": str(raw_event.get("group_id")),
-                    "user_id": str(raw_event.get("user_id")),
-                    "target_id": str(raw_event.get("target_id"))
-                })
-        
+        return base_event
+
+    def _handle_notice_group_upload(self, raw_event: Dict, base_event: Dict) -> Dict:
+        self._handle_notice(raw_event, base_event)
+        base_event.update({
+            "group_id": str(raw_event.get("group_id")),
+            "user_id": str(raw_event.get("user_id")),
+            "onebot11_file": raw_event.get("file")
+        })
+        return base_event
+
+    def _handle_notice_group_admin(self, raw_event: Dict, base_event: Dict) -> Dict:
+        self._handle_notice(raw_event, base_event)
+        base_event.update({
+            "group_id": str(raw_event.get("group_id")),
+            "user_id": str(raw_event.get("user_id")),
+            "sub_type": "set" if raw_event.get("sub_type", "") == "set" else "unset"
+        })
+        return base_event
+
+    def _handle_notice_group_member(self, raw_event: Dict, base_event: Dict) -> Dict:
+        """group_increase / group_decrease"""
+        self._handle_notice(raw_event, base_event)
+        base_event.update({
+            "group_id": str(raw_event.get("group_id")),
+            "user_id": str(raw_event.get("user_id")),
+            "operator_id": str(raw_event.get("operator_id", "")),
+            "sub_type": raw_event.get("sub_type", "")
+        })
+        return base_event
+
+    def _handle_notice_group_ban(self, raw_event: Dict, base_event: Dict) -> Dict:
+        self._handle_notice(raw_event, base_event)
+        base_event.update({
+            "group_id": str(raw_event.get("group_id")),
+            "operator_id": str(raw_event.get("operator_id")),
+            "user_id": str(raw_event.get("user_id")),
+            "duration": raw_event.get("duration", 0)
+        })
+        return base_event
+
+    def _handle_notice_friend(self, raw_event: Dict, base_event: Dict) -> Dict:
+        """friend_add / friend_delete"""
+        self._handle_notice(raw_event, base_event)
+        base_event["user_id"] = str(raw_event.get("user_id"))
+        return base_event
+
+    def _handle_notice_recall(self, raw_event: Dict, base_event: Dict) -> Dict:
+        """group_recall / friend_recall"""
+        self._handle_notice(raw_event, base_event)
+        is_group = raw_event["notice_type"] == "group_recall"
+        base_event.update({
+            "message_id": str(raw_event.get("message_id")),
+            "user_id": str(raw_event.get("user_id")),
+            "group_id": str(raw_event.get("group_id", "")) if is_group else None
+        })
+        return base_event
+
+    def _handle_notice_honor(self, raw_event: Dict, base_event: Dict) -> Dict:
+        self._handle_notice(raw_event, base_event)
+        base_event.update({
+            "group_id": str(raw_event.get("group_id")),
+            "user_id": str(raw_event.get("user_id")),
+            "honor_type": raw_event.get("honor_type")
+        })
+        return base_event
+
+    def _handle_notice_poke(self, raw_event: Dict, base_event: Dict) -> Dict:
+        self._handle_notice(raw_event, base_event)
+        base_event.update({
+            "group_id": str(raw_event.get("group_id", "")),
+            "user_id": str(raw_event.get("user_id")),
+            "target_id": str(raw_event.get("target_id"))
+        })
+        return base_event
+
+    def _handle_notice_lucky_king(self, raw_event: Dict, base_event: Dict) -> Dict:
+        self._handle_notice(raw_event, base_event)
+        base_event.update({
+            "group_id": str(raw_event.get("group_id")),
+            "user_id": str(raw_event.get("user_id")),
+            "target_id": str(raw_event.get("target_id"))
+        })
         return base_event
 
     def _handle_request(self, raw_event: Dict, base_event: Dict) -> Dict:
-        """处理请求事件"""
-        request_type = raw_event["request_type"]
-        
+        """处理请求事件（通用字段）"""
         base_event.update({
             "type": "request",
-            "detail_type": f"onebot11_{request_type}",
+            "detail_type": f"onebot11_{raw_event['request_type']}",
             "onebot11_request": raw_event
         })
-        
-        if request_type == "friend":
-            base_event.update({
-                "user_id": str(raw_event.get("user_id")),
-                "comment": raw_event.get("comment"),
-                "flag": raw_event.get("flag")
-            })
-        elif request_type == "group":
-            base_event.update({
-                "group_id": str(raw_event.get("group_id")),
-                "user_id": str(raw_event.get("user_id")),
-                "comment": raw_event.get("comment"),
-                "sub_type": raw_event.get("sub_type"),
-                "flag": raw_event.get("flag")
-            })
-        
+        return base_event
+
+    def _handle_request_friend(self, raw_event: Dict, base_event: Dict) -> Dict:
+        self._handle_request(raw_event, base_event)
+        base_event.update({
+            "user_id": str(raw_event.get("user_id")),
+            "comment": raw_event.get("comment"),
+            "flag": raw_event.get("flag")
+        })
+        return base_event
+
+    def _handle_request_group(self, raw_event: Dict, base_event: Dict) -> Dict:
+        self._handle_request(raw_event, base_event)
+        base_event.update({
+            "group_id": str(raw_event.get("group_id")),
+            "user_id": str(raw_event.get("user_id")),
+            "comment": raw_event.get("comment"),
+            "sub_type": raw_event.get("sub_type"),
+            "flag": raw_event.get("flag")
+        })
         return base_event
 
     def _handle_meta_event(self, raw_event: Dict, base_event: Dict) -> Dict:
-        """处理元事件"""
-        meta_type = raw_event["meta_event_type"]
-        
+        """处理元事件（通用字段）"""
         base_event.update({
             "type": "meta_event",
-            "detail_type": f"onebot11_{meta_type}",
+            "detail_type": f"onebot11_{raw_event['meta_event_type']}",
             "onebot11_meta": raw_event
         })
-        
-        if meta_type == "lifecycle":
-            base_event["sub_type"] = raw_event.get("sub_type", "")
-        elif meta_type == "heartbeat":
-            base_event["interval"] = raw_event.get("interval", 0)
-            base_event["status"] = raw_event.get("status", {})
-        
-        return base_event
\ No newline at end of file
+        return base_event
+
+    def _handle_meta_lifecycle(self, raw_event: Dict, base_event: Dict) -> Dict:
+        self._handle_meta_event(raw_event, base_event)
+        base_event["sub_type"] = raw_event.get("sub_type", "")
+        return base_event
+
+    def _handle_meta_heartbeat(self, raw_event: Dict, base_event: Dict) -> Dict:
+        self._handle_meta_event(raw_event, base_event)
+        base_event["interval"] = raw_event.get("interval", 0)
+        base_event["status"] = raw_event.get("status", {})
+        return base_event
@@ -2,29 +2,126 @@
 import asyncio
 import json
 import aiohttp
-import base64
-import os
-import tempfile
-import uuid
-import filetype
-from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List, Optional, Union
+import time
+import ipaddress
+from fastapi import Request, Response, WebSocket, WebSocketDisconnect
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Union
+from urllib.parse import urlparse
 from dataclasses import dataclass
 from ErisPulse import sdk
 from ErisPulse.Core import router
+from .Batch import BatchSend
+from .Codec import PayloadTemplate, get_codec
+from .Dispatcher import EventDispatcher
+from .Http import HttpTransport, verify_signature
+from .Lanes import SendBatch, SendLanes
+from .Liveness import LivenessMonitor
+from .Media import (
+    DEFAULT_OFFLOAD_THRESHOLD,
+    MediaCache,
+    MediaEncoder,
+    as_local_file,
+    sniff_segment_type,
+)
+from .Pending import ConnectionLostError, PendingCalls
+from .Pool import CHANNELS_SPLIT, CHANNELS_UNIVERSAL, ApiPool, channel_url
+from .RateLimit import SendRateLimiter, TokenBucket
+from .Replay import ReplayQueue, is_idempotent
+from .Segments import SegmentRegistry
+from .Supervisor import ReconnectSupervisor
+from .Upload import (
+    DEFAULT_STREAM_CHUNK_SIZE,
+    DEFAULT_STREAM_THRESHOLD,
+    ProgressCallback,
+    RETCODE_UNSUPPORTED,
+    StreamUploader,
+    file_uri,
+)
 
 @dataclass
 class OneBotAccountConfig:
     """OneBot11 账户配置"""
 
     bot_id: str  # 机器人ID（必填，用于SDK路由）
-    mode: str  # "server" or "client"
+    mode: str  # "server", "client" or "http"
     server_path: Optional[str] = "/"
     server_token: Optional[str] = ""
     client_url: Optional[str] = "ws://127.0.0.1:3001"
     client_token: Optional[str] = ""
     enabled: bool = True
     name: str = ""  # 账户名称
+    dispatch_workers: int = 8  # 事件分片数（同一会话内按序，不同会话间并行）
+    dispatch_queue_size: int = 1000  # 待处理事件队列总上限，满时暂停读取
+    dispatch_overflow_size: int = 1000  # 队列满且有调用等待响应时暂存的事件总上限，超出丢弃
+    rate_limit_global: float = 0.0  # 账户每秒最多发送消息数（0 表示不限速）
+    rate_limit_global_burst: int = 5  # 账户全局突发上限
+    rate_limit_group: float = 0.0  # 单个群每秒最多发送消息数（0 表示不限速）
+    rate_limit_group_burst: int = 3  # 单个群突发上限
+    rate_limit_user: float = 0.0  # 单个私聊对象每秒最多发送消息数（0 表示不限速）
+    rate_limit_user_burst: int = 3  # 单个私聊对象突发上限
+    send_queue_limit: int = 1000  # 最多排队等待发送的消息数，超出时拒绝（0 表示不限）
+    send_max_wait: float = 0.0  # 预计排队时间上限（秒），超出时拒绝（0 表示不限）
+    send_coalesce_ms: float = 0.0  # 合并窗口（毫秒），窗口内发往同一目标的文本/图片等消息合并为一条（0 表示不合并）
+    local_file_passthrough: Optional[bool] = None  # 本地文件以 file:// 路径交给实现端读取（None 时实现端在本机则直通）
+    reconnect_base_delay: float = 0.2  # 断线后首次立即重连，之后从该间隔（秒）起指数退避
+    reconnect_max_delay: float = 30.0  # 重连间隔上限（秒）
+    circuit_failure_threshold: int = 10  # 连续失败多少次后熔断（0 表示不熔断）
+    circuit_open_seconds: float = 60.0  # 熔断后暂停重连的时间（秒）
+    reconnect_stable_after: float = 10.0  # 连接保持多久（秒）才清零失败计数，之前断开记为一次连接失败
+    heartbeat_timeout_factor: float = 3.0  # 超过心跳间隔的多少倍未收到任何帧即判定连接失效（0 表示不检测）
+    probe_interval: float = 0.0  # 往返延迟探测间隔（秒），连续 2 次无响应判定连接失效（0 表示不探测）
+    probe_timeout: float = 5.0  # 单次探测的超时时间（秒）
+    replay_queue_size: int = 100  # 断线期间最多暂存多少个可重放的调用，重连后按序发出（0 表示不暂存）
+    replay_max_wait: float = 30.0  # 可重放的调用最长等待重连的时间（秒）
+    client_channels: str = CHANNELS_UNIVERSAL  # Client 模式连接方式："universal" 单连接收发，"split" 事件与 API 分开连接
+    api_pool_size: int = 1  # split 模式下的 API 连接数，调用分配给在途调用最少的连接
+    http_url: str = "http://127.0.0.1:5700"  # HTTP 模式下实现端的 API 地址
+    http_secret: str = ""  # HTTP 模式下事件上报的签名密钥（X-Signature），为空时不校验
+
+    @property
+    def rate_limited(self) -> bool:
+        return (
+            self.rate_limit_global > 0
+            or self.rate_limit_group > 0
+            or self.rate_limit_user > 0
+        )
+
+
+# 可与相邻消息合并发送的消息段类型（回复、语音、视频、文件、卡片等必须单独发送）
+COALESCIBLE_SEGMENTS = frozenset({"text", "at", "face", "image"})
+
+# 受发送限速约束的 API
+RATE_LIMITED_ENDPOINTS = frozenset({
+    "send_msg",
+    "send_private_msg",
+    "send_group_msg",
+    "send_private_forward_msg",
+    "send_group_forward_msg",
+})
+
+# 各 API 的默认超时（秒），未列出的使用 default_timeout；可由全局配置 api_timeouts 覆盖
+DEFAULT_API_TIMEOUTS = {
+    # 发送类：实现端通常很快回复，超时早些让调用方及时得知
+    "send_msg": 15,
+    "send_private_msg": 15,
+    "send_group_msg": 15,
+    "delete_msg": 15,
+    # 大列表与合并转发：实现端需要逐项拉取
+    "get_group_member_list": 60,
+    "get_group_list": 60,
+    "get_friend_list": 60,
+    "send_private_forward_msg": 60,
+    "send_group_forward_msg": 60,
+    "get_forward_msg": 60,
+    # 文件类：实现端需要读写或下载整个文件
+    "upload_group_file": 300,
+    "upload_private_file": 300,
+    "upload_file_stream": 120,
+    "download_file": 300,
+    "get_record": 120,
+    "get_image": 120,
+}
 
 
 class OneBotAdapter(sdk.BaseAdapter):
@@ -43,25 +140,13 @@ class OneBotAdapter(sdk.BaseAdapter):
             self._reply_message_id = None
             self._at_all = False
 
-        def _get_msg_type_by_filetype(self, file: Union[str, bytes]) -> str:
-            try:
-                if isinstance(file, bytes):
-                    kind = filetype.guess(file)
-                else:
-                    kind = filetype.guess(file)
-            except Exception:
-                kind = None
-
-            if kind is None:
-                return "image"
-            if kind.mime.startswith("image/"):
-                return "image"
-            elif kind.mime.startswith("audio/"):
-                return "record"
-            elif kind.mime.startswith("video/"):
-                return "video"
-            else:
-                return "image"
+        def _get_msg_type_by_filetype(self, file: Union[str, bytes, Path]) -> str:
+            """
+            根据文件头判断消息段类型（只读取文件头）
+
+            :return: "image"、"record"、"video" 或 "file"
+            """
+            return sniff_segment_type(file)
 
         def _build_message_array(self, message: Union[str, List[Dict]]) -> List[Dict]:
             message_list = []
@@ -125,27 +210,68 @@ class OneBotAdapter(sdk.BaseAdapter):
         def Text(self, text: str):
             return self.Raw_ob12([{"type": "text", "data": {"text": text}}])
 
-        def Image(self, file: Union[str, bytes], filename: str = "image.png"):
+        # 媒体参数 file 可以是 URL、bytes、pathlib.Path 或 "file://" 路径。
+        # 本地文件在实现端位于本机时直接传递路径，否则由适配器映射文件并编码，不整体读入内存。
+        # filename 是分块上传时实现端保存的文件名，默认取本地文件名，bytes 取各方法的默认名
+
+        @staticmethod
+        def _media_data(file, filename: Optional[str], default: str) -> Dict:
+            file = as_local_file(file)
+            if filename is None:
+                filename = file.name if isinstance(file, Path) else default
+            return {"file": file, "file_name": filename}
+
+        def Image(self, file: Union[str, bytes, Path], filename: Optional[str] = None):
             return self.Raw_ob12(
-                [{"type": "image", "data": {"file": file, "file_name": filename}}]
+                [{"type": "image", "data": self._media_data(file, filename, "image.png")}]
             )
 
-        def Voice(self, file: Union[str, bytes], filename: str = "voice.amr"):
+        def Voice(self, file: Union[str, bytes, Path], filename: Optional[str] = None):
             return self.Raw_ob12(
-                [{"type": "audio", "data": {"file": file, "file_name": filename}}]
+                [{"type": "audio", "data": self._media_data(file, filename, "voice.amr")}]
             )
 
-        def Video(self, file: Union[str, bytes], filename: str = "video.mp4"):
+        def Video(
+            self,
+            file: Union[str, bytes, Path],
+            filename: Optional[str] = None,
+            progress: Optional[ProgressCallback] = None,
+        ):
+            """
+            发送视频
+
+            :param progress: 大文件分块上传时的进度回调，接收 (已上传字节数, 总字节数)
+            """
             return self.Raw_ob12(
-                [{"type": "video", "data": {"file": file, "file_name": filename}}]
+                [{"type": "video", "data": self._media_data(file, filename, "video.mp4")}],
+                **({"_progress": progress} if progress else {}),
             )
 
         def Face(self, id: Union[str, int]):
             return self.Raw_ob12([{"type": "face", "data": {"id": str(id)}}])
 
-        def File(self, file: Union[str, bytes], filename: str = "file.dat"):
+        def File(
+            self,
+            file: Union[str, bytes, Path],
+            filename: Optional[str] = None,
+            progress: Optional[ProgressCallback] = None,
+        ):
+            """
+            发送文件，图片、音频、视频按文件头自动以对应的消息段发送
+
+            :param file: URL、bytes、pathlib.Path 或 "file://" 路径
+            :param filename: 文件名，默认取本地文件名
+            :param progress: 大文件分块上传时的进度回调，接收 (已上传字节数, 总字节数)
+            """
+            file = as_local_file(file)
+            if filename is None:
+                filename = file.name if isinstance(file, Path) else "file.dat"
+            seg_type = self._get_msg_type_by_filetype(file)
+            if seg_type == "record":
+                seg_type = "audio"
             return self.Raw_ob12(
-                [{"type": "file", "data": {"file": file, "file_name": filename}}]
+                [{"type": seg_type, "data": {"file": file, "file_name": filename}}],
+                **({"_progress": progress} if progress else {}),
             )
 
         def Raw_ob12(self, message, **kwargs):
@@ -161,16 +287,54 @@ class OneBotAdapter(sdk.BaseAdapter):
 
             self._reset_modifiers()
 
-            return asyncio.create_task(
-                self._adapter.call_api(
-                    endpoint="send_msg",
-                    account_id=self._account_id,
-                    message_type="private" if self._target_type == "user" else "group",
-                    user_id=self._target_id if self._target_type == "user" else None,
-                    group_id=self._target_id if self._target_type == "group" else None,
-                    message=ob11_message,
-                    **kwargs,
-                )
+            return self._adapter._send_message(
+                self._account_id,
+                self._target_type,
+                self._target_id,
+                ob11_message,
+                **kwargs,
+            )
+
+        def Batch(
+            self,
+            target_ids: List[Union[str, int]],
+            message: Union[str, Dict, List[Dict]],
+            concurrency: int = 16,
+            rate: float = 0.0,
+        ) -> BatchSend:
+            """
+            向多个目标发送同一条消息
+
+            消息只转换、编码一次，目标类型取自 To() 指定的类型。
+
+            :param target_ids: 目标ID列表
+            :param message: 文本或 OneBot12 消息段
+            :param concurrency: 同时在途的请求数上限
+            :param rate: 每秒最多发出的请求数，0 表示不限（账户的发送限速仍然生效）
+            :return: 可异步迭代 (target_id, 响应) 或直接 await 的批量发送对象
+            """
+            if isinstance(message, str):
+                message = [{"type": "text", "data": {"text": message}}]
+            elif isinstance(message, dict):
+                message = [message]
+
+            ob11_message = self._convert_ob12_to_ob11(message)
+
+            if self._at_user_ids or self._at_all or self._reply_message_id:
+                ob11_message = self._build_message_array(ob11_message)
+            else:
+                self._insert_text_separators(ob11_message)
+
+            self._reset_modifiers()
+
+            return BatchSend(
+                self._adapter,
+                self._account_id,
+                self._target_type,
+                target_ids,
+                ob11_message,
+                concurrency=concurrency,
+                rate=rate,
             )
 
         def At(self, user_id: Union[str, int], name: str = None):
@@ -186,12 +350,12 @@ class OneBotAdapter(sdk.BaseAdapter):
             return self
 
         def Recall(self, message_id: Union[str, int]):
-            return asyncio.create_task(
-                self._adapter.call_api(
-                    endpoint="delete_msg",
-                    account_id=self._account_id,
-                    message_id=message_id,
-                )
+            return self._adapter._send_ordered(
+                self._account_id,
+                self._target_type,
+                self._target_id,
+                "delete_msg",
+                message_id=message_id,
             )
 
         def _convert_ob12_to_ob11(self, message: List[Dict]) -> List[Dict]:
@@ -201,67 +365,7 @@ class OneBotAdapter(sdk.BaseAdapter):
             :param message: OneBot12 消息段数组
             :return: OneBot11 消息段数组
             """
-            ob11_message = []
-
-            for segment in message:
-                seg_type = segment.get("type", "")
-                seg_data = segment.get("data", {})
-
-                # 文本消息
-                if seg_type == "text":
-                    ob11_message.append(
-                        {"type": "text", "data": {"text": seg_data.get("text", "")}}
-                    )
-
-                # 图片
-                elif seg_type == "image":
-                    file = seg_data.get("file") or seg_data.get("url", "")
-                    ob11_message.append({"type": "image", "data": {"file": file}})
-
-                # 语音/音频
-                elif seg_type == "audio" or seg_type == "record":
-                    file = seg_data.get("file") or seg_data.get("url", "")
-                    ob11_message.append({"type": "record", "data": {"file": file}})
-
-                # 视频
-                elif seg_type == "video":
-                    file = seg_data.get("file") or seg_data.get("url", "")
-                    ob11_message.append({"type": "video", "data": {"file": file}})
-
-                # 文件
-                elif seg_type == "file":
-                    file = seg_data.get("file") or seg_data.get("url", "")
-                    file_name = seg_data.get("file_name", "")
-                    data = {"file": file}
-                    if file_name:
-                        data["name"] = file_name
-                    ob11_message.append({"type": "file", "data": data})
-
-                # 表情
-                elif seg_type == "face":
-                    face_id = seg_data.get("id", "")
-                    ob11_message.append({"type": "face", "data": {"id": face_id}})
-
-                # @用户（mention）
-                elif seg_type == "mention":
-                    user_id = seg_data.get("user_id", "")
-                    ob11_message.append({"type": "at", "data": {"qq": str(user_id)}})
-
-                # 回复
-                elif seg_type == "reply":
-                    msg_id = seg_data.get("message_id", "")
-                    ob11_message.append({"type": "reply", "data": {"id": msg_id}})
-
-                # OneBot11 扩展消息段（直接保留）
-                elif seg_type.startswith("onebot11_"):
-                    cq_type = seg_type[10:]  # 去掉 onebot11_ 前缀
-                    ob11_message.append({"type": cq_type, "data": seg_data})
-
-                # 其他未知类型，直接保留
-                else:
-                    ob11_message.append({"type": seg_type, "data": seg_data})
-
-            return ob11_message
+            return self._adapter.segments.convert_to_ob11(message)
 
     def __init__(self, sdk):
         super().__init__()
@@ -273,28 +377,113 @@ class OneBotAdapter(sdk.BaseAdapter):
         self.accounts: Dict[str, OneBotAccountConfig] = self._load_account_configs()
 
         # 连接池 - 每个账户一个连接
-        self._api_response_futures: Dict[str, Dict[str, asyncio.Future]] = {}
+        self._api_response_futures: Dict[str, PendingCalls] = {}
         self.sessions: Dict[str, aiohttp.ClientSession] = {}
         self.connections: Dict[str, aiohttp.ClientWebSocketResponse] = {}
 
-        # 重连任务
+        # split 模式下的 API 连接池 - 每个 Client 账户一个
+        self.api_pools: Dict[str, ApiPool] = {}
+
+        # HTTP 模式的 API 调用 - 所有 HTTP 账户共用一个 keep-alive 连接池
+        self.http = HttpTransport(
+            limit=self.sdk.config.getConfig("OneBotv11_Adapter.http_pool_limit", 100),
+            limit_per_host=self.sdk.config.getConfig("OneBotv11_Adapter.http_pool_limit_per_host", 32),
+            keepalive_timeout=self.sdk.config.getConfig("OneBotv11_Adapter.http_keepalive", 30.0),
+        )
+
+        # 连接监管任务与重连状态 - 每个 Client 账户一个
         self.reconnect_tasks: Dict[str, asyncio.Task] = {}
+        self.supervisors: Dict[str, ReconnectSupervisor] = {}
+        # 所有账户共用的发起连接节奏，大量账户同时重连时错开
+        self._connect_gate = TokenBucket(
+            self.sdk.config.getConfig("OneBotv11_Adapter.reconnect_rate", 10.0),
+            self.sdk.config.getConfig("OneBotv11_Adapter.reconnect_burst", 5),
+            time.monotonic(),
+        )
+
+        # 断线期间暂存的可重放调用 - 每个账户一个
+        self.replay_queues: Dict[str, ReplayQueue] = {}
+
+        # 存活检测与往返延迟 - 每个连接一个
+        self.liveness: Dict[str, LivenessMonitor] = {}
+
+        # 事件分发工作池 - 每个账户一个
+        self.dispatchers: Dict[str, EventDispatcher] = {}
+
+        # 发送限速器 - 每个开启限速的账户一个
+        self.rate_limiters: Dict[str, SendRateLimiter] = {}
+
+        # 按目标分道的有序发送
+        self.send_lanes = SendLanes()
+        # 合并窗口内尚未发出的消息批次
+        self._send_batches: Dict[tuple, SendBatch] = {}
+        # 发送后查询媒体引用等后台任务，保留引用以免被回收，关闭时取消
+        self._background_tasks: Set[asyncio.Task] = set()
 
         # 初始化状态
         self._is_running = False
 
         # 默认配置
-        self.default_retry_interval = 30
+        self.default_connect_timeout = 10
         self.default_timeout = 30
+        self.api_timeouts: Dict[str, float] = {
+            **DEFAULT_API_TIMEOUTS,
+            **(self.sdk.config.getConfig("OneBotv11_Adapter.api_timeouts", {}) or {}),
+        }
+
+        self.codec = self._setup_codec()
+
+        # bytes 媒体编码，超过阈值时在线程池中进行
+        self.media = self._setup_media()
+        # 大文件分块上传
+        self.uploader = StreamUploader(
+            self,
+            threshold=self.sdk.config.getConfig(
+                "OneBotv11_Adapter.stream_upload_threshold", DEFAULT_STREAM_THRESHOLD
+            ),
+            chunk_size=self.sdk.config.getConfig(
+                "OneBotv11_Adapter.stream_upload_chunk_size", DEFAULT_STREAM_CHUNK_SIZE
+            ),
+        )
 
+        # 消息段转换表，可注册厂商扩展消息段
+        self.segments = SegmentRegistry()
         self.convert = self._setup_converter()
 
+    def _setup_codec(self):
+        """设置JSON编解码器"""
+        name = self.sdk.config.getConfig("OneBotv11_Adapter.json_codec", "auto")
+        try:
+            codec = get_codec(name)
+        except ValueError as e:
+            self.logger.warning(f"{str(e)}，将自动选择")
+            codec = get_codec()
+        self.logger.debug(f"使用JSON编解码器: {codec.name}")
+        return codec
+
+    def _setup_media(self) -> MediaEncoder:
+        """设置 bytes 媒体编码与内容缓存"""
+        get = self.sdk.config.getConfig
+        cache = None
+        if get("OneBotv11_Adapter.media_cache", True):
+            cache = MediaCache(
+                max_entries=get("OneBotv11_Adapter.media_cache_entries", 1024),
+                max_bytes=int(get("OneBotv11_Adapter.media_cache_size_mb", 64) * 1024 * 1024),
+            )
+        return MediaEncoder(
+            get("OneBotv11_Adapter.media_offload_threshold", DEFAULT_OFFLOAD_THRESHOLD),
+            cache=cache,
+        )
+
     def _setup_converter(self):
         """设置转换器"""
         from .Converter import OneBot11Converter
 
-        converter = OneBot11Converter()
-        return converter.convert
+        self.converter = OneBot11Converter(
+            self.segments,
+            keep_raw=self.sdk.config.getConfig("OneBotv11_Adapter.keep_raw_event", True),
+        )
+        return self.converter.convert
 
     def _load_account_configs(self) -> Dict[str, OneBotAccountConfig]:
         """加载多账户配置"""
@@ -362,131 +551,769 @@ class OneBotAdapter(sdk.BaseAdapter):
                 client_token=config.get("client_token", ""),
                 enabled=config.get("enabled", True),
                 name=account_name,
+                dispatch_workers=config.get("dispatch_workers", 8),
+                dispatch_queue_size=config.get("dispatch_queue_size", 1000),
+                dispatch_overflow_size=config.get("dispatch_overflow_size", 1000),
+                rate_limit_global=config.get("rate_limit_global", 0.0),
+                rate_limit_global_burst=config.get("rate_limit_global_burst", 5),
+                rate_limit_group=config.get("rate_limit_group", 0.0),
+                rate_limit_group_burst=config.get("rate_limit_group_burst", 3),
+                rate_limit_user=config.get("rate_limit_user", 0.0),
+                rate_limit_user_burst=config.get("rate_limit_user_burst", 3),
+                send_queue_limit=config.get("send_queue_limit", 1000),
+                send_max_wait=config.get("send_max_wait", 0.0),
+                send_coalesce_ms=config.get("send_coalesce_ms", 0.0),
+                local_file_passthrough=config.get("local_file_passthrough"),
+                reconnect_base_delay=config.get("reconnect_base_delay", 0.2),
+                reconnect_max_delay=config.get("reconnect_max_delay", 30.0),
+                circuit_failure_threshold=config.get("circuit_failure_threshold", 10),
+                circuit_open_seconds=config.get("circuit_open_seconds", 60.0),
+                reconnect_stable_after=config.get("reconnect_stable_after", 10.0),
+                heartbeat_timeout_factor=config.get("heartbeat_timeout_factor", 3.0),
+                probe_interval=config.get("probe_interval", 0.0),
+                probe_timeout=config.get("probe_timeout", 5.0),
+                replay_queue_size=config.get("replay_queue_size", 100),
+                replay_max_wait=config.get("replay_max_wait", 30.0),
+                client_channels=config.get("client_channels", CHANNELS_UNIVERSAL),
+                api_pool_size=config.get("api_pool_size", 1),
+                http_url=config.get("http_url", "http://127.0.0.1:5700"),
+                http_secret=config.get("http_secret", ""),
             )
 
         self.logger.info(f"OneBot11适配器初始化完成，加载 {len(accounts)} 个账户")
         return accounts
 
+    def _resolve_account(self, account_id: Optional[str]):
+        """
+        根据账户名或bot_id确定使用的账户
+
+        :return: (账户名, 账户配置)
+        """
+        if account_id is None:
+            if not self.accounts:
+                raise ValueError("没有配置任何OneBot账户")
+            account_name = next(iter(self.accounts.keys()))
+            return account_name, self.accounts[account_name]
+        if account_id in self.accounts:
+            return account_id, self.accounts[account_id]
+        for account_name, acc_config in self.accounts.items():
+            if acc_config.bot_id == account_id:
+                return account_name, acc_config
+        raise ValueError(f"找不到账户 {account_id}")
+
+    def _lane_key(self, account_id, target_type, target_id):
+        """发送分道键，返回 (分道键, 账户配置或None)"""
+        try:
+            account_name, account = self._resolve_account(account_id)
+        except ValueError:
+            # 交由 call_api 在任务中抛出
+            account_name, account = account_id, None
+        return (account_name, target_type, str(target_id)), account
+
+    def _send_ordered(
+        self, account_id, target_type, target_id, endpoint: str, **params
+    ) -> asyncio.Task:
+        """
+        在目标的发送分道中调用API
+
+        同一账户、同一目标的调用按本方法的调用顺序逐个发出，
+        上一条收到响应后才发出下一条；不同目标之间并行。
+
+        :return: 调用任务，结果为 call_api 的标准化响应
+        """
+        key, _ = self._lane_key(account_id, target_type, target_id)
+        # 之后的消息不能再并入之前的批次，否则会越过本次调用
+        batch = self._send_batches.pop(key, None)
+        if batch is not None:
+            batch.closed = True
+        return asyncio.create_task(
+            self.send_lanes.run(
+                key, self.call_api(endpoint, account_id=account_id, **params)
+            )
+        )
+
+    async def _send_prepared(
+        self, account_id, target_type, target_id, template: PayloadTemplate
+    ) -> Dict:
+        """在目标的发送分道中发送预编码的 send_msg 请求"""
+        key, account = self._lane_key(account_id, target_type, target_id)
+        if account is None:
+            self._resolve_account(account_id)
+        if not account.enabled:
+            raise ValueError(f"账户 {key[0]} 已禁用")
+
+        batch = self._send_batches.pop(key, None)
+        if batch is not None:
+            batch.closed = True
+
+        async def send():
+            if account.rate_limited:
+                rejected = await self._acquire_send_slot(
+                    key[0], account, "send_msg", target_type, target_id, {}
+                )
+                if rejected is not None:
+                    return rejected
+            return await self._request(
+                key[0], account, "send_msg", {},
+                render=lambda echo: template.render(target_id, echo),
+            )
+
+        return await self.send_lanes.run(key, send())
+
+    def _send_message(
+        self, account_id, target_type, target_id, message: List[Dict], **kwargs
+    ) -> asyncio.Task:
+        """
+        发送 OneBot11 消息段数组
+
+        账户开启合并窗口时，只含文本/@/表情/图片的消息会与窗口内发往同一目标的
+        其他消息合并为一次 send_msg，各调用方都会收到这次发送的响应（含 message_id）。
+        """
+        params = {
+            "message_type": "private" if target_type == "user" else "group",
+            "user_id": target_id if target_type == "user" else None,
+            "group_id": target_id if target_type == "group" else None,
+        }
+        key, account = self._lane_key(account_id, target_type, target_id)
+        window = account.send_coalesce_ms if account else 0
+        if (
+            window <= 0
+            or kwargs
+            or not message
+            or not all(seg.get("type") in COALESCIBLE_SEGMENTS for seg in message)
+        ):
+            return self._send_ordered(
+                account_id, target_type, target_id, "send_msg", message=message, **params, **kwargs
+            )
+
+        batch = self._send_batches.get(key)
+        if batch is None or not batch.accepts(message):
+            if batch is not None:
+                batch.closed = True
+            batch = self._send_batches[key] = SendBatch(params)
+            batch.task = asyncio.create_task(
+                self.send_lanes.run(key, self._flush_batch(key, batch, account_id, window))
+            )
+        self._append_to_batch(batch, message)
+        return asyncio.create_task(self._await_batch(batch))
+
+    def _append_to_batch(self, batch: SendBatch, message: List[Dict]):
+        """追加一条消息，衔接处复用消息内的空格分隔规则"""
+        if batch.message:
+            joint = [batch.message[-1], message[0]]
+            self.Send._insert_text_separators(joint)
+            batch.message.extend(joint[1:-1])
+        batch.message.extend(message)
+        batch.parts += 1
+
+    async def _flush_batch(self, key, batch: SendBatch, account_id, window: float):
+        """等待合并窗口结束后发出批次"""
+        if not batch.closed:
+            await asyncio.sleep(window / 1000)
+        batch.closed = True
+        if self._send_batches.get(key) is batch:
+            del self._send_batches[key]
+        return await self.call_api(
+            "send_msg", account_id=account_id, message=batch.message, **batch.params
+        )
+
+    @staticmethod
+    async def _await_batch(batch: SendBatch) -> Dict:
+        # 单个调用方被取消不影响批次中的其他消息
+        response = await asyncio.shield(batch.task)
+        return dict(response)
+
     async def call_api(self, endpoint: str, account_id: str = None, **params):
         """
         调用 OneBot API
 
         :param endpoint: API端点
         :param account_id: 账户名或bot_id
-        :param params: 其他参数
+        :param params: 其他参数，以下划线开头的是适配器选项，不会发给实现端：
+            _progress: 大文件分块上传的进度回调，接收 (已上传字节数, 总字节数)
+            _replay: 断线时是否暂存该调用并在重连后重新发送，默认只读 API（get_*/can_*）重放
+            _timeout: 本次调用的超时时间（秒），默认按 API 取 api_timeouts 中的值
         :return: 标准化响应
+        :raises ConnectionLostError: 请求已发出但连接在响应前断开（且未重放）
         """
-        # 确定使用的账户
-        if account_id is None:
-            if not self.accounts:
-                raise ValueError("没有配置任何OneBot账户")
-            account = next(iter(self.accounts.values()))
-            account_name = next(iter(self.accounts.keys()))
-        else:
-            if account_id in self.accounts:
-                account = self.accounts[account_id]
-                account_name = account_id
-            else:
-                for account_name, acc_config in self.accounts.items():
-                    if acc_config.bot_id == account_id:
-                        account = acc_config
-                        break
-                else:
-                    raise ValueError(f"找不到账户 {account_id}")
+        progress = params.pop("_progress", None)
+        replay = params.pop("_replay", None)
+        timeout = params.pop("_timeout", None)
+        if replay is None:
+            replay = is_idempotent(endpoint)
+        account_name, account = self._resolve_account(account_id)
 
         if not account.enabled:
             raise ValueError(f"账户 {account_name} 已禁用")
 
+        # 发送类API按账户/群/私聊对象限速，超速时排队等待
+        if endpoint in RATE_LIMITED_ENDPOINTS and account.rate_limited:
+            target_type, target_id = self._send_target(params)
+            rejected = await self._acquire_send_slot(
+                account_name, account, endpoint, target_type, target_id, params
+            )
+            if rejected is not None:
+                return rejected
+
+        # bytes 媒体与本地文件编码为 base64:// 后直接拼入请求，大文件在线程池中处理
+        if self.media.has_media(params.get("message")):
+            # 实现端在本机时本地文件直接以路径传递
+            if self._is_same_host(account_name, account):
+                params = {
+                    **params,
+                    "message": self.media.passthrough_local_files(params["message"]),
+                }
+            # 大文件先分块上传，消息中改用实现端本机上的路径
+            params = await self._upload_large_media(account_name, params, progress)
+            if self.media.has_media(params["message"]):
+                return await self._request_with_media(
+                    account_name, account, endpoint, params, replay, timeout
+                )
+
+        return await self._request(
+            account_name, account, endpoint, params, replay=replay, timeout=timeout
+        )
+
+    async def _request_with_media(
+        self,
+        account_name: str,
+        account: OneBotAccountConfig,
+        endpoint: str,
+        params: Dict,
+        replay: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Dict:
+        """
+        发送含 bytes 媒体或本地文件的请求
+
+        已知实现端引用的内容以引用代替；实现端拒绝了使用引用的请求时作废引用并完整重发一次。
+        本地超时、发送队列已满等适配器自身产生的失败不重发（请求可能已被实现端执行）。
+        """
+        prepared = await self.media.prepare(self.codec, endpoint, params)
+        response = await self._request(
+            account_name, account, endpoint, params,
+            render=lambda echo: prepared.template.render(None, echo),
+            replay=replay, timeout=timeout,
+        )
+        # onebot_raw 为 None 的失败响应由适配器生成，不代表引用失效
+        if (
+            response["status"] != "ok"
+            and prepared.refs_used
+            and response.get("onebot_raw") is not None
+        ):
+            self.logger.debug(f"账户 {account_name} 媒体缓存引用已失效，改为完整发送")
+            for digest in prepared.refs_used:
+                self.media.cache.invalidate(digest)
+            self._skip_media_learning(prepared.to_learn)
+            prepared = await self.media.prepare(self.codec, endpoint, params)
+            response = await self._request(
+                account_name, account, endpoint, params,
+                render=lambda echo: prepared.template.render(None, echo),
+                replay=replay, timeout=timeout,
+            )
+
+        if prepared.to_learn:
+            message_id = None
+            if response["status"] == "ok":
+                data = response.get("data") or {}
+                message_id = data.get("message_id") if isinstance(data, dict) else None
+                message_id = message_id or response.get("message_id")
+            if message_id:
+                task = asyncio.create_task(
+                    self._learn_media_refs(account_name, message_id, prepared.to_learn)
+                )
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            else:
+                self._skip_media_learning(prepared.to_learn)
+        return response
+
+    async def _upload_large_media(
+        self, account_name: str, params: Dict, progress: Optional[ProgressCallback]
+    ) -> Dict:
+        """把超过分块上传阈值的媒体上传到实现端，上传失败的保留原样以单帧发送"""
+        message = params["message"]
+        if not any(
+            isinstance(seg, dict)
+            and self.uploader.should_upload(account_name, (seg.get("data") or {}).get("file"))
+            for seg in message
+        ):
+            return params
+
+        result = []
+        for segment in message:
+            data = segment.get("data") if isinstance(segment, dict) else None
+            file = data.get("file") if data else None
+            if self.uploader.should_upload(account_name, file):
+                # Send 的媒体方法把文件名带在 name 中；直接调用 call_api 时可能没有
+                filename = data.get("name") or (
+                    file.name if isinstance(file, Path) else f"{segment['type']}.dat"
+                )
+                response = await self.uploader.upload(account_name, file, filename, progress)
+                if response["status"] == "ok":
+                    uri = file_uri(str(response["data"]["file_path"]))
+                    segment = {**segment, "data": {**data, "file": uri}}
+            result.append(segment)
+        return {**params, "message": result}
+
+    async def upload_file(
+        self,
+        file: Union[bytes, Path, str],
+        account_id: Optional[str] = None,
+        filename: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> Dict:
+        """
+        把文件分块上传到实现端（upload_file_stream）
+
+        返回的路径位于实现端本机，可直接作为图片/视频/文件消息段的 file 发送。
+
+        :param file: bytes、pathlib.Path 或 "file://" 路径
+        :param account_id: 账户名或bot_id
+        :param filename: 实现端保存的文件名，默认取本地文件名
+        :param progress: 进度回调，接收 (已上传字节数, 总字节数)，可以是协程函数
+        :return: 标准化响应，成功时 data["file_path"] 为实现端本机上的文件路径
+        """
+        file = as_local_file(file)
+        if not isinstance(file, (bytes, bytearray, memoryview, Path)):
+            raise ValueError("upload_file 只接受 bytes 或本地文件")
+        account_name, _ = self._resolve_account(account_id)
+        if filename is None:
+            filename = file.name if isinstance(file, Path) else "file.dat"
+        return await self.uploader.upload(account_name, file, filename, progress)
+
+    def upload_stats(self) -> Dict[str, int]:
+        """
+        获取分块上传的统计数据
+
+        :return: {"uploads": ..., "failed": ..., "chunks": ..., "bytes": ...}
+        """
+        return self.uploader.stats
+
+    def _is_same_host(self, account_name: str, account: OneBotAccountConfig) -> bool:
+        """
+        实现端是否与适配器位于同一主机（可直接读取本地文件路径）
+
+        未配置 local_file_passthrough 时，Client/HTTP 模式看连接地址、Server 模式看对端地址是否为回环地址。
+        """
+        if account.local_file_passthrough is not None:
+            return bool(account.local_file_passthrough)
+        if account.mode == "client":
+            host = urlparse(account.client_url).hostname
+        elif account.mode == "http":
+            host = urlparse(account.http_url).hostname
+        else:
+            client = getattr(self.connections.get(account_name), "client", None)
+            host = getattr(client, "host", None)
+        if not host:
+            return False
+        if host == "localhost":
+            return True
+        try:
+            return ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            return False
+
+    def _skip_media_learning(self, to_learn):
+        """本次发送未能查询引用，留待下次发送"""
+        for _, digest in to_learn:
+            self.media.cache.finish_learning(digest, None, give_up=False)
+
+    async def _learn_media_refs(self, account_name: str, message_id, to_learn):
+        """查询已发送的消息，记录实现端为其中图片保存的文件引用"""
+        images = []
+        try:
+            response = await self.call_api(
+                "get_msg", account_id=account_name, message_id=message_id
+            )
+            data = response.get("data") or {}
+            message = data.get("message") if isinstance(data, dict) else None
+            if isinstance(message, list):
+                images = [
+                    seg.get("data") or {} for seg in message if seg.get("type") == "image"
+                ]
+        except Exception as e:
+            self.logger.debug(f"账户 {account_name} 查询媒体引用失败: {str(e)}")
+        finally:
+            for position, digest in to_learn:
+                ref = None
+                if position < len(images):
+                    ref = images[position].get("file") or images[position].get("url")
+                self.media.cache.finish_learning(digest, str(ref) if ref else None)
+
+    def media_stats(self) -> Dict[str, int]:
+        """
+        获取媒体缓存的统计数据
+
+        :return: {"hits": ..., "encoded_hits": ..., "misses": ..., "stale": ..., ...}，未开启缓存时为空
+        """
+        return self.media.cache.stats if self.media.cache is not None else {}
+
+    async def _acquire_send_slot(
+        self, account_name: str, account: OneBotAccountConfig, endpoint: str,
+        target_type, target_id, params: Dict,
+    ) -> Optional[Dict]:
+        """等待发送限速放行，被拒绝时返回失败响应"""
+        limiter = self._get_rate_limiter(account_name)
+        if await limiter.acquire(target_type, target_id):
+            return None
+        self.logger.warning(f"账户 {account_name} 发送队列已满，已拒绝: {endpoint}")
+        return self._failed_response(
+            account, 33002, f"账户 {account_name} 发送队列已满: {endpoint}", params
+        )
+
+    async def _request(
+        self,
+        account_name: str,
+        account: OneBotAccountConfig,
+        endpoint: str,
+        params: Dict,
+        render: Optional[Callable[[str], bytes]] = None,
+        replay: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Dict:
+        """
+        发送请求并等待响应
+
+        :param render: 预编码请求的生成函数（接收 echo 返回请求帧，echo 为 None 时返回参数部分），为空时由 params 编码
+        :param replay: 未连接或连接在响应前断开时，是否等待重连后重新发送（HTTP 模式没有连接状态，忽略）
+        :param timeout: 超时时间（秒），为空时按 API 取 api_timeouts 中的值；重放时包含等待重连的时间
+        :return: 标准化响应
+        """
+        if timeout is None:
+            timeout = self.api_timeouts.get(endpoint, self.default_timeout)
+        if account.mode == "http":
+            return await self._http_request(
+                account_name, account, endpoint, params, render, timeout
+            )
+        if not replay or account.replay_queue_size <= 0:
+            return await self._request_once(
+                account_name, account, endpoint, params, render, timeout
+            )
+
+        now = time.monotonic()
+        call_deadline = now + timeout
+        deadline = min(call_deadline, now + account.replay_max_wait)
+        while True:
+            connection = self.connections.get(account_name)
+            if connection is not None and not getattr(connection, "closed", False):
+                try:
+                    return await self._request_once(
+                        account_name, account, endpoint, params, render,
+                        call_deadline - time.monotonic(),
+                    )
+                except ConnectionError:
+                    # 连接在响应前断开（或发送时已在关闭）则等待重连，其他错误照常抛出
+                    if self.connections.get(account_name) is connection and not getattr(
+                        connection, "closed", False
+                    ):
+                        raise
+            if not await self._get_replay_queue(account_name).hold(deadline - time.monotonic()):
+                raise ConnectionError(f"账户 {account_name} 尚未连接，等待重连超时或暂存队列已满")
+
+    async def _request_once(
+        self,
+        account_name: str,
+        account: OneBotAccountConfig,
+        endpoint: str,
+        params: Dict,
+        render: Optional[Callable[[str], bytes]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict:
+        """
+        在当前连接上发送一次请求并等待响应
+
+        :param timeout: 超时时间（秒），从发送前开始计算，为空时使用 default_timeout
+        """
         connection = self.connections.get(account_name)
         if not connection:
             raise ConnectionError(f"账户 {account_name} 尚未连接")
 
-        if connection.closed:
+        if getattr(connection, "closed", False):
             raise ConnectionError(f"账户 {account_name} 的连接已关闭")
 
         # 创建响应Future
-        if account_name not in self._api_response_futures:
-            self._api_response_futures[account_name] = {}
+        pending = self._get_pending(account_name)
+        echo, future = pending.create(self.default_timeout if timeout is None else timeout)
 
-        echo = str(hash((str(params), account_name)))
-        future = asyncio.get_event_loop().create_future()
-        self._api_response_futures[account_name][echo] = future
-
-        payload = {"action": endpoint, "params": params, "echo": echo}
+        # split 模式下请求发往在途调用最少的 API 连接
+        pool = self.api_pools.get(account_name)
+        slot = None
+        if pool is not None:
+            slot = pool.acquire()
+            connection = pool.connections[slot]
 
         try:
-            await connection.send_str(json.dumps(payload))
+            if render is not None:
+                await self._send_encoded(connection, render(echo))
+            else:
+                payload = {"action": endpoint, "params": params, "echo": echo}
+                await self._send_payload(connection, payload)
         except Exception as e:
             self.logger.error(f"账户 {account_name} 发送请求失败: {str(e)}")
-            if echo in self._api_response_futures[account_name]:
-                del self._api_response_futures[account_name][echo]
+            pending.discard(echo)
+            if slot is not None:
+                pool.release(slot)
             raise
 
         try:
-            raw_response = await asyncio.wait_for(future, timeout=self.default_timeout)
-
-            # 标准化响应
-            status = "ok"
-            retcode = raw_response.get("retcode", 0)
-            if retcode != 0:
-                status = "failed"
-
-            standardized_response = {
-                "status": status,
-                "retcode": retcode,
-                "data": raw_response.get("data"),
-                "message_id": str(raw_response.get("message_id", "")),
-                "message": raw_response.get("message", ""),
-                "onebot_raw": raw_response,
-                "self": {"user_id": account.bot_id},
-            }
+            # 超时由等待表的共用定时器处理，到期时 future 以 asyncio.TimeoutError 结束
+            raw_response = await future
+            return self._standardize_response(account, raw_response, params)
 
-            if "echo" in params:
-                standardized_response["echo"] = params["echo"]
+        except asyncio.TimeoutError:
+            self.logger.error(f"账户 {account_name} API调用超时: {endpoint}")
+            return self._failed_response(
+                account, 33001, f"账户 {account_name} API调用超时: {endpoint}", params
+            )
 
-            return standardized_response
+        finally:
+            pending.discard(echo)
+            if slot is not None:
+                pool.release(slot)
+
+    async def _http_request(
+        self,
+        account_name: str,
+        account: OneBotAccountConfig,
+        endpoint: str,
+        params: Dict,
+        render: Optional[Callable[[Optional[str]], bytes]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict:
+        """
+        以 HTTP POST 调用一次 API
 
+        请求复用共用连接池中的 keep-alive 连接，并发调用分摊到多条连接上。
+        实现端返回 404 时视为不支持该 API（retcode 1404），其他非 200 状态码以状态码作为 retcode。
+        """
+        body = render(None) if render is not None else self.codec.dumps_bytes(params)
+        url = f"{account.http_url.rstrip('/')}/{endpoint}"
+        try:
+            status, content = await self.http.post(
+                url, body, token=account.client_token,
+                timeout=self.default_timeout if timeout is None else timeout,
+            )
         except asyncio.TimeoutError:
             self.logger.error(f"账户 {account_name} API调用超时: {endpoint}")
-            if not future.done():
-                future.cancel()
-
-            timeout_response = {
-                "status": "failed",
-                "retcode": 33001,
-                "data": None,
-                "message_id": "",
-                "message": f"账户 {account_name} API调用超时: {endpoint}",
-                "onebot_raw": None,
-                "self": {"user_id": account.bot_id},
-            }
+            return self._failed_response(
+                account, 33001, f"账户 {account_name} API调用超时: {endpoint}", params
+            )
+        except aiohttp.ClientError as e:
+            self.logger.error(f"账户 {account_name} 发送请求失败: {str(e)}")
+            raise ConnectionError(f"账户 {account_name} HTTP 请求失败: {str(e)}") from e
 
-            if "echo" in params:
-                timeout_response["echo"] = params["echo"]
+        if status == 404:
+            return self._failed_response(
+                account, RETCODE_UNSUPPORTED, f"账户 {account_name} 的实现端不支持该API: {endpoint}", params
+            )
+        if status != 200:
+            self.logger.error(f"账户 {account_name} API调用失败: {endpoint} (HTTP {status})")
+            return self._failed_response(
+                account, status, f"账户 {account_name} API调用失败: HTTP {status}", params
+            )
+        try:
+            raw_response = self.codec.loads(content)
+        except json.JSONDecodeError:
+            raw_response = None
+        if not isinstance(raw_response, dict):
+            self.logger.error(f"账户 {account_name} 无效的响应格式: {content[:200]!r}")
+            return self._failed_response(
+                account, 33004, f"账户 {account_name} 无效的响应格式: {endpoint}", params
+            )
+        return self._standardize_response(account, raw_response, params)
 
-            return timeout_response
+    def http_stats(self) -> Dict[str, int]:
+        """
+        获取 HTTP 模式的调用统计数据
 
-        finally:
+        :return: {"requests": ..., "failed": ..., "in_flight": ...}
+        """
+        return self.http.stats
+
+    @staticmethod
+    def _standardize_response(
+        account: OneBotAccountConfig, raw_response: Dict, params: Dict
+    ) -> Dict:
+        """将实现端的原始响应转换为标准化响应"""
+        retcode = raw_response.get("retcode", 0)
+        response = {
+            "status": "ok" if retcode == 0 else "failed",
+            "retcode": retcode,
+            "data": raw_response.get("data"),
+            "message_id": str(raw_response.get("message_id", "")),
+            "message": raw_response.get("message", ""),
+            "onebot_raw": raw_response,
+            "self": {"user_id": account.bot_id},
+        }
+        if "echo" in params:
+            response["echo"] = params["echo"]
+        return response
+
+    @staticmethod
+    def _failed_response(
+        account: OneBotAccountConfig, retcode: int, message: str, params: Dict
+    ) -> Dict:
+        """构造未收到实现端响应时的标准化失败响应"""
+        response = {
+            "status": "failed",
+            "retcode": retcode,
+            "data": None,
+            "message_id": "",
+            "message": message,
+            "onebot_raw": None,
+            "self": {"user_id": account.bot_id},
+        }
+        if "echo" in params:
+            response["echo"] = params["echo"]
+        return response
+
+    @staticmethod
+    def _send_target(params: Dict):
+        """从发送参数中取出目标 (target_type, target_id)"""
+        group_id = params.get("group_id")
+        if group_id and params.get("message_type") != "private":
+            return "group", group_id
+        user_id = params.get("user_id")
+        if user_id:
+            return "user", user_id
+        return None, None
+
+    def _get_rate_limiter(self, account_name: str) -> SendRateLimiter:
+        """获取（必要时创建）账户的发送限速器"""
+        limiter = self.rate_limiters.get(account_name)
+        if limiter is None:
+            account = self.accounts[account_name]
+            limiter = SendRateLimiter(
+                global_rate=account.rate_limit_global,
+                global_burst=account.rate_limit_global_burst,
+                group_rate=account.rate_limit_group,
+                group_burst=account.rate_limit_group_burst,
+                user_rate=account.rate_limit_user,
+                user_burst=account.rate_limit_user_burst,
+                queue_limit=account.send_queue_limit,
+                max_wait=account.send_max_wait,
+            )
+            self.rate_limiters[account_name] = limiter
+        return limiter
+
+    def send_stats(self) -> Dict[str, Dict]:
+        """
+        获取各账户发送限速的统计数据
 
-            async def cleanup():
-                await asyncio.sleep(0.1)
-                if (
-                    account_name in self._api_response_futures
-                    and echo in self._api_response_futures[account_name]
-                ):
-                    del self._api_response_futures[account_name][echo]
+        :return: {账户名: {"queued": ..., "delayed": ..., "rejected": ..., "wait_avg_ms": ..., ...}}
+        """
+        return {name: limiter.stats for name, limiter in self.rate_limiters.items()}
 
-            asyncio.create_task(cleanup())
+    async def _send_payload(self, connection, payload: Dict):
+        """
+        以文本帧发送 JSON 数据
+
+        aiohttp 连接直接发送编码后的 bytes，省去 str 往返；
+        FastAPI/Starlette 连接只接受 str。
+        """
+        send_frame = getattr(connection, "send_frame", None)
+        if send_frame is not None:
+            await send_frame(self.codec.dumps_bytes(payload), aiohttp.WSMsgType.TEXT)
+        elif hasattr(connection, "send_str"):
+            await connection.send_str(self.codec.dumps(payload))
+        else:
+            await connection.send_text(self.codec.dumps(payload))
+
+    async def _send_encoded(self, connection, data: bytes):
+        """以文本帧发送已编码的 JSON 数据"""
+        send_frame = getattr(connection, "send_frame", None)
+        if send_frame is not None:
+            await send_frame(data, aiohttp.WSMsgType.TEXT)
+        elif hasattr(connection, "send_str"):
+            await connection.send_str(data.decode("utf-8"))
+        else:
+            await connection.send_text(data.decode("utf-8"))
 
     async def connect(self, account_name: str, retry_interval=None):
-        """连接指定账户的OneBot服务"""
+        """
+        连接指定账户的OneBot服务
+
+        启动该账户的连接监管任务并等待首次连接成功，之后断线由监管任务自动重连。
+        适配器未运行或账户已禁用时直接返回。
+
+        :param account_name: 账户名
+        :param retry_interval: 重连间隔上限（秒），默认使用账户配置 reconnect_max_delay。
+                               旧版本中为固定的重试间隔，现在重连按指数退避，该值只限制最长间隔
+        :raises ConnectionError: 连接成功前监管任务已结束（如适配器关闭或账户被禁用）
+        """
         if account_name not in self.accounts:
             raise ValueError(f"账户 {account_name} 不存在")
 
         account = self.accounts[account_name]
-        if account.mode != "client":
+        if account.mode != "client" or not self._is_running or not account.enabled:
+            return
+
+        supervisor = self._get_supervisor(account_name)
+        if retry_interval:
+            supervisor.max_delay = retry_interval
+        task = self.reconnect_tasks.get(account_name)
+        if task is None or task.done():
+            task = self.reconnect_tasks[account_name] = asyncio.create_task(
+                self._supervise(account_name)
+            )
+        if supervisor.connected.is_set():
             return
 
+        connected = asyncio.create_task(supervisor.connected.wait())
+        try:
+            await asyncio.wait([connected, task], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            connected.cancel()
+        # 连接可能在本协程恢复执行前就已断开，以等待结果而不是当前状态判断
+        if connected.done() and not connected.cancelled():
+            return
+        error = None if task.cancelled() else task.exception()
+        raise ConnectionError(f"账户 {account_name} 连接监管已停止，未能建立连接") from error
+
+    @property
+    def default_retry_interval(self) -> float:
+        """
+        兼容旧版本的固定重试间隔
+
+        重连已改为指数退避，该值现在对应各账户的重连间隔上限 reconnect_max_delay，
+        设置时同时作用于所有账户。
+        """
+        return max(
+            (account.reconnect_max_delay for account in self.accounts.values()), default=30.0
+        )
+
+    @default_retry_interval.setter
+    def default_retry_interval(self, value: float):
+        for account_name, account in self.accounts.items():
+            account.reconnect_max_delay = value
+            supervisor = self.supervisors.get(account_name)
+            if supervisor is not None:
+                supervisor.max_delay = value
+
+    def _get_supervisor(self, account_name: str) -> ReconnectSupervisor:
+        """获取（必要时创建）账户的重连状态"""
+        supervisor = self.supervisors.get(account_name)
+        if supervisor is None:
+            account = self.accounts[account_name]
+            supervisor = self.supervisors[account_name] = ReconnectSupervisor(
+                base_delay=account.reconnect_base_delay,
+                max_delay=account.reconnect_max_delay,
+                failure_threshold=account.circuit_failure_threshold,
+                open_seconds=account.circuit_open_seconds,
+                stable_after=account.reconnect_stable_after,
+            )
+        return supervisor
+
+    async def _supervise(self, account_name: str):
+        """
+        Client 账户的连接监管：连接并监听，断线后按退避策略重连
+
+        断线后第一次重连立即进行，之后指数退避并带随机抖动；
+        所有账户发起连接前都要经过同一个节奏控制，避免实现端重启时被同时涌入的连接压垮。
+        """
+        account = self.accounts[account_name]
+        supervisor = self._get_supervisor(account_name)
         if account_name not in self.sessions:
             self.sessions[account_name] = aiohttp.ClientSession()
 
@@ -494,17 +1321,44 @@ class OneBotAdapter(sdk.BaseAdapter):
         if account.client_token:
             headers["Authorization"] = f"Bearer {account.client_token}"
 
-        url = account.client_url
-        retry_interval = retry_interval or self.default_retry_interval
-
-        while self._is_running:
+        while self._is_running and account.enabled:
+            delay = supervisor.next_delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            gate_delay = self._connect_gate.reserve(time.monotonic())
+            if gate_delay > 0:
+                await asyncio.sleep(gate_delay)
+            if not self._is_running:
+                break
+
+            supervisor.record_attempt()
             try:
-                self.connections[account_name] = await self.sessions[
-                    account_name
-                ].ws_connect(url, headers=headers)
-                self.logger.info(
-                    f"账户 {account_name} (bot_id: {account.bot_id}) 连接成功"
+                connection, api_connections = await asyncio.wait_for(
+                    self._open_channels(account_name, account, headers),
+                    timeout=self.default_connect_timeout,
                 )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if supervisor.record_failure(e):
+                    self.logger.warning(
+                        f"账户 {account_name} 连续 {supervisor.failures} 次连接失败，"
+                        f"暂停重连 {supervisor.open_seconds} 秒"
+                    )
+                else:
+                    self.logger.error(f"账户 {account_name} 连接失败: {str(e)}")
+                continue
+
+            pool = None
+            if api_connections:
+                pool = self.api_pools[account_name] = ApiPool(api_connections)
+            self.connections[account_name] = connection
+            supervisor.record_connected()
+            self._get_replay_queue(account_name).release()
+            self.logger.info(
+                f"账户 {account_name} (bot_id: {account.bot_id}) 连接成功"
+            )
+            try:
                 await self.adapter.emit(
                     {
                         "type": "meta",
@@ -513,11 +1367,98 @@ class OneBotAdapter(sdk.BaseAdapter):
                         "self": {"platform": "onebot11", "user_id": account.bot_id},
                     }
                 )
-                asyncio.create_task(self._listen(account_name))
-                return
             except Exception as e:
-                self.logger.error(f"账户 {account_name} 连接失败: {str(e)}")
-                await asyncio.sleep(retry_interval)
+                self.logger.error(f"账户 {account_name} 连接事件处理失败: {str(e)}")
+
+            try:
+                await self._listen(account_name)
+            finally:
+                if supervisor.record_disconnected():
+                    self.logger.warning(
+                        f"账户 {account_name} 连接建立后反复立即断开（{supervisor.last_error}），"
+                        f"暂停重连 {supervisor.open_seconds} 秒"
+                    )
+                if pool is not None and self.api_pools.get(account_name) is pool:
+                    del self.api_pools[account_name]
+                for channel in (connection, *api_connections):
+                    if not channel.closed:
+                        await channel.close()
+
+            if self._is_running and account.enabled:
+                self.logger.info(f"账户 {account_name} 开始重连...")
+
+    async def _open_channels(
+        self, account_name: str, account: OneBotAccountConfig, headers: Dict
+    ):
+        """
+        建立 Client 账户的全部连接
+
+        universal 模式只有一个连接；split 模式建立一个 /event 连接与 api_pool_size 个 /api 连接，
+        其中任一失败则关闭已建立的连接，整体视为一次连接失败。
+
+        :return: (接收事件的连接, API 连接列表)，universal 模式下 API 连接列表为空
+        """
+        session = self.sessions[account_name]
+        if account.client_channels != CHANNELS_SPLIT:
+            return await session.ws_connect(account.client_url, headers=headers), []
+
+        urls = [channel_url(account.client_url, "event")]
+        urls += [channel_url(account.client_url, "api")] * max(1, account.api_pool_size)
+        attempts = [asyncio.ensure_future(session.ws_connect(url, headers=headers)) for url in urls]
+        try:
+            channels = await asyncio.gather(*attempts)
+        except BaseException:
+            for attempt in attempts:
+                attempt.cancel()
+            await asyncio.gather(*attempts, return_exceptions=True)
+            for attempt in attempts:
+                if not attempt.cancelled() and attempt.exception() is None:
+                    await attempt.result().close()
+            raise
+        return channels[0], channels[1:]
+
+    def connection_stats(self) -> Dict[str, Dict]:
+        """
+        获取各 Client 账户的连接与重连状态
+
+        :return: {账户名: {"connected": ..., "circuit": "closed"/"open"/"half_open", "failures": ..., ...}}，
+            split 模式另有 "api_pool": {"in_flight": [...], "requests": [...]}
+        """
+        stats = {}
+        for name, supervisor in self.supervisors.items():
+            stats[name] = supervisor.stats
+            pool = self.api_pools.get(name)
+            if pool is not None:
+                stats[name]["api_pool"] = pool.stats
+        return stats
+
+    def _get_dispatcher(self, account_name: str) -> EventDispatcher:
+        """获取（必要时创建）账户的事件分发工作池"""
+        dispatcher = self.dispatchers.get(account_name)
+        if dispatcher is None:
+            account = self.accounts.get(account_name)
+
+            async def handle(data):
+                await self._handle_message(data, account_name)
+
+            dispatcher = EventDispatcher(
+                handle,
+                workers=account.dispatch_workers if account else 8,
+                queue_size=account.dispatch_queue_size if account else 1000,
+                overflow_size=account.dispatch_overflow_size if account else 1000,
+                logger=self.logger,
+            )
+            self.dispatchers[account_name] = dispatcher
+        dispatcher.start()
+        return dispatcher
+
+    def dispatch_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        获取各账户事件分发的统计数据
+
+        :return: {账户名: {"queue_depth": ..., "stalled": ..., "dropped": ..., ...}}
+        """
+        return {name: d.stats for name, d in self.dispatchers.items()}
 
     async def _listen(self, account_name: str):
         """监听指定账户的WebSocket消息"""
@@ -526,19 +1467,26 @@ class OneBotAdapter(sdk.BaseAdapter):
             return
 
         account = self.accounts.get(account_name)
+        dispatcher = self._get_dispatcher(account_name)
+        monitor, watcher = self._start_liveness(account_name, connection)
+        pool = self.api_pools.get(account_name)
 
         try:
-            async for msg in connection:
-                if msg.type == aiohttp.WSMsgType.TEXT:
-                    asyncio.create_task(self._handle_message(msg.data, account_name))
-                elif msg.type == aiohttp.WSMsgType.CLOSED:
-                    self.logger.info(f"账户 {account_name} 连接已关闭")
-                    break
-                elif msg.type == aiohttp.WSMsgType.ERROR:
-                    self.logger.error(f"账户 {account_name} WebSocket错误")
-        except Exception as e:
-            self.logger.error(f"账户 {account_name} 监听异常: {str(e)}")
+            if pool is None:
+                await self._read_frames(account_name, connection, dispatcher)
+            else:
+                # 事件与各 API 连接分别读取，任一连接断开即结束，由监管任务整体重连
+                readers = [
+                    asyncio.create_task(self._read_frames(account_name, channel, dispatcher))
+                    for channel in (connection, *pool.connections)
+                ]
+                try:
+                    await asyncio.wait(readers, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for reader in readers:
+                        reader.cancel()
         finally:
+            self._stop_liveness(account_name, monitor, watcher)
             try:
                 await self.adapter.emit(
                     {
@@ -553,30 +1501,222 @@ class OneBotAdapter(sdk.BaseAdapter):
                 )
             except Exception:
                 pass
-            if account_name in self.connections:
-                del self.connections[account_name]
+            self._connection_lost(account_name, connection)
 
-            if self._is_running and account.enabled and account.mode == "client":
-                self.logger.info(f"账户 {account_name} 开始重连...")
-                self.reconnect_tasks[account_name] = asyncio.create_task(
-                    self.connect(account_name)
-                )
+    def _connection_lost(self, account_name: str, connection, reason: str = "已断开"):
+        """
+        连接结束：移除连接并让等待响应的调用立即以 ConnectionLostError 结束
+
+        可重放的调用随后等待重连；连接已被新连接取代时不做处理。
+        """
+        if self.connections.get(account_name) is not connection:
+            return
+        del self.connections[account_name]
+        pending = self._api_response_futures.get(account_name)
+        if pending is not None:
+            pending.fail_all(ConnectionLostError(f"账户 {account_name} 的连接{reason}"))
+
+    def _get_pending(self, account_name: str) -> PendingCalls:
+        """获取（必要时创建）账户的等待响应调用表"""
+        pending = self._api_response_futures.get(account_name)
+        if pending is None:
+            pending = self._api_response_futures[account_name] = PendingCalls()
+        return pending
+
+    def _get_replay_queue(self, account_name: str) -> ReplayQueue:
+        """获取（必要时创建）账户的重放队列"""
+        queue = self.replay_queues.get(account_name)
+        if queue is None:
+            account = self.accounts[account_name]
+            queue = self.replay_queues[account_name] = ReplayQueue(
+                account.replay_queue_size, account.replay_max_wait
+            )
+        return queue
+
+    def replay_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        获取各账户断线期间暂存调用的统计数据
+
+        :return: {账户名: {"held": ..., "replayed": ..., "rejected": ..., "expired": ...}}
+        """
+        return {name: q.stats for name, q in self.replay_queues.items()}
+
+    def _start_liveness(self, account_name: str, connection, reader=None):
+        """
+        为新连接启动存活检测
+
+        :param reader: 读取该连接的任务，判定失效时取消它（Server 模式；Client 模式关闭连接即可结束读取）
+        :return: (存活状态, 检测任务)
+        """
+        account = self.accounts[account_name]
+        monitor = LivenessMonitor(timeout_factor=account.heartbeat_timeout_factor)
+        self.liveness[account_name] = monitor
+        watcher = asyncio.create_task(
+            self._watch_liveness(account_name, account, connection, monitor, reader)
+        )
+        return monitor, watcher
+
+    def _stop_liveness(self, account_name: str, monitor: LivenessMonitor, watcher: asyncio.Task):
+        """连接结束时停止存活检测"""
+        watcher.cancel()
+        if self.liveness.get(account_name) is monitor:
+            del self.liveness[account_name]
+
+    async def _watch_liveness(
+        self,
+        account_name: str,
+        account: OneBotAccountConfig,
+        connection,
+        monitor: LivenessMonitor,
+        reader: Optional[asyncio.Task],
+    ):
+        """
+        检测连接是否存活，并定期以 get_status 探测往返延迟
+
+        判定失效后立即让该账户所有等待中的调用以 ConnectionError 结束并断开连接，
+        Client 账户随即由监管任务重连，无需等到 TCP 层发现断线。
+        """
+        probe_at = None
+        if account.probe_interval > 0:
+            probe_at = time.monotonic() + account.probe_interval
+        # 探测在独立任务中等待响应，不耽误心跳超时的判断
+        probe: Optional[asyncio.Task] = None
 
-    async def _handle_message(self, raw_msg: str, account_name: str):
-        """处理WebSocket消息"""
         try:
-            data = json.loads(raw_msg)
-            account = self.accounts.get(account_name)
-            if not account:
-                return
+            while self.connections.get(account_name) is connection:
+                now = time.monotonic()
+                if monitor.expired(now):
+                    break
+                if probe_at is not None and now >= probe_at and (probe is None or probe.done()):
+                    probe = asyncio.create_task(self._probe(account_name, account, monitor))
+                    probe_at = now + account.probe_interval
+                # 首次心跳到达前截止时间未知，最多等待 1 秒后重新检查
+                wake = now + 1.0
+                for at in (monitor.deadline(), probe_at):
+                    if at is not None:
+                        wake = min(wake, at)
+                await asyncio.sleep(max(0.0, wake - now) + 0.001)
+        finally:
+            # 判定失效时在途的探测随其他调用一起以 ConnectionError 结束
+            if probe is not None and not monitor.dead:
+                probe.cancel()
+
+        if not monitor.dead or self.connections.get(account_name) is not connection:
+            return
+
+        self.logger.warning(
+            f"账户 {account_name} 的连接已失效（{monitor.stats['last_heartbeat_age_ms']}ms 未收到心跳，"
+            f"连续 {monitor.probe_failures} 次探测无响应），断开并重连"
+        )
+        self._connection_lost(account_name, connection, "已失效")
+        if reader is not None:
+            reader.cancel()
+        # 半开的连接上关闭握手得不到回应，不等待其完成
+        asyncio.create_task(self._close_quietly(connection))
+
+    async def _probe(
+        self, account_name: str, account: OneBotAccountConfig, monitor: LivenessMonitor
+    ):
+        """发送一次 get_status 探测并记录往返时间"""
+        started = time.monotonic()
+        try:
+            response = await self._request(
+                account_name, account, "get_status", {}, timeout=account.probe_timeout
+            )
+        except ConnectionError:
+            return
+        if response["retcode"] == 33001:
+            monitor.probe_failed()
+            self.logger.warning(f"账户 {account_name} 存活探测超时")
+        else:
+            # 实现端返回失败（如不支持 get_status）同样完成了一次往返
+            monitor.probe_succeeded(time.monotonic() - started)
+
+    async def _close_quietly(self, connection):
+        """关闭连接并忽略错误"""
+        try:
+            await connection.close()
+        except Exception:
+            pass
+
+    def liveness_stats(self) -> Dict[str, Dict]:
+        """
+        获取各账户当前连接的存活状态与往返延迟
+
+        :return: {账户名: {"alive": ..., "heartbeat_interval_ms": ..., "rtt_ms": ..., "rtt_var_ms": ..., ...}}
+        """
+        return {name: m.stats for name, m in self.liveness.items()}
+
+    async def _read_frames(self, account_name: str, connection, dispatcher: EventDispatcher):
+        """读取一个 Client 连接上的帧直到连接关闭"""
+        try:
+            async for msg in connection:
+                if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                    await self._route_frame(dispatcher, msg.data, account_name)
+                elif msg.type == aiohttp.WSMsgType.CLOSED:
+                    self.logger.info(f"账户 {account_name} 连接已关闭")
+                    break
+                elif msg.type == aiohttp.WSMsgType.ERROR:
+                    self.logger.error(f"账户 {account_name} WebSocket错误")
+        except Exception as e:
+            self.logger.error(f"账户 {account_name} 监听异常: {str(e)}")
+
+    @staticmethod
+    def _conversation_key(data: Dict) -> Optional[str]:
+        """获取帧所属的会话（群优先，其次私聊对象），无归属时返回None"""
+        group_id = data.get("group_id")
+        if group_id:
+            return f"group:{group_id}"
+        user_id = data.get("user_id")
+        if user_id:
+            return f"user:{user_id}"
+        return None
+
+    async def _route_frame(
+        self,
+        dispatcher: EventDispatcher,
+        raw_msg: Union[str, bytes],
+        account_name: str,
+    ):
+        """
+        解析WebSocket帧并分流
+
+        API响应直接在读取循环中完成对应的Future，不经过分发队列和转换器；
+        只有事件才按会话投递到分发器。分发队列满时，只在没有等待响应的调用时才暂停读取，
+        否则事件暂存到溢出区，读取循环继续读取响应。
+        """
+        try:
+            data = self.codec.loads(raw_msg)
+        except json.JSONDecodeError:
+            self.logger.error(f"JSON解析失败: {raw_msg}")
+            return
+        if not isinstance(data, dict):
+            self.logger.error(f"无效的消息格式: {raw_msg}")
+            return
 
-            # 处理API响应
+        monitor = self.liveness.get(account_name)
+        if monitor is not None:
+            if data.get("meta_event_type") == "heartbeat":
+                monitor.heartbeat(data.get("interval"), time.monotonic())
+            else:
+                monitor.frame(time.monotonic())
+
+        if "post_type" not in data:
             if "echo" in data:
-                future = self._api_response_futures.get(account_name, {}).get(
-                    data["echo"]
-                )
-                if future and not future.done():
-                    future.set_result(data)
+                pending = self._api_response_futures.get(account_name)
+                if pending is not None:
+                    pending.resolve(data["echo"], data)
+            return
+
+        await dispatcher.put(
+            data, self._conversation_key(data), self._get_pending(account_name).busy
+        )
+
+    async def _handle_message(self, data: Dict, account_name: str):
+        """处理已解析的事件"""
+        try:
+            account = self.accounts.get(account_name)
+            if not account:
                 return
 
             # 处理事件
@@ -589,8 +1729,6 @@ class OneBotAdapter(sdk.BaseAdapter):
                         onebot_event["self"] = {"user_id": account.bot_id}
                     await self.adapter.emit(onebot_event)
 
-        except json.JSONDecodeError:
-            self.logger.error(f"JSON解析失败: {raw_msg}")
         except Exception as e:
             self.logger.error(f"消息处理异常: {str(e)}")
 
@@ -603,6 +1741,9 @@ class OneBotAdapter(sdk.BaseAdapter):
             )
 
         self.connections[account_name] = websocket
+        self._get_replay_queue(account_name).release()
+        dispatcher = self._get_dispatcher(account_name)
+        monitor, watcher = self._start_liveness(account_name, websocket, asyncio.current_task())
 
         await self.adapter.emit(
             {
@@ -618,13 +1759,26 @@ class OneBotAdapter(sdk.BaseAdapter):
 
         try:
             while True:
-                data = await websocket.receive_text()
-                asyncio.create_task(self._handle_message(data, account_name))
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                data = message.get("text")
+                if data is None:
+                    data = message.get("bytes")
+                if data:
+                    await self._route_frame(dispatcher, data, account_name)
         except WebSocketDisconnect:
             self.logger.info(f"账户 {account_name} 客户端断开连接")
+        except asyncio.CancelledError:
+            # 存活检测判定连接失效时取消读取；适配器关闭时照常向上传递
+            if self._is_running and monitor.dead:
+                self.logger.info(f"账户 {account_name} 已断开失效的连接")
+            else:
+                raise
         except Exception as e:
             self.logger.error(f"账户 {account_name} WebSocket处理异常: {str(e)}")
         finally:
+            self._stop_liveness(account_name, monitor, watcher)
             try:
                 await self.adapter.emit(
                     {
@@ -639,8 +1793,7 @@ class OneBotAdapter(sdk.BaseAdapter):
                 )
             except Exception:
                 pass
-            if account_name in self.connections:
-                del self.connections[account_name]
+            self._connection_lost(account_name, websocket)
 
     async def _auth_handler(self, websocket: WebSocket, account_name: str = "default"):
         """WebSocket认证处理器"""
@@ -663,6 +1816,44 @@ class OneBotAdapter(sdk.BaseAdapter):
                 return False
         return True
 
+    async def _http_event_handler(self, request: Request, account_name: str = "default") -> Response:
+        """
+        HTTP 事件上报处理器
+
+        配置了 http_secret 时校验 X-Signature（HMAC-SHA1），不匹配返回 403。
+        事件投递到分发器后立即返回 204，不等待处理完成。
+        不支持快速操作：响应始终为空，事件处理的结果不会作为快速操作返回给实现端。
+        """
+        account = self.accounts.get(account_name)
+        body = await request.body()
+        if account is None or not verify_signature(
+            account.http_secret, body, request.headers.get("X-Signature")
+        ):
+            self.logger.warning(f"账户 {account_name} 事件上报签名无效")
+            return Response(status_code=403)
+        await self._route_frame(self._get_dispatcher(account_name), body, account_name)
+        return Response(status_code=204)
+
+    async def register_http(self):
+        """注册 HTTP 事件上报路由"""
+        for account_name, account in self.accounts.items():
+            if account.mode == "http" and account.enabled:
+                path = account.server_path
+
+                def make_event_handler(name):
+                    async def handler(request: Request):
+                        return await self._http_event_handler(request, name)
+
+                    return handler
+
+                router.register_http_route(
+                    f"onebot11_{account_name}",
+                    path,
+                    make_event_handler(account_name),
+                    methods=["POST"],
+                )
+                self.logger.info(f"已注册账户 {account_name} 的HTTP上报路由: {path}")
+
     async def register_websocket(self):
         """注册WebSocket路由"""
         for account_name, account in self.accounts.items():
@@ -703,16 +1894,24 @@ class OneBotAdapter(sdk.BaseAdapter):
             for name, acc in self.accounts.items()
             if acc.mode == "client" and acc.enabled
         ]
+        http_accounts = [
+            name
+            for name, acc in self.accounts.items()
+            if acc.mode == "http" and acc.enabled
+        ]
 
         if server_accounts:
             await self.register_websocket()
+        if http_accounts:
+            await self.register_http()
 
         for account_name in client_accounts:
+            self._get_supervisor(account_name)
             self.reconnect_tasks[account_name] = asyncio.create_task(
-                self.connect(account_name)
+                self._supervise(account_name)
             )
 
-        enabled_count = len(server_accounts) + len(client_accounts)
+        enabled_count = len(server_accounts) + len(client_accounts) + len(http_accounts)
         self.logger.info(f"OneBot11适配器启动完成，共 {enabled_count} 个账户")
 
     async def shutdown(self):
@@ -724,7 +1923,13 @@ class OneBotAdapter(sdk.BaseAdapter):
                 task.cancel()
         self.reconnect_tasks.clear()
 
-        for account_name, connection in self.connections.items():
+        background = list(self._background_tasks)
+        for task in background:
+            task.cancel()
+        if background:
+            await asyncio.gather(*background, return_exceptions=True)
+
+        for account_name, connection in list(self.connections.items()):
             try:
                 if not connection.closed:
                     await connection.close()
@@ -732,6 +1937,22 @@ class OneBotAdapter(sdk.BaseAdapter):
                 self.logger.error(f"关闭连接失败: {str(e)}")
         self.connections.clear()
 
+        for pending in self._api_response_futures.values():
+            pending.fail_all(ConnectionLostError("适配器已关闭"))
+        for queue in self.replay_queues.values():
+            queue.close()
+
+        for dispatcher in self.dispatchers.values():
+            await dispatcher.stop()
+        self.dispatchers.clear()
+
+        self.media.shutdown()
+
+        try:
+            await self.http.close()
+        except Exception as e:
+            self.logger.error(f"关闭HTTP连接池失败: {str(e)}")
+
         for session in self.sessions.values():
             try:
                 await session.close()
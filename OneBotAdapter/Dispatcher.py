@@ -0,0 +1,219 @@
+# OneBotAdapter/Dispatcher.py
+import asyncio
+import itertools
+import time
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class _Shard:
+    """单个分片：一个有界队列 + 一个按序处理的工作协程，队列满时新到的帧暂存在溢出区"""
+
+    # 热点统计最多跟踪的会话数，超出后只保留最活跃的一部分
+    HOT_KEYS_LIMIT = 4096
+    HOT_KEYS_KEEP = 256
+
+    def __init__(self, queue_size: int, overflow_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.overflow: deque = deque()
+        self.overflow_size = overflow_size
+        self.drained = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.keys: Counter = Counter()
+
+        # 统计数据
+        self.processed = 0
+        self.stalled = 0
+        self.spilled = 0
+        self.shed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+    def refill(self):
+        """把溢出区的帧按顺序移入队列"""
+        while self.overflow and not self.queue.full():
+            self.queue.put_nowait(self.overflow.popleft())
+        if not self.overflow:
+            self.drained.set()
+
+    def count_key(self, key: Hashable):
+        self.keys[key] += 1
+        if len(self.keys) > self.HOT_KEYS_LIMIT:
+            self.keys = Counter(dict(self.keys.most_common(self.HOT_KEYS_KEEP)))
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "overflow_depth": len(self.overflow),
+            "processed": self.processed,
+            "stalled": self.stalled,
+            "spilled": self.spilled,
+            "shed": self.shed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "hot_keys": self.keys.most_common(3),
+        }
+
+
+class EventDispatcher:
+    """
+    单个账户的分片事件分发器
+
+    同一会话（群或私聊对象）的事件总是进入同一个分片，按到达顺序逐个处理；
+    不同会话分布在多个分片上并行处理。
+
+    读取循环通过 put() 投递帧，分片队列满时 put() 会阻塞，
+    读取循环随之停止读取 socket，由 TCP 把背压传回 OneBot 实现端。
+    但只要还有 API 调用在等待响应，读取循环就不能停下（响应与事件在同一连接上，
+    事件处理器又常常在等待自己发出的调用）：此时事件暂存在分片的溢出区，
+    溢出区也满时丢弃新事件并计数。
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[None]],
+        workers: int = 8,
+        queue_size: int = 1000,
+        overflow_size: int = 1000,
+        logger=None,
+    ):
+        self._handler = handler
+        self._logger = logger
+
+        shard_count = max(1, workers)
+        shard_queue_size = -(-max(1, queue_size) // shard_count)
+        shard_overflow_size = -(-max(0, overflow_size) // shard_count)
+        self._shards: List[_Shard] = [
+            _Shard(shard_queue_size, shard_overflow_size) for _ in range(shard_count)
+        ]
+        # 无会话归属的帧（元事件等）轮流分配到各分片
+        self._round_robin = itertools.cycle(range(shard_count))
+
+    def start(self):
+        """启动各分片的工作协程（重复调用无副作用）"""
+        for shard in self._shards:
+            if shard.task is None:
+                shard.task = asyncio.create_task(self._worker(shard))
+
+    def shard_of(self, key: Optional[Hashable]) -> int:
+        """
+        计算会话所属的分片序号
+
+        :param key: 会话键，None 表示不关心顺序
+        :return: 分片序号
+        """
+        if key is None:
+            return next(self._round_robin)
+        return hash(key) % len(self._shards)
+
+    async def put(
+        self,
+        item: Any,
+        key: Optional[Hashable] = None,
+        busy: Optional[asyncio.Event] = None,
+    ):
+        """
+        投递一帧待处理数据，所属分片队列满时阻塞直到有空位
+
+        :param item: 帧数据
+        :param key: 会话键，相同键的帧保证按投递顺序处理
+        :param busy: 有 API 调用等待响应时置位的事件；置位期间不阻塞，帧暂存在溢出区
+        """
+        shard = self._shards[self.shard_of(key)]
+        if key is not None:
+            shard.count_key(key)
+        if not shard.overflow and not shard.queue.full():
+            shard.queue.put_nowait(item)
+            return
+
+        shard.stalled += 1
+        if busy is not None and busy.is_set():
+            if len(shard.overflow) >= shard.overflow_size:
+                shard.shed += 1
+                if self._logger and shard.shed % 100 == 1:
+                    self._logger.warning(
+                        f"事件队列与溢出区均已满，已丢弃 {shard.shed} 个事件（有调用正在等待响应，无法暂停读取）"
+                    )
+                return
+            shard.spilled += 1
+        shard.overflow.append(item)
+        shard.drained.clear()
+        await self._wait_drained(shard, busy)
+
+    @staticmethod
+    async def _wait_drained(shard: _Shard, busy: Optional[asyncio.Event]):
+        """等待溢出区清空；等待期间出现等待响应的调用时立即返回，让读取循环继续读取"""
+        if busy is None:
+            await shard.drained.wait()
+            return
+        while shard.overflow and not busy.is_set():
+            waiters = [
+                asyncio.create_task(shard.drained.wait()),
+                asyncio.create_task(busy.wait()),
+            ]
+            try:
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+
+    async def join(self):
+        """等待所有已投递的帧处理完毕"""
+        for shard in self._shards:
+            await shard.queue.join()
+
+    async def stop(self):
+        """停止工作协程，丢弃尚未处理的帧"""
+        tasks = [shard.task for shard in self._shards if shard.task is not None]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        for shard in self._shards:
+            shard.task = None
+            shard.dropped += len(shard.overflow)
+            shard.overflow.clear()
+            shard.drained.set()
+            while not shard.queue.empty():
+                shard.queue.get_nowait()
+                shard.queue.task_done()
+                shard.dropped += 1
+
+    async def _worker(self, shard: _Shard):
+        while True:
+            item = await shard.queue.get()
+            shard.refill()
+            started = time.perf_counter()
+            try:
+                await self._handler(item)
+                shard.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                shard.errors += 1
+                if self._logger:
+                    self._logger.error(f"事件分发异常: {str(e)}")
+            finally:
+                shard.busy_seconds += time.perf_counter() - started
+                shard.queue.task_done()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """汇总计数与各分片负载（用于发现热点群）"""
+        shards = [shard.stats for shard in self._shards]
+        return {
+            "workers": len(self._shards),
+            "queue_size": sum(shard.queue.maxsize for shard in self._shards),
+            "queue_depth": sum(s["queue_depth"] for s in shards),
+            "processed": sum(s["processed"] for s in shards),
+            "stalled": sum(s["stalled"] for s in shards),
+            "spilled": sum(s["spilled"] for s in shards),
+            "shed": sum(s["shed"] for s in shards),
+            "dropped": sum(s["dropped"] for s in shards),
+            "errors": sum(s["errors"] for s in shards),
+            "shards": shards,
+        }
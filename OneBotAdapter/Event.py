@@ -0,0 +1,37 @@
+# OneBotAdapter/Event.py
+import itertools
+import os
+import time
+from typing import Any
+
+
+class EventIdGenerator:
+    """
+    事件 ID 生成器
+
+    ID 由 "启动时间(毫秒) + 随机数" 组成的实例前缀与自增计数器拼接而成，
+    同一实例内严格递增、按字符串排序即为生成顺序，不同进程/实例之间靠前缀区分。
+    生成一个 ID 只需一次计数和一次字符串格式化，远比 uuid4() 便宜。
+
+    带有 message_id 的消息事件使用 derive() 生成确定性 ID，
+    同一条消息在重启或重连后得到相同的 ID，便于下游去重。
+    """
+
+    def __init__(self):
+        started = int(time.time() * 1000)
+        self.prefix = f"{started:011x}{os.urandom(3).hex()}"
+        self._counter = itertools.count(1)
+
+    def next(self) -> str:
+        """生成一个新的 ID"""
+        return f"{self.prefix}{next(self._counter):010x}"
+
+    @staticmethod
+    def derive(self_id: Any, message_id: Any) -> str:
+        """
+        由机器人 ID 与消息 ID 推导出固定的事件 ID
+
+        :param self_id: 机器人 QQ 号
+        :param message_id: OneBot11 消息 ID
+        """
+        return f"msg:{self_id}:{message_id}"
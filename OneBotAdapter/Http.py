@@ -0,0 +1,105 @@
+# OneBotAdapter/Http.py
+import hashlib
+import hmac
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+
+
+def sign(secret: str, body: bytes) -> str:
+    """计算上报请求的 X-Signature（sha1=<HMAC-SHA1 十六进制>）"""
+    return "sha1=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha1).hexdigest()
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """校验上报请求的 X-Signature，未配置 secret 时不校验"""
+    if not secret:
+        return True
+    if not signature:
+        return False
+    return hmac.compare_digest(sign(secret, body), signature)
+
+
+class HttpTransport:
+    """
+    HTTP 模式的 API 调用
+
+    所有 HTTP 账户共用一个连接池：连接保持 keep-alive 复用，
+    总连接数与单个实现端的连接数都有上限。不做 HTTP 管线化，每条连接同一时刻只有一个请求，
+    并发调用各自占用一条连接，连接数达到上限后排队等待空闲连接。
+    会话在首次调用时创建（需要运行中的事件循环）。
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 32,
+        keepalive_timeout: float = 30.0,
+    ):
+        """
+        :param limit: 连接池总连接数上限
+        :param limit_per_host: 单个实现端的连接数上限，超出的调用排队等待空闲连接
+        :param keepalive_timeout: 空闲连接保留时间（秒）
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # 统计数据
+        self.requests = 0
+        self.failed = 0
+        self.in_flight = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def post(
+        self, url: str, body: bytes, token: str = "", timeout: Optional[float] = None
+    ) -> Tuple[int, bytes]:
+        """
+        发送一次 API 请求
+
+        :param url: API 地址（http://host:port/<action>）
+        :param body: 已编码的 JSON 参数
+        :param token: access token，为空时不携带
+        :param timeout: 超时时间（秒）
+        :return: (HTTP 状态码, 响应体)
+        :raises asyncio.TimeoutError: 超时
+        :raises aiohttp.ClientError: 连接失败等网络错误
+        """
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        self.requests += 1
+        self.in_flight += 1
+        try:
+            async with self._get_session().post(
+                url, data=body, headers=headers,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as response:
+                return response.status, await response.read()
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    async def close(self):
+        """关闭连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """累计请求数、失败数与当前在途请求数"""
+        return {"requests": self.requests, "failed": self.failed, "in_flight": self.in_flight}
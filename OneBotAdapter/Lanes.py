@@ -0,0 +1,80 @@
+# OneBotAdapter/Lanes.py
+import asyncio
+from typing import Any, Awaitable, Dict, Hashable, List, Optional
+
+
+class _Lane:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class SendLanes:
+    """
+    按发送目标分道的有序执行器
+
+    同一个键（账户 + 目标类型 + 目标ID）的调用按进入 run() 的顺序逐个执行，
+    上一条收到响应（或超时）后下一条才发出；不同键之间互不影响、并行执行。
+    asyncio.Lock 按等待顺序唤醒，因此进入顺序即发送顺序。
+    空闲的分道会立即移除，不随目标数量累积。
+    """
+
+    def __init__(self):
+        self._lanes: Dict[Hashable, _Lane] = {}
+
+    async def run(self, key: Hashable, coro: Awaitable) -> Any:
+        """
+        在键对应的分道中执行协程
+
+        :param key: 分道键
+        :param coro: 待执行的协程
+        :return: 协程的返回值
+        """
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _Lane()
+        lane.users += 1
+        try:
+            async with lane.lock:
+                return await coro
+        finally:
+            lane.users -= 1
+            if lane.users == 0:
+                del self._lanes[key]
+            # 排队期间被取消时协程从未启动，关闭以免产生未等待警告
+            if hasattr(coro, "close"):
+                coro.close()
+
+    def depth(self, key: Hashable) -> int:
+        """分道中正在执行与排队的调用数"""
+        lane = self._lanes.get(key)
+        return lane.users if lane else 0
+
+    def __len__(self) -> int:
+        return len(self._lanes)
+
+
+class SendBatch:
+    """
+    合并窗口内发往同一目标的待发送消息
+
+    第一条消息创建批次，窗口期内（以及前一条发送尚未返回期间）
+    到达的可合并消息追加到同一批次，批次发出后所有调用方共享同一个响应。
+    """
+
+    __slots__ = ("params", "message", "parts", "closed", "task")
+
+    # 单个批次最多合并的消息段数，避免超出实现端的消息长度限制
+    MAX_SEGMENTS = 50
+
+    def __init__(self, params: Dict[str, Any]):
+        self.params = params
+        self.message: List[Dict] = []
+        self.parts = 0
+        self.closed = False
+        self.task: Optional[asyncio.Task] = None
+
+    def accepts(self, message: List[Dict]) -> bool:
+        return not self.closed and len(self.message) + len(message) <= self.MAX_SEGMENTS
@@ -0,0 +1,110 @@
+# OneBotAdapter/Liveness.py
+import time
+from typing import Any, Dict, Optional
+
+
+class LivenessMonitor:
+    """
+    单个连接的存活检测与往返延迟估计
+
+    实现端按 interval（毫秒）发送心跳事件。超过 interval × timeout_factor 仍未收到心跳
+    （也没有收到任何其他帧）时判定连接已失效，半开的 TCP 连接因此能在几个心跳周期内被发现，
+    而不是等每个 API 调用各自超时。尚未收到过心跳时不做判断。
+
+    往返延迟由探测调用测得，按 TCP 的方式维护平滑值与偏差：
+    srtt = 7/8 × srtt + 1/8 × sample，rttvar = 3/4 × rttvar + 1/4 × |srtt - sample|。
+    """
+
+    def __init__(self, timeout_factor: float = 3.0, probe_failure_limit: int = 2):
+        """
+        :param timeout_factor: 心跳超时倍数，0 表示不按心跳判断
+        :param probe_failure_limit: 连续多少次探测无响应后判定连接失效，0 表示不按探测判断
+        """
+        self.timeout_factor = timeout_factor
+        self.probe_failure_limit = probe_failure_limit
+        self.interval: Optional[float] = None  # 心跳间隔（秒）
+        self.last_heartbeat: Optional[float] = None
+        self.last_frame = time.monotonic()
+
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.rtt_last: Optional[float] = None
+        self.rtt_min: Optional[float] = None
+
+        # 统计数据
+        self.heartbeats = 0
+        self.probes = 0
+        self.probe_failures = 0  # 连续探测失败次数
+        self.dead = False
+
+    def frame(self, now: float):
+        """收到任意帧"""
+        self.last_frame = now
+
+    def heartbeat(self, interval_ms: Any, now: float):
+        """收到心跳事件"""
+        self.heartbeats += 1
+        self.last_heartbeat = now
+        self.last_frame = now
+        try:
+            interval = float(interval_ms) / 1000
+        except (TypeError, ValueError):
+            return
+        if interval > 0:
+            self.interval = interval
+
+    def deadline(self) -> Optional[float]:
+        """心跳判定失效的时刻，尚未收到心跳或未开启时为 None"""
+        if not self.timeout_factor or self.interval is None or self.last_heartbeat is None:
+            return None
+        return self.last_frame + self.interval * self.timeout_factor
+
+    def expired(self, now: float) -> bool:
+        """连接是否已判定失效"""
+        deadline = self.deadline()
+        if deadline is not None and now > deadline:
+            self.dead = True
+        if self.probe_failure_limit and self.probe_failures >= self.probe_failure_limit:
+            self.dead = True
+        return self.dead
+
+    def probe_succeeded(self, rtt: float):
+        """记录一次探测的往返时间（秒）"""
+        self.probes += 1
+        self.probe_failures = 0
+        self.rtt_last = rtt
+        self.rtt_min = rtt if self.rtt_min is None else min(self.rtt_min, rtt)
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    def probe_failed(self):
+        """记录一次无响应的探测"""
+        self.probes += 1
+        self.probe_failures += 1
+
+    @staticmethod
+    def _ms(value: Optional[float]) -> Optional[float]:
+        return None if value is None else round(value * 1000, 3)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """存活状态、心跳间隔与往返延迟（毫秒）"""
+        now = time.monotonic()
+        return {
+            "alive": not self.dead,
+            "heartbeat_interval_ms": self._ms(self.interval),
+            "last_heartbeat_age_ms": (
+                None if self.last_heartbeat is None else self._ms(now - self.last_heartbeat)
+            ),
+            "heartbeats": self.heartbeats,
+            "rtt_ms": self._ms(self.srtt),
+            "rtt_var_ms": self._ms(self.rttvar if self.srtt is not None else None),
+            "rtt_last_ms": self._ms(self.rtt_last),
+            "rtt_min_ms": self._ms(self.rtt_min),
+            "probes": self.probes,
+            "probe_failures": self.probe_failures,
+        }
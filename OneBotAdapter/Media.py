@@ -0,0 +1,423 @@
+# OneBotAdapter/Media.py
+import asyncio
+import binascii
+import contextlib
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+
+import filetype
+
+from .Codec import JsonCodec, PayloadTemplate
+
+# 超过该大小（字节）的媒体在线程池中编码
+DEFAULT_OFFLOAD_THRESHOLD = 256 * 1024
+
+# 分块编码的块大小（3 的倍数，编码结果可直接拼接）。
+# b2a_base64 编码期间持有 GIL，分块后工作线程每块之间都会让出 GIL，事件循环不会被长时间阻塞
+_CHUNK_SIZE = 3 * 64 * 1024
+
+_BYTES_TYPES = (bytes, bytearray, memoryview)
+
+# 需要由适配器编码的媒体：内存中的数据或本地文件路径
+_MEDIA_TYPES = _BYTES_TYPES + (os.PathLike,)
+
+# filetype 判断类型所需的文件头长度
+_SNIFF_SIZE = 261
+
+
+def b64encode_chunks(data) -> List[bytes]:
+    """分块 base64 编码，各块依次拼接后与 base64.b64encode 的结果相同"""
+    b2a = binascii.b2a_base64
+    # 编码结束即释放视图，mmap 才能关闭
+    with memoryview(data) as view:
+        return [
+            b2a(view[i:i + _CHUNK_SIZE], newline=False)
+            for i in range(0, len(view), _CHUNK_SIZE)
+        ]
+
+
+def as_local_file(file: Any) -> Any:
+    """
+    把本地文件输入统一为 Path
+
+    :param file: pathlib.Path（或其他 PathLike）、"file://" URI、bytes 或普通字符串
+    :return: 本地文件返回 Path，其他输入原样返回
+    """
+    if isinstance(file, os.PathLike):
+        return Path(file)
+    if isinstance(file, str) and file.startswith("file://"):
+        parsed = urlparse(file)
+        # 带主机名的 file://host/share 不是本机文件，原样交给实现端
+        if parsed.netloc in ("", "localhost"):
+            return Path(url2pathname(unquote(parsed.path)))
+    return file
+
+
+def sniff_segment_type(file: Any) -> str:
+    """
+    根据文件头判断媒体应使用的 OneBot11 消息段类型
+
+    只读取文件头（最多 261 字节），不会把整个文件读入内存。
+
+    :param file: bytes 或本地文件 Path，其他输入无法判断
+    :return: "image"、"record"、"video"，无法识别时为 "file"
+    """
+    try:
+        if isinstance(file, _BYTES_TYPES):
+            header = bytes(file[:_SNIFF_SIZE])
+        elif isinstance(file, os.PathLike):
+            with open(file, "rb") as f:
+                header = f.read(_SNIFF_SIZE)
+        else:
+            return "file"
+        kind = filetype.guess(header)
+    except Exception:
+        kind = None
+
+    if kind is None:
+        return "file"
+    if kind.mime.startswith("image/"):
+        return "image"
+    if kind.mime.startswith("audio/"):
+        return "record"
+    if kind.mime.startswith("video/"):
+        return "video"
+    return "file"
+
+
+@contextlib.contextmanager
+def open_media(file: Any):
+    """
+    以 bytes-like 对象的形式访问媒体内容
+
+    本地文件通过 mmap 映射，哈希与编码直接读取页缓存，不会在内存中复制一份文件内容。
+    """
+    if not isinstance(file, os.PathLike):
+        yield file
+        return
+    with open(file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def is_media(file: Any) -> bool:
+    """是否为需要由适配器处理的媒体内容（bytes 或本地文件）"""
+    return isinstance(file, _MEDIA_TYPES)
+
+
+def media_size(file: Any) -> int:
+    """媒体内容的字节数"""
+    if isinstance(file, os.PathLike):
+        return os.path.getsize(file)
+    return len(file)
+
+
+class _CacheEntry:
+    __slots__ = ("ref", "encoded", "size", "ref_failed", "learning")
+
+    def __init__(self):
+        self.ref: Optional[str] = None  # 实现端可直接引用的文件（缓存文件名/路径/URL）
+        self.encoded: Optional[List[bytes]] = None  # base64:// 编码结果
+        self.size = 0  # encoded 占用的字节数
+        self.ref_failed = False  # ref 曾发送失败或查询不到，不再学习
+        self.learning = False  # 正在向实现端查询 ref
+
+
+class MediaCache:
+    """
+    按内容哈希索引的媒体缓存（LRU，按条目数与编码数据总大小淘汰）
+
+    同一内容第二次发送时复用已编码的 base64 数据，并向实现端查询它为该文件保存的引用；
+    之后的发送直接使用该引用，不再传输文件内容。引用失效（发送失败）后回退为完整发送，
+    且不再为该内容学习引用。可在工作线程中使用。
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        """
+        :param max_entries: 最多缓存的内容数
+        :param max_bytes: 已编码数据的总大小上限（字节），单个内容超过其 1/4 时不缓存编码数据
+        """
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+        # 统计数据
+        self.hits = 0  # 使用实现端引用，未传输内容
+        self.encoded_hits = 0  # 复用已编码数据
+        self.misses = 0
+        self.stale = 0  # 引用失效
+        self.evictions = 0
+
+    @staticmethod
+    def digest(data) -> str:
+        """内容哈希（hashlib 处理大块数据时会释放 GIL）"""
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def lookup(
+        self, digest: str, learn: bool = False, use_ref: bool = True
+    ) -> Tuple[Optional[str], Optional[List[bytes]], bool]:
+        """
+        查询缓存并登记本次使用
+
+        :param learn: 是否可以学习引用，内容此前发送过且尚无引用时由调用方负责查询
+        :param use_ref: 是否使用已知引用，为 False 时只取编码结果
+        :return: (引用, 已编码数据, 是否需要由调用方查询引用)
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                self._entries[digest] = _CacheEntry()
+                self._evict()
+                return None, None, False
+            self._entries.move_to_end(digest)
+            ref = entry.ref if use_ref else None
+            if ref is not None:
+                self.hits += 1
+            elif entry.encoded is not None:
+                self.encoded_hits += 1
+            else:
+                self.misses += 1
+            should_learn = (
+                learn and entry.ref is None and not entry.ref_failed and not entry.learning
+            )
+            if should_learn:
+                entry.learning = True
+            return ref, entry.encoded, should_learn
+
+    def store_encoded(self, digest: str, encoded: List[bytes]):
+        """缓存编码结果"""
+        size = sum(len(chunk) for chunk in encoded)
+        if size > self.max_bytes // 4:
+            return
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry.encoded is not None:
+                return
+            entry.encoded = encoded
+            entry.size = size
+            self._bytes += size
+            self._evict()
+
+    def finish_learning(self, digest: str, ref: Optional[str], give_up: bool = True):
+        """
+        记录查询到的引用
+
+        :param ref: 实现端为该内容保存的引用，None 表示未查询到
+        :param give_up: 未查询到引用时是否不再为该内容查询（为 False 时下次发送重新查询）
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return
+            entry.learning = False
+            if ref:
+                entry.ref = ref
+            elif give_up:
+                entry.ref_failed = True
+
+    def invalidate(self, digest: str):
+        """引用发送失败，之后改为完整发送"""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry.ref is not None:
+                entry.ref = None
+                entry.ref_failed = True
+                self.stale += 1
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """命中/未命中计数与占用"""
+        return {
+            "hits": self.hits,
+            "encoded_hits": self.encoded_hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+
+class PreparedMedia:
+    """编码完成的请求及其使用缓存的情况"""
+
+    __slots__ = ("template", "refs_used", "to_learn")
+
+    def __init__(
+        self,
+        template: PayloadTemplate,
+        refs_used: List[str],
+        to_learn: List[Tuple[int, str]],
+    ):
+        self.template = template
+        # 以引用代替内容发送的哈希，发送失败时需要作废
+        self.refs_used = refs_used
+        # 值得向实现端查询引用的图片：(在消息图片中的序号, 哈希)
+        self.to_learn = to_learn
+
+
+class MediaEncoder:
+    """
+    把消息段中的 bytes 媒体与本地文件编码为 OneBot 的 base64:// 形式
+
+    base64 内容不需要 JSON 转义，编码结果以分块形式直接拼入预编码的请求，
+    不会再经过一次 JSON 序列化，发送前只需一次拼接。
+    总大小超过阈值时哈希与编码在专用线程池中完成，事件处理不会因发送大文件而长时间停顿。
+    """
+
+    def __init__(
+        self,
+        threshold: int = DEFAULT_OFFLOAD_THRESHOLD,
+        max_workers: int = 2,
+        cache: Optional[MediaCache] = None,
+    ):
+        """
+        :param threshold: 在线程池中编码的大小阈值（字节）
+        :param max_workers: 编码线程数
+        :param cache: 媒体缓存，为空时不缓存
+        """
+        self.threshold = threshold
+        self.cache = cache
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @staticmethod
+    def has_media(message: Any) -> bool:
+        """消息段数组中是否含有需要编码的 bytes 媒体或本地文件"""
+        if type(message) is not list:
+            return False
+        for segment in message:
+            data = segment.get("data") if isinstance(segment, dict) else None
+            if data and isinstance(data.get("file"), _MEDIA_TYPES):
+                return True
+        return False
+
+    @staticmethod
+    def passthrough_local_files(message: List[Any]) -> List[Any]:
+        """
+        把本地文件替换为 file:// URI，由同一主机上的实现端直接读取
+
+        :return: 新的消息段数组，原数组不变
+        """
+        result = []
+        for segment in message:
+            data = segment.get("data") if isinstance(segment, dict) else None
+            if data and isinstance(data.get("file"), os.PathLike):
+                uri = Path(data["file"]).resolve().as_uri()
+                segment = {**segment, "data": {**data, "file": uri}}
+            result.append(segment)
+        return result
+
+    async def prepare(
+        self,
+        codec: JsonCodec,
+        action: str,
+        params: Dict[str, Any],
+        target_field: Optional[str] = None,
+        use_refs: bool = True,
+    ) -> PreparedMedia:
+        """
+        生成请求模板，params["message"] 中的 bytes 媒体与本地文件以缓存引用或 base64:// 形式写入
+
+        :param target_field: 目标ID字段名，为 None 时目标已包含在 params 中
+        :param use_refs: 是否使用并学习缓存引用；为 False 时一律以 base64:// 写入（仍复用已缓存的编码结果）
+        :return: target_field 为 None 时 template.render(None, echo) 即为请求帧，
+                 否则为 template.render(target_id, echo)
+        """
+        size = sum(
+            media_size(segment["data"]["file"])
+            for segment in params["message"]
+            if isinstance(segment, dict)
+            and isinstance(segment.get("data", {}).get("file"), _MEDIA_TYPES)
+        )
+        if size < self.threshold:
+            return self._prepare(codec, action, params, target_field, use_refs)
+        return await self.run_in_worker(
+            self._prepare, codec, action, params, target_field, use_refs
+        )
+
+    async def run_in_worker(self, func: Callable[..., Any], *args) -> Any:
+        """在编码线程池中执行 func(*args)"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="onebot11-media"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _prepare(
+        self,
+        codec: JsonCodec,
+        action: str,
+        params: Dict[str, Any],
+        target_field: Optional[str] = None,
+        use_refs: bool = True,
+    ) -> PreparedMedia:
+        cache = self.cache
+        raw_strings: Dict[str, List[bytes]] = {}
+        message: List[Any] = []
+        refs_used: List[str] = []
+        to_learn: List[Tuple[int, str]] = []
+        images = 0
+        for segment in params["message"]:
+            data = segment.get("data") if isinstance(segment, dict) else None
+            is_image = isinstance(segment, dict) and segment.get("type") == "image"
+            if data and isinstance(data.get("file"), _MEDIA_TYPES):
+                with open_media(data["file"]) as content:
+                    ref = encoded = None
+                    learnable = False
+                    if cache is not None:
+                        digest = cache.digest(content)
+                        ref, encoded, learnable = cache.lookup(
+                            digest, learn=is_image and use_refs, use_ref=use_refs
+                        )
+                    if ref is not None:
+                        refs_used.append(digest)
+                        segment = {**segment, "data": {**data, "file": ref}}
+                    else:
+                        if encoded is None:
+                            encoded = [b"base64://", *b64encode_chunks(content)]
+                            if cache is not None:
+                                cache.store_encoded(digest, encoded)
+                        if learnable:
+                            # 第二次发送同一图片时才查询引用，只发一次的图片不产生额外请求
+                            to_learn.append((images, digest))
+                        mark = f"__ob11_media_{len(raw_strings)}__"
+                        raw_strings[mark] = encoded
+                        segment = {**segment, "data": {**data, "file": mark}}
+            if is_image:
+                images += 1
+            message.append(segment)
+        template = PayloadTemplate(
+            codec, action, {**params, "message": message}, target_field, raw_strings=raw_strings
+        )
+        return PreparedMedia(template, refs_used, to_learn)
+
+    def shutdown(self):
+        """关闭编码线程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,135 @@
+# OneBotAdapter/Pending.py
+import asyncio
+import heapq
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ConnectionLostError(ConnectionError):
+    """请求已发出，但在收到响应前连接已断开或被判定失效"""
+
+
+class PendingCalls:
+    """
+    单个账户上等待响应的 API 调用表
+
+    echo 由自增计数器生成，同一账户上永不重复；条目在响应到达、
+    超时或发送失败时同步移除，无需额外的清理任务。
+
+    超时由整张表共用的一个定时器处理：各调用的截止时间放在最小堆中，
+    定时器只对准最早的截止时间，到期时把已超时的 Future 以 asyncio.TimeoutError 结束。
+    每个调用不再需要 asyncio.wait_for 的包装任务与各自的定时器。
+    已完成调用的堆条目留到其截止时间再弹出，条目远多于在途调用时整体压缩一次。
+    """
+
+    def __init__(self, prefix: str = "ob11"):
+        self._prefix = f"{prefix}:"
+        self._counter = itertools.count(1)
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._deadlines: List[Tuple[float, str]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_at = float("inf")
+        # 有等待中的调用时置位，读取循环据此判断能否因背压暂停读取
+        self.busy = asyncio.Event()
+
+        # 统计数据
+        self.timeouts = 0
+
+    def create(self, timeout: Optional[float] = None) -> Tuple[str, asyncio.Future]:
+        """
+        分配新的 echo 并登记等待中的 Future
+
+        :param timeout: 超时时间（秒），到期时 Future 以 asyncio.TimeoutError 结束；为空时不超时
+        :return: (echo, future)
+        """
+        echo = f"{self._prefix}{next(self._counter)}"
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[echo] = future
+        self.busy.set()
+        if timeout is not None:
+            # 已完成调用的条目远多于在途调用时压缩，避免高吞吐下堆持续增长
+            if len(self._deadlines) > 2 * len(self._futures) + 1024:
+                self._deadlines = [d for d in self._deadlines if d[1] in self._futures]
+                heapq.heapify(self._deadlines)
+            deadline = loop.time() + max(0.0, timeout)
+            heapq.heappush(self._deadlines, (deadline, echo))
+            if deadline < self._timer_at:
+                self._schedule(loop, deadline)
+        return echo, future
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop, deadline: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_at(deadline, self._expire)
+        self._timer_at = deadline
+
+    def _stop_timer(self):
+        """没有等待中的调用时清空截止时间并撤销定时器"""
+        self.busy.clear()
+        self._deadlines.clear()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            self._timer_at = float("inf")
+
+    def _expire(self):
+        """定时器到期：结束所有已超时的调用，再对准下一个截止时间"""
+        self._timer = None
+        self._timer_at = float("inf")
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= now:
+            _, echo = heapq.heappop(deadlines)
+            future = self._futures.pop(echo, None)
+            if future is not None and not future.done():
+                self.timeouts += 1
+                future.set_exception(asyncio.TimeoutError())
+        if not self._futures:
+            self._stop_timer()
+        elif deadlines:
+            self._schedule(loop, deadlines[0][0])
+
+    def resolve(self, echo: Any, data: Dict) -> bool:
+        """
+        以响应数据完成对应的 Future
+
+        :param echo: 响应中的 echo 字段
+        :param data: 原始响应数据
+        :return: 是否命中等待中的调用
+        """
+        future = self._futures.pop(str(echo), None)
+        if not self._futures:
+            self._stop_timer()
+        if future is None or future.done():
+            return False
+        future.set_result(data)
+        return True
+
+    def discard(self, echo: str) -> Optional[asyncio.Future]:
+        """移除等待条目（超时或发送失败时调用）"""
+        future = self._futures.pop(echo, None)
+        if not self._futures:
+            self._stop_timer()
+        return future
+
+    def fail_all(self, error: BaseException) -> int:
+        """
+        让所有等待中的调用立即以异常结束（连接失效时调用）
+
+        :param error: 等待方收到的异常（每个调用各得到一个同类型的副本）
+        :return: 受影响的调用数
+        """
+        futures, self._futures = self._futures, {}
+        self._stop_timer()
+        for future in futures.values():
+            if not future.done():
+                future.set_exception(type(error)(*error.args))
+        return len(futures)
+
+    def __contains__(self, echo: str) -> bool:
+        return echo in self._futures
+
+    def __len__(self) -> int:
+        return len(self._futures)
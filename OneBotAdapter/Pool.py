@@ -0,0 +1,54 @@
+# OneBotAdapter/Pool.py
+from typing import Any, Dict, List, Sequence
+from urllib.parse import urlparse, urlunparse
+
+# Client 模式的连接方式
+CHANNELS_UNIVERSAL = "universal"  # 单个连接同时收发 API 与事件
+CHANNELS_SPLIT = "split"  # 事件走 /event，API 走 /api（可建立多个）
+
+
+def channel_url(url: str, channel: str) -> str:
+    """在连接地址的路径后追加 /api 或 /event，保留查询参数"""
+    parts = urlparse(url)
+    return urlunparse(parts._replace(path=f"{parts.path.rstrip('/')}/{channel}"))
+
+
+class ApiPool:
+    """
+    单个账户的 API 连接池
+
+    每次调用选择在途调用最少的连接（并列时取靠前的），
+    响应慢的连接上积压的调用多，新的调用自然流向其他连接。
+    连接数通常只有几个，逐个比较比维护堆更快。
+    """
+
+    def __init__(self, connections: Sequence[Any]):
+        """
+        :param connections: 已建立的 API 连接
+        """
+        self.connections: List[Any] = list(connections)
+        self._in_flight: List[int] = [0] * len(self.connections)
+
+        # 统计数据
+        self._requests: List[int] = [0] * len(self.connections)
+
+    def acquire(self) -> int:
+        """
+        选择在途调用最少的连接并登记一次调用
+
+        :return: 连接序号，调用结束后交给 release()
+        """
+        in_flight = self._in_flight
+        index = in_flight.index(min(in_flight))
+        in_flight[index] += 1
+        self._requests[index] += 1
+        return index
+
+    def release(self, index: int):
+        """调用结束（收到响应、超时或失败）"""
+        self._in_flight[index] -= 1
+
+    @property
+    def stats(self) -> Dict[str, List[int]]:
+        """各连接当前的在途调用数与累计调用数"""
+        return {"in_flight": list(self._in_flight), "requests": list(self._requests)}
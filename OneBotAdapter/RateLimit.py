@@ -0,0 +1,175 @@
+# OneBotAdapter/RateLimit.py
+import asyncio
+import time
+from typing import Any, Dict, Hashable, Optional
+
+
+class TokenBucket:
+    """
+    令牌桶（预约式）
+
+    reserve() 立即扣除一个令牌并返回需要等待的秒数，令牌可以为负，
+    后来者的等待时间自然排在前面的预约之后，因此同一个桶内严格先到先发。
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """
+        预约一个令牌
+
+        :return: 令牌可用前需要等待的秒数
+        """
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def refund(self):
+        """归还一个已预约但未使用的令牌"""
+        self.tokens += 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+class SendRateLimiter:
+    """
+    单个账户的发送限速器
+
+    每次发送同时在目标群（或私聊对象）的令牌桶和账户全局令牌桶中预约，
+    等待两者中较晚的那个。超出速率的发送会等待而不是丢弃；
+    只有排队数量超过上限或预计等待超过上限时才拒绝，拒绝前不会等待。
+    rate 为 0 的层级不限速。
+    """
+
+    # 会话令牌桶数量超过该值时清理已回满（长时间空闲）的桶
+    BUCKETS_PRUNE_THRESHOLD = 4096
+
+    def __init__(
+        self,
+        global_rate: float = 0.0,
+        global_burst: int = 1,
+        group_rate: float = 0.0,
+        group_burst: int = 1,
+        user_rate: float = 0.0,
+        user_burst: int = 1,
+        queue_limit: int = 0,
+        max_wait: float = 0.0,
+    ):
+        """
+        :param global_rate: 账户全局每秒发送数
+        :param global_burst: 账户全局突发上限
+        :param group_rate: 单个群每秒发送数
+        :param group_burst: 单个群突发上限
+        :param user_rate: 单个私聊对象每秒发送数
+        :param user_burst: 单个私聊对象突发上限
+        :param queue_limit: 最多同时排队的发送数，0 表示不限
+        :param max_wait: 预计排队时间上限（秒），0 表示不限
+        """
+        now = time.monotonic()
+        self._global = TokenBucket(global_rate, global_burst, now) if global_rate > 0 else None
+        self._limits = {
+            "group": (group_rate, group_burst),
+            "user": (user_rate, user_burst),
+        }
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+        self.queue_limit = queue_limit
+        self.max_wait = max_wait
+
+        # 统计数据
+        self.queued = 0
+        self.sent = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _bucket(self, target_type: str, target_id: Any, now: float) -> Optional[TokenBucket]:
+        rate, burst = self._limits.get(target_type, (0.0, 1))
+        if rate <= 0:
+            return None
+        key = (target_type, str(target_id))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.BUCKETS_PRUNE_THRESHOLD:
+                self._prune(now)
+            bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+        return bucket
+
+    def _prune(self, now: float):
+        for key in [k for k, b in self._buckets.items() if b.is_full(now)]:
+            del self._buckets[key]
+
+    async def acquire(self, target_type: Optional[str], target_id: Any) -> bool:
+        """
+        等待直到允许向目标发送一条消息
+
+        :param target_type: "group" 或 "user"，None 表示只受全局限速
+        :param target_id: 群号或QQ号
+        :return: 是否允许发送（False 表示被拒绝）
+        """
+        if self.queue_limit and self.queued >= self.queue_limit:
+            self.rejected += 1
+            return False
+
+        started = time.monotonic()
+        # 先在所有层级同时预约，按最长的等待决定是否放行；
+        # 拒绝时归还本次预约过的全部令牌，不会在任何层级留下占位
+        reserved = []
+        delay = 0.0
+        for bucket in (self._bucket(target_type, target_id, started), self._global):
+            if bucket is None:
+                continue
+            delay = max(delay, bucket.reserve(started))
+            reserved.append(bucket)
+
+        if self.max_wait and delay > self.max_wait:
+            for bucket in reserved:
+                bucket.refund()
+            self.rejected += 1
+            return False
+
+        if delay > 0:
+            self.queued += 1
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                for bucket in reserved:
+                    bucket.refund()
+                raise
+            finally:
+                self.queued -= 1
+
+        waited = time.monotonic() - started
+        self.sent += 1
+        if waited > 0.001:
+            self.delayed += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        return True
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """排队中数量、放行/延迟/拒绝计数与排队耗时"""
+        return {
+            "queued": self.queued,
+            "sent": self.sent,
+            "delayed": self.delayed,
+            "rejected": self.rejected,
+            "wait_avg_ms": round(self.wait_total / self.sent * 1000, 3) if self.sent else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+            "buckets": len(self._buckets),
+        }
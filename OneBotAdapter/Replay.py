@@ -0,0 +1,91 @@
+# OneBotAdapter/Replay.py
+import asyncio
+from collections import deque
+from typing import Dict, Optional
+
+
+def is_idempotent(endpoint: str) -> bool:
+    """只读 API（get_*/can_*）重复调用没有副作用，默认可以在重连后重放"""
+    return endpoint.startswith(("get_", "can_"))
+
+
+class ReplayQueue:
+    """
+    单个账户断线期间暂存的可重放调用
+
+    账户未连接时，可重放的调用在这里排队等待，而不是立即抛出 ConnectionError；
+    重新连接后按排队顺序依次放行，由调用方各自重新发送。
+    队列有上限，超出上限或等待超过 max_wait 的调用仍以 ConnectionError 结束。
+
+    本类只负责排队与放行，请求的发送由适配器完成。
+    """
+
+    def __init__(self, max_size: int = 100, max_wait: float = 30.0):
+        """
+        :param max_size: 最多暂存的调用数，0 表示不暂存
+        :param max_wait: 单个调用最长等待重连的时间（秒）
+        """
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._waiters: deque = deque()
+        self._closed = False
+
+        # 统计数据
+        self.replayed = 0
+        self.rejected = 0
+        self.expired = 0
+
+    async def hold(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待账户重新连接
+
+        :param timeout: 本次最长等待时间（秒），默认 max_wait
+        :return: 是否等到了重连；队列已满或等待超时时为 False
+        """
+        if self._closed:
+            return False
+        if len(self._waiters) >= self.max_size:
+            self.rejected += 1
+            return False
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            if not await asyncio.wait_for(
+                future, timeout=self.max_wait if timeout is None else max(0.0, timeout)
+            ):
+                return False
+        except asyncio.TimeoutError:
+            self.expired += 1
+            return False
+        finally:
+            try:
+                self._waiters.remove(future)
+            except ValueError:
+                pass
+        self.replayed += 1
+        return True
+
+    def release(self):
+        """连接已建立，按排队顺序放行所有等待中的调用"""
+        self._wake(True)
+
+    def close(self):
+        """适配器关闭：所有等待中的调用立即结束，之后不再暂存"""
+        self._closed = True
+        self._wake(False)
+
+    def _wake(self, connected: bool):
+        waiters, self._waiters = self._waiters, deque()
+        for future in waiters:
+            if not future.done():
+                future.set_result(connected)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """等待中的调用数与已放行、被拒绝、等待超时的调用数"""
+        return {
+            "held": len(self._waiters),
+            "replayed": self.replayed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+        }
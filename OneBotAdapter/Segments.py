@@ -0,0 +1,161 @@
+# OneBotAdapter/Segments.py
+import os
+from typing import Callable, Dict, List, Optional
+
+# 消息段转换函数：接收原消息段的 data，返回目标格式的完整消息段
+SegmentConverter = Callable[[Dict], Dict]
+
+# 未注册的 OneBot11 消息段在 OneBot12 中以该前缀保留原类型
+OB11_PREFIX = "onebot11_"
+
+# 由适配器编码或上传的本地媒体（内存中的数据或本地文件路径）
+_LOCAL_MEDIA_TYPES = (bytes, bytearray, memoryview, os.PathLike)
+
+
+class SegmentRegistry:
+    """
+    OneBot11 ↔ OneBot12 消息段转换表
+
+    两个方向各自以消息段类型为键查表，转换耗时与已注册类型数量无关。
+    厂商扩展消息段（如 NapCat 的 mface/markdown/json）可通过 register() 注册：
+
+    >>> registry.register(
+    >>>     "mface",
+    >>>     to_ob12=lambda d: {"type": "onebot11_mface", "data": d},
+    >>>     ob12_type="onebot11_mface",
+    >>>     to_ob11=lambda d: {"type": "mface", "data": d},
+    >>> )
+    """
+
+    def __init__(self):
+        self._to_ob12: Dict[str, SegmentConverter] = {}
+        self._to_ob11: Dict[str, SegmentConverter] = {}
+        self._register_builtins()
+
+    def register(
+        self,
+        ob11_type: Optional[str] = None,
+        to_ob12: Optional[SegmentConverter] = None,
+        ob12_type: Optional[str] = None,
+        to_ob11: Optional[SegmentConverter] = None,
+    ):
+        """
+        注册消息段转换函数（已存在的同类型转换会被覆盖）
+
+        :param ob11_type: OneBot11 消息段类型
+        :param to_ob12: OneBot11 data → OneBot12 消息段
+        :param ob12_type: OneBot12 消息段类型
+        :param to_ob11: OneBot12 data → OneBot11 消息段
+        """
+        if ob11_type and to_ob12:
+            self._to_ob12[ob11_type] = to_ob12
+        if ob12_type and to_ob11:
+            self._to_ob11[ob12_type] = to_ob11
+
+    def unregister(self, ob11_type: Optional[str] = None, ob12_type: Optional[str] = None):
+        """移除消息段转换函数"""
+        if ob11_type:
+            self._to_ob12.pop(ob11_type, None)
+        if ob12_type:
+            self._to_ob11.pop(ob12_type, None)
+
+    def to_ob12(self, segment: Dict) -> Dict:
+        """将单个 OneBot11 消息段转换为 OneBot12 格式"""
+        seg_type = segment.get("type", "")
+        seg_data = segment.get("data", {})
+        converter = self._to_ob12.get(seg_type)
+        if converter is not None:
+            return converter(seg_data)
+        # 保留原始CQ码类型
+        return {"type": f"{OB11_PREFIX}{seg_type}", "data": seg_data}
+
+    def to_ob11(self, segment: Dict) -> Dict:
+        """将单个 OneBot12 消息段转换为 OneBot11 格式"""
+        seg_type = segment.get("type", "")
+        seg_data = segment.get("data", {})
+        converter = self._to_ob11.get(seg_type)
+        if converter is not None:
+            return converter(seg_data)
+        # OneBot11 扩展消息段去掉前缀，其他未知类型直接保留
+        if seg_type.startswith(OB11_PREFIX):
+            seg_type = seg_type[len(OB11_PREFIX):]
+        return {"type": seg_type, "data": seg_data}
+
+    def convert_to_ob12(self, message: List) -> List[Dict]:
+        """将 OneBot11 消息段数组转换为 OneBot12 格式"""
+        to_ob12 = self.to_ob12
+        return [
+            {"type": "text", "data": {"text": segment}}
+            if isinstance(segment, str)
+            else to_ob12(segment)
+            for segment in message
+            if isinstance(segment, (str, dict))
+        ]
+
+    def convert_to_ob11(self, message: List[Dict]) -> List[Dict]:
+        """将 OneBot12 消息段数组转换为 OneBot11 格式"""
+        to_ob11 = self.to_ob11
+        return [to_ob11(segment) for segment in message]
+
+    def _register_builtins(self):
+        # ---- OneBot11 → OneBot12 ----
+        self.register("text", lambda d: {"type": "text", "data": {"text": d.get("text", "")}})
+        self.register("image", lambda d: {
+            "type": "image",
+            "data": {
+                "file": d.get("file"),
+                "url": d.get("url"),
+                "cache": d.get("cache", "1"),
+            },
+        })
+        self.register("record", lambda d: {
+            "type": "audio",
+            "data": {
+                "file": d.get("file"),
+                "url": d.get("url"),
+                "magic": d.get("magic", "0"),
+            },
+        })
+        self.register("at", lambda d: {
+            "type": "mention",
+            "data": {"user_id": d.get("qq"), "user_name": d.get("name", "")},
+        })
+        self.register("face", lambda d: {"type": "face", "data": {"id": d.get("id")}})
+        self.register("reply", lambda d: {
+            "type": "reply",
+            "data": {"message_id": d.get("id"), "user_id": d.get("qq", "")},
+        })
+
+        # ---- OneBot12 → OneBot11 ----
+        def media(ob11_type):
+            def convert(d):
+                data = {"file": d.get("file") or d.get("url", "")}
+                # 本地媒体保留文件名，分块上传时作为实现端保存的文件名
+                if d.get("file_name", "") and isinstance(data["file"], _LOCAL_MEDIA_TYPES):
+                    data["name"] = d["file_name"]
+                return {"type": ob11_type, "data": data}
+            return convert
+
+        def file(d):
+            data = {"file": d.get("file") or d.get("url", "")}
+            if d.get("file_name", ""):
+                data["name"] = d["file_name"]
+            return {"type": "file", "data": data}
+
+        self.register(ob12_type="text", to_ob11=lambda d: {
+            "type": "text", "data": {"text": d.get("text", "")}
+        })
+        self.register(ob12_type="image", to_ob11=media("image"))
+        self.register(ob12_type="audio", to_ob11=media("record"))
+        self.register(ob12_type="record", to_ob11=media("record"))
+        self.register(ob12_type="video", to_ob11=media("video"))
+        self.register(ob12_type="file", to_ob11=file)
+        self.register(ob12_type="face", to_ob11=lambda d: {
+            "type": "face", "data": {"id": d.get("id", "")}
+        })
+        self.register(ob12_type="mention", to_ob11=lambda d: {
+            "type": "at", "data": {"qq": str(d.get("user_id", ""))}
+        })
+        self.register(ob12_type="reply", to_ob11=lambda d: {
+            "type": "reply", "data": {"id": d.get("message_id", "")}
+        })
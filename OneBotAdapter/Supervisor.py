@@ -0,0 +1,161 @@
+# OneBotAdapter/Supervisor.py
+import asyncio
+import random
+import time
+from typing import Any, Dict, Optional
+
+# 熔断器状态
+CIRCUIT_CLOSED = "closed"  # 正常重连（指数退避）
+CIRCUIT_OPEN = "open"  # 连续失败过多，暂停重连直到冷却结束
+CIRCUIT_HALF_OPEN = "half_open"  # 冷却结束后的试探连接
+
+
+class ReconnectSupervisor:
+    """
+    单个 Client 账户的重连策略与状态
+
+    断线后第一次重连立即进行，之后按指数退避等待（base_delay × 2^n，上限 max_delay），
+    每次等待都带随机抖动，避免多个账户或多个实例在同一时刻一起重连。
+    连续失败达到 failure_threshold 次后熔断：冷却 open_seconds 后只试探一次，
+    成功则恢复正常，失败则继续熔断。
+
+    握手成功不等于连接可用：实现端鉴权失败或反复崩溃时会接受连接后立即关闭。
+    连接保持 stable_after 秒后才清零失败计数并关闭熔断器，在此之前断开记为一次失败，
+    重连继续按退避与熔断进行。
+
+    本类只负责计算等待时间与记录状态，实际的连接由适配器完成。
+    """
+
+    def __init__(
+        self,
+        base_delay: float = 0.2,
+        max_delay: float = 30.0,
+        jitter: float = 0.5,
+        failure_threshold: int = 10,
+        open_seconds: float = 60.0,
+        stable_after: float = 10.0,
+    ):
+        """
+        :param base_delay: 第二次重连前的等待时间（秒），之后每次翻倍
+        :param max_delay: 两次重连之间的最长等待时间（秒）
+        :param jitter: 抖动比例，实际等待时间在 [delay × (1 - jitter), delay] 之间随机
+        :param failure_threshold: 连续失败多少次后熔断，0 表示不熔断
+        :param open_seconds: 熔断后的冷却时间（秒）
+        :param stable_after: 连接保持多久（秒）才算稳定，0 表示握手成功即算稳定
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.stable_after = stable_after
+
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0  # 连续失败次数
+        self.connected = asyncio.Event()
+        self.last_error = ""
+        self._ever_connected = False
+        self._disconnected_at: Optional[float] = None
+        self._connected_at = 0.0
+        self._stable_timer: Optional[asyncio.TimerHandle] = None
+        self._next_attempt_at = 0.0
+
+        # 统计数据
+        self.attempts = 0
+        self.reconnects = 0
+        self.last_downtime = 0.0
+
+    def next_delay(self) -> float:
+        """
+        下一次连接前需要等待的秒数（熔断期间为冷却时间）
+        """
+        if self.failures == 0:
+            delay = 0.0
+        elif self.state == CIRCUIT_OPEN:
+            delay = self.open_seconds
+        else:
+            delay = min(self.max_delay, self.base_delay * 2 ** (self.failures - 1))
+            delay *= 1 - self.jitter * random.random()
+        self._next_attempt_at = time.monotonic() + delay
+        return delay
+
+    def record_attempt(self):
+        """记录一次连接尝试，熔断冷却结束后的尝试即为试探"""
+        self.attempts += 1
+        if self.state == CIRCUIT_OPEN:
+            self.state = CIRCUIT_HALF_OPEN
+
+    def record_failure(self, error: Any) -> bool:
+        """
+        记录一次连接失败
+
+        :return: 本次失败是否使熔断器打开
+        """
+        self.failures += 1
+        self.last_error = str(error)
+        if self.state == CIRCUIT_HALF_OPEN or (
+            self.failure_threshold and self.failures >= self.failure_threshold
+            and self.state == CIRCUIT_CLOSED
+        ):
+            opened = self.state == CIRCUIT_CLOSED
+            self.state = CIRCUIT_OPEN
+            return opened
+        return False
+
+    def record_connected(self):
+        """记录连接成功（握手完成），保持 stable_after 秒后才视为稳定"""
+        now = time.monotonic()
+        if self._ever_connected and self._disconnected_at is not None:
+            self.reconnects += 1
+            self.last_downtime = now - self._disconnected_at
+        self._ever_connected = True
+        self._disconnected_at = None
+        self._connected_at = now
+        self.connected.set()
+        if self.stable_after <= 0:
+            self._mark_stable()
+        else:
+            self._stable_timer = asyncio.get_running_loop().call_later(
+                self.stable_after, self._mark_stable
+            )
+
+    def _mark_stable(self):
+        """连接已保持足够久：清零失败计数，关闭熔断器"""
+        self._stable_timer = None
+        self.failures = 0
+        self.state = CIRCUIT_CLOSED
+        self.last_error = ""
+
+    def record_disconnected(self) -> bool:
+        """
+        记录连接断开，未达到稳定时长即断开的连接记为一次失败
+
+        :return: 本次断开是否使熔断器打开
+        """
+        opened = False
+        if self._stable_timer is not None:
+            self._stable_timer.cancel()
+            self._stable_timer = None
+            uptime = time.monotonic() - self._connected_at
+            opened = self.record_failure(f"连接建立后 {uptime:.2f} 秒即断开")
+        if self._disconnected_at is None:
+            self._disconnected_at = time.monotonic()
+        self.connected.clear()
+        return opened
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """连接状态、熔断状态、连续失败次数与最近一次断线时长"""
+        return {
+            "connected": self.connected.is_set(),
+            "circuit": self.state,
+            "failures": self.failures,
+            "attempts": self.attempts,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+            "last_downtime_ms": round(self.last_downtime * 1000, 1),
+            "next_attempt_in": (
+                0.0 if self.connected.is_set()
+                else round(max(0.0, self._next_attempt_at - time.monotonic()), 3)
+            ),
+        }
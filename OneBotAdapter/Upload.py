@@ -0,0 +1,208 @@
+# OneBotAdapter/Upload.py
+import asyncio
+import base64
+import hashlib
+import inspect
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+from .Media import is_media, media_size, open_media
+
+# 超过该大小（字节）的媒体先分块上传到实现端，再以文件路径发送
+DEFAULT_STREAM_THRESHOLD = 16 * 1024 * 1024
+
+# 每块的原始大小（字节），编码后的请求帧约为其 4/3
+DEFAULT_STREAM_CHUNK_SIZE = 512 * 1024
+
+# 同时在途的分块数，上传占用的内存不超过 window × 单块编码后大小
+DEFAULT_STREAM_WINDOW = 4
+
+# 实现端不支持该 API 时的返回码
+RETCODE_UNSUPPORTED = 1404
+
+ProgressCallback = Callable[[int, int], Union[None, Awaitable[None]]]
+
+
+def _sha256(file: Any) -> str:
+    with open_media(file) as content:
+        return hashlib.sha256(content).hexdigest()
+
+
+def _read_chunk(file: Any, offset: int, size: int) -> str:
+    with open_media(file) as content:
+        return base64.b64encode(content[offset:offset + size]).decode("ascii")
+
+
+def file_uri(path: str) -> str:
+    """把实现端返回的本地路径转换为 file:// URI"""
+    if "://" in path:
+        return path
+    path = path.replace("\\", "/")
+    if len(path) > 1 and path[1] == ":":
+        return f"file:///{path}"
+    return f"file://{path}"
+
+
+class StreamUploader:
+    """
+    分块上传大文件（upload_file_stream）
+
+    文件被切成固定大小的块逐块上传，每块都是一次普通的 API 调用，
+    同一连接上的其他 API 调用与事件在块与块之间正常收发，不会被一个巨大的帧堵住。
+    同时在途的块数有上限，上传占用的内存与文件大小无关。
+    上传完成后实现端返回文件在其本机的路径，消息中以该路径代替文件内容。
+
+    实现端不支持 upload_file_stream 时记住该账户，之后直接回退为单帧发送。
+    """
+
+    def __init__(
+        self,
+        adapter,
+        threshold: int = DEFAULT_STREAM_THRESHOLD,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        window: int = DEFAULT_STREAM_WINDOW,
+    ):
+        """
+        :param adapter: 适配器实例
+        :param threshold: 自动分块上传的大小阈值（字节），0 表示不自动上传
+        :param chunk_size: 每块的原始大小（字节）
+        :param window: 同时在途的分块数
+        """
+        self._adapter = adapter
+        self.threshold = threshold
+        self.chunk_size = max(1, chunk_size)
+        self.window = max(1, window)
+        # 已确认不支持分块上传的账户
+        self._unsupported = set()
+
+        # 统计数据
+        self.uploads = 0
+        self.failed = 0
+        self.chunks = 0
+        self.bytes = 0
+
+    def should_upload(self, account_name: str, file: Any) -> bool:
+        """该媒体是否应先分块上传"""
+        return (
+            self.threshold > 0
+            and is_media(file)
+            and account_name not in self._unsupported
+            and media_size(file) >= self.threshold
+        )
+
+    async def upload(
+        self,
+        account_name: str,
+        file: Any,
+        filename: str = "file.dat",
+        progress: Optional[ProgressCallback] = None,
+    ) -> Dict:
+        """
+        分块上传文件
+
+        :param account_name: 账户名
+        :param file: bytes 或本地文件 Path
+        :param filename: 实现端保存的文件名
+        :param progress: 进度回调，接收 (已确认字节数, 总字节数)，可以是协程函数
+        :return: 标准化响应，成功时 data["file_path"] 为实现端本机上的文件路径
+        """
+        adapter = self._adapter
+        total = media_size(file)
+        total_chunks = max(1, -(-total // self.chunk_size))
+        stream_id = uuid.uuid4().hex
+        # 哈希在线程池中计算（hashlib 处理大块数据时释放 GIL）
+        expected_sha256 = await adapter.media.run_in_worker(_sha256, file)
+
+        confirmed = 0
+        failure: Optional[Dict] = None
+        in_flight = set()
+
+        async def send_chunk(index: int):
+            offset = index * self.chunk_size
+            size = min(self.chunk_size, total - offset)
+            chunk_data = await adapter.media.run_in_worker(_read_chunk, file, offset, size)
+            response = await adapter.call_api(
+                "upload_file_stream",
+                account_id=account_name,
+                stream_id=stream_id,
+                chunk_data=chunk_data,
+                chunk_index=index,
+                total_chunks=total_chunks,
+                file_size=total,
+                expected_sha256=expected_sha256,
+                filename=filename,
+            )
+            return size, response
+
+        async def settle(done) -> Optional[Dict]:
+            nonlocal confirmed
+            for task in done:
+                size, response = task.result()
+                if response["status"] != "ok":
+                    return response
+                confirmed += size
+                self.chunks += 1
+                self.bytes += size
+                if progress is not None:
+                    result = progress(confirmed, total)
+                    if inspect.isawaitable(result):
+                        await result
+            return None
+
+        try:
+            for index in range(total_chunks):
+                if len(in_flight) >= self.window:
+                    done, in_flight = await asyncio.wait(
+                        in_flight, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    failure = await settle(done)
+                    if failure is not None:
+                        break
+                in_flight.add(asyncio.create_task(send_chunk(index)))
+            if failure is None and in_flight:
+                done, in_flight = await asyncio.wait(in_flight)
+                failure = await settle(done)
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+        if failure is None:
+            response = await adapter.call_api(
+                "upload_file_stream",
+                account_id=account_name,
+                stream_id=stream_id,
+                is_complete=True,
+            )
+            data = response.get("data")
+            if response["status"] != "ok":
+                failure = response
+            elif not isinstance(data, dict) or not data.get("file_path"):
+                failure = adapter._failed_response(
+                    adapter.accounts[account_name], 33003,
+                    f"账户 {account_name} 分块上传完成但实现端未返回文件路径", {},
+                )
+
+        if failure is not None:
+            self.failed += 1
+            if failure.get("retcode") == RETCODE_UNSUPPORTED:
+                self._unsupported.add(account_name)
+                adapter.logger.info(f"账户 {account_name} 的实现端不支持分块上传，大文件将以单帧发送")
+            else:
+                adapter.logger.warning(
+                    f"账户 {account_name} 分块上传 {filename} 失败: {failure.get('message', '')}"
+                )
+            return failure
+
+        self.uploads += 1
+        return response
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """上传次数、失败次数与已确认的分块数/字节数"""
+        return {
+            "uploads": self.uploads,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "bytes": self.bytes,
+        }
+
@@ -1 +1,2 @@
 from .Core import OneBotAdapter
+from .Pending import ConnectionLostError
@@ -0,0 +1,2416 @@
+"""
+OneBot11 适配器性能与压力测试
+
+无需真实的 OneBot 实现，直接运行：
+
+    python test/benchmark.py              # 运行全部用例
+    python test/benchmark.py pending      # 只运行指定用例
+"""
+import asyncio
+import base64
+import gc
+import hashlib
+import random
+import json
+import sys
+import tempfile
+import time
+import threading
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from OneBotAdapter import ConnectionLostError, OneBotAdapter  # noqa: E402
+from OneBotAdapter.Codec import CODECS  # noqa: E402
+from OneBotAdapter.Converter import OneBot11Converter  # noqa: E402
+from OneBotAdapter.Segments import SegmentRegistry  # noqa: E402
+from OneBotAdapter.Dispatcher import EventDispatcher  # noqa: E402
+from OneBotAdapter.Event import EventIdGenerator  # noqa: E402
+from OneBotAdapter.Http import HttpTransport, sign  # noqa: E402
+from OneBotAdapter.Media import MediaCache  # noqa: E402
+from OneBotAdapter.Pending import PendingCalls  # noqa: E402
+from OneBotAdapter.RateLimit import SendRateLimiter, TokenBucket  # noqa: E402
+
+
+@dataclass
+class BenchConfig:
+    """测试配置类"""
+    # 并发压力测试的调用数量
+    concurrent_calls: int = 10000
+    # 编解码器测试的每种负载循环次数
+    codec_rounds: int = 20000
+    # 事件突发测试的帧数
+    burst_frames: int = 20000
+    # 事件负载下测量的 API 调用次数
+    latency_calls: int = 300
+    # CQ码解析测试的循环次数
+    cq_rounds: int = 2000
+    # 消息段转换测试的循环次数
+    segment_rounds: int = 100000
+    # 事件转换测试的循环次数
+    convert_rounds: int = 20000
+    # 内存测试缓存的事件数量
+    buffered_events: int = 100000
+    # 事件 ID 唯一性测试中每个线程生成的数量
+    ids_per_thread: int = 200000
+    # 限速测试发送的消息数量
+    rate_limited_sends: int = 400
+    # 有序发送测试的目标数量与每个目标的消息数量
+    lane_targets: int = 50
+    lane_messages: int = 10
+    # 批量发送测试的目标数量
+    batch_targets: int = 5000
+    # 大文件发送测试的文件大小（MB）
+    media_mb: int = 20
+    # 媒体缓存测试重复发送同一图片的次数
+    media_cache_sends: int = 200
+    # 本地文件发送测试的文件大小（MB）
+    local_file_mb: int = 16
+    # 分块上传测试的文件大小（MB）
+    upload_mb: int = 64
+    # HTTP 模式测试的 API 调用数量、并发调用方数量与上报事件数量
+    http_calls: int = 5000
+    http_concurrency: int = 64
+    http_events: int = 20000
+
+
+# ============ 样例负载 ============
+
+SAMPLE_GROUP_MESSAGE = {
+    "time": 1755801512,
+    "self_id": 10000,
+    "post_type": "message",
+    "message_type": "group",
+    "sub_type": "normal",
+    "message_id": 1846120912,
+    "group_id": 1056208134,
+    "user_id": 2694611137,
+    "anonymous": None,
+    "message": [
+        {"type": "reply", "data": {"id": "1846120900"}},
+        {"type": "at", "data": {"qq": "10000"}},
+        {"type": "text", "data": {"text": " 帮我看看这张图，顺便查一下明天的天气"}},
+        {"type": "image", "data": {
+            "file": "9F2B1C3D4E5F6A7B8C9D0E1F2A3B4C5D.jpg",
+            "url": "https://multimedia.nt.qq.com.cn/download?appid=1407&fileid=CgoyNjk0NjExMTM3EhT",
+            "summary": "", "sub_type": 0,
+        }},
+    ],
+    "raw_message": "[CQ:reply,id=1846120900][CQ:at,qq=10000] 帮我看看这张图，顺便查一下明天的天气[CQ:image,file=9F2B1C3D4E5F6A7B8C9D0E1F2A3B4C5D.jpg]",
+    "font": 0,
+    "sender": {"user_id": 2694611137, "nickname": "测试用户", "card": "群名片", "role": "member"},
+}
+
+SAMPLE_NOTICE = {
+    "time": 1755801512,
+    "self_id": 10000,
+    "post_type": "notice",
+    "notice_type": "group_increase",
+    "sub_type": "approve",
+    "group_id": 1056208134,
+    "operator_id": 1725385676,
+    "user_id": 2694611137,
+}
+
+SAMPLE_API_RESPONSE = {
+    "status": "ok",
+    "retcode": 0,
+    "data": {"message_id": 1846120913},
+    "message": "",
+    "wording": "",
+    "echo": "ob11:12345",
+}
+
+SAMPLE_API_REQUEST = {
+    "action": "send_msg",
+    "params": {
+        "message_type": "group",
+        "group_id": "1056208134",
+        "message": [
+            {"type": "reply", "data": {"id": "1846120912"}},
+            {"type": "text", "data": {"text": "明天多云转晴，最高气温 26℃，记得带伞。"}},
+        ],
+    },
+    "echo": "ob11:12345",
+}
+
+
+# ============ 测试替身 ============
+
+class _StubLogger:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class _StubConfig:
+    def __init__(self, accounts: Dict[str, Dict]):
+        self._accounts = accounts
+
+    def getConfig(self, key, default=None):
+        if key == "OneBotv11_Adapter.accounts":
+            return self._accounts
+        return default
+
+    def setConfig(self, key, value):
+        pass
+
+
+class _StubEventBus:
+    def __init__(self):
+        self.events: List[Dict] = []
+
+    async def emit(self, event):
+        self.events.append(event)
+
+
+class _StubSDK:
+    def __init__(self, accounts: Dict[str, Dict]):
+        self.logger = _StubLogger()
+        self.config = _StubConfig(accounts)
+        self.adapter = _StubEventBus()
+
+
+class FakeConnection:
+    """
+    模拟的 OneBot 连接：收到请求后在下一轮事件循环中回写带 echo 的响应
+    """
+
+    def __init__(self, adapter: OneBotAdapter, account_name: str):
+        self.adapter = adapter
+        self.account_name = account_name
+        self.closed = False
+        self.sent = 0
+
+    async def send_str(self, data: str):
+        self.sent += 1
+        request = self.adapter.codec.loads(data)
+        response = {
+            "status": "ok",
+            "retcode": 0,
+            "data": {"echo_seen": request["echo"]},
+            "echo": request["echo"],
+        }
+        asyncio.get_running_loop().call_soon(self._deliver, response)
+
+    def _deliver(self, response: Dict):
+        self.adapter._api_response_futures[self.account_name].resolve(
+            response["echo"], response
+        )
+
+    async def close(self):
+        self.closed = True
+
+
+class _Frame:
+    __slots__ = ("type", "data")
+
+    def __init__(self, type, data):
+        self.type = type
+        self.data = data
+
+
+class FakeSocket:
+    """
+    模拟的 aiohttp WebSocket 连接
+
+    事件通过 feed() 注入，请求的响应排在已注入的事件之后，
+    与真实连接一样由适配器的读取循环（_listen）按顺序读出。
+    """
+
+    def __init__(self, adapter: OneBotAdapter):
+        self.adapter = adapter
+        self.closed = False
+        self._incoming: asyncio.Queue = asyncio.Queue()
+
+    @property
+    def pending_frames(self) -> int:
+        """已注入但尚未被读取的帧数"""
+        return self._incoming.qsize()
+
+    def feed(self, obj: Dict):
+        self._incoming.put_nowait(
+            _Frame(aiohttp.WSMsgType.TEXT, self.adapter.codec.dumps(obj))
+        )
+
+    async def send_str(self, data: str):
+        request = self.adapter.codec.loads(data)
+        self.feed({"status": "ok", "retcode": 0, "data": None, "echo": request["echo"]})
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        frame = await self._incoming.get()
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+
+    async def close(self):
+        self.closed = True
+        self._incoming.put_nowait(None)
+
+
+def make_adapter(
+    account_name: str = "default", adapter_class=OneBotAdapter, **account
+) -> OneBotAdapter:
+    """创建一个挂载了模拟连接的适配器实例"""
+    account = {"bot_id": "10000", "mode": "server", **account}
+    adapter = adapter_class(_StubSDK({account_name: account}))
+    adapter.connections[account_name] = FakeConnection(adapter, account_name)
+    return adapter
+
+
+def make_group_message(seq: int, group_id: int = 1056208134) -> Dict:
+    """生成第 seq 条群消息事件"""
+    event = dict(SAMPLE_GROUP_MESSAGE)
+    event["message_id"] = seq
+    event["group_id"] = group_id
+    return event
+
+
+def _best_of(func: Callable[[], Any], rounds: int, repeat: int = 5) -> float:
+    """重复计时取最快一轮，返回单次调用的平均秒数"""
+    best = float("inf")
+    per_repeat = max(1, rounds // repeat)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(per_repeat):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / per_repeat
+
+
+class FakeOneBotServer:
+    """
+    本地 OneBot 实现端替身（真实的 WebSocket 服务）
+
+    收到的每个请求立即回复带 echo 的成功响应，并记录请求数量。
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.targets: List[Any] = []
+        self.files: List[Any] = []
+        self.connected_at: List[float] = []
+        self._requests: List[web.Request] = []
+        self._runner: Optional[web.AppRunner] = None
+        self._site: Optional[web.TCPSite] = None
+        self.url = ""
+        self.port = 0
+
+    async def _accept(self, request, **kwargs) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(**kwargs)
+        await ws.prepare(request)
+        self.connected_at.append(time.perf_counter())
+        self._requests.append(request)
+        return ws
+
+    async def _handler(self, request):
+        ws = await self._accept(request)
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                continue
+            data = json.loads(msg.data)
+            self.requests += 1
+            params = data.get("params", {})
+            self.targets.append(params.get("group_id") or params.get("user_id"))
+            if isinstance(params.get("message"), list):
+                self.files.extend(
+                    seg["data"]["file"] for seg in params["message"] if "file" in seg.get("data", {})
+                )
+            await ws.send_str(json.dumps({
+                "status": "ok", "retcode": 0, "data": {"message_id": self.requests},
+                "message_id": self.requests, "echo": data["echo"],
+            }))
+        return ws
+
+    def _add_routes(self, app: web.Application):
+        app.router.add_get("/", self._handler)
+
+    async def start(self):
+        """启动服务，重启时沿用上次的端口"""
+        app = web.Application()
+        self._add_routes(app)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        self._site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        await self._site.start()
+        self.port = self._site._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{self.port}/"
+
+    async def stop(self):
+        """停止监听并断开所有连接（模拟实现端退出）"""
+        self._site._server.close()
+        for request in self._requests:
+            if request.transport is not None:
+                request.transport.abort()
+        self._requests.clear()
+        await self._runner.cleanup()
+
+
+async def connect_client_adapter(server: FakeOneBotServer, **account) -> OneBotAdapter:
+    """创建一个以 Client 模式连接到替身服务的适配器"""
+    adapter = OneBotAdapter(_StubSDK({
+        "default": {"bot_id": "10000", "mode": "client", "client_url": server.url, **account}
+    }))
+    adapter._is_running = True
+    await adapter.connect("default")
+    return adapter
+
+
+# ============ 用例 ============
+
+async def bench_pending(config: BenchConfig):
+    """并发相同调用：每个调用方都必须拿到属于自己的响应"""
+    adapter = make_adapter()
+    n = config.concurrent_calls
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(adapter.call_api("get_status", account_id="default") for _ in range(n))
+    )
+    elapsed = time.perf_counter() - start
+
+    echoes = {r["data"]["echo_seen"] for r in results}
+    assert all(r["status"] == "ok" for r in results), "存在失败的调用"
+    assert len(echoes) == n, f"echo 冲突: {n - len(echoes)} 个调用拿到了重复响应"
+    assert len(adapter._api_response_futures["default"]) == 0, "等待表未清空"
+
+    print(f"  {n} 个并发相同调用 - {elapsed:.3f}s ({n / elapsed:.0f} 次/秒)")
+
+
+async def bench_codec(config: BenchConfig):
+    """各 JSON 编解码器在典型 OneBot11 负载上的编解码耗时"""
+    rounds = config.codec_rounds
+    samples = {
+        "群消息事件": SAMPLE_GROUP_MESSAGE,
+        "通知事件": SAMPLE_NOTICE,
+        "API响应": SAMPLE_API_RESPONSE,
+        "API请求": SAMPLE_API_REQUEST,
+    }
+
+    for name, codec_class in CODECS.items():
+        try:
+            codec = codec_class()
+        except ImportError:
+            print(f"  {name}: 未安装，跳过")
+            continue
+
+        for sample_name, sample in samples.items():
+            encoded = codec.dumps_bytes(sample)
+            assert codec.loads(encoded) == sample
+            assert codec.loads(encoded.decode("utf-8")) == sample
+
+            start = time.perf_counter()
+            for _ in range(rounds):
+                codec.loads(encoded)
+            load_us = (time.perf_counter() - start) / rounds * 1e6
+
+            start = time.perf_counter()
+            for _ in range(rounds):
+                codec.dumps_bytes(sample)
+            dump_us = (time.perf_counter() - start) / rounds * 1e6
+
+            print(f"  {name:8s} {sample_name}: 解码 {load_us:.2f}us, 编码 {dump_us:.2f}us")
+
+
+async def bench_dispatch(config: BenchConfig):
+    """事件突发：队列有界、读取方在队列满时被阻塞、同一会话内保持顺序"""
+    n = config.burst_frames
+    groups = 200
+    seen: Dict[str, List[int]] = {}
+    active = 0
+    max_active = 0
+
+    async def handler(item):
+        nonlocal active, max_active
+        key, seq = item
+        active += 1
+        max_active = max(max_active, active)
+        # 让不同帧的处理时长不同，打乱完成顺序
+        for _ in range(seq % 3):
+            await asyncio.sleep(0)
+        seen.setdefault(key, []).append(seq)
+        active -= 1
+
+    dispatcher = EventDispatcher(handler, workers=8, queue_size=256)
+    dispatcher.start()
+
+    max_depth = 0
+    start = time.perf_counter()
+    for i in range(n):
+        key = f"group:{i % groups}"
+        await dispatcher.put((key, i), key)
+        max_depth = max(max_depth, dispatcher.stats["queue_depth"])
+    await dispatcher.join()
+    elapsed = time.perf_counter() - start
+    stats = dispatcher.stats
+    await dispatcher.stop()
+
+    assert sum(len(v) for v in seen.values()) == n, "处理数量不符"
+    assert all(v == sorted(v) for v in seen.values()), "同一会话内的事件乱序"
+    assert max_active > 1, "不同会话之间没有并行处理"
+    assert max_depth <= 256, f"队列深度超出上限: {max_depth}"
+    assert stats["stalled"] > 0, "读取方从未被阻塞"
+
+    loads = [shard["processed"] for shard in stats["shards"]]
+    print(
+        f"  {n} 帧 / {groups} 个群 - {elapsed:.3f}s, 最大队列深度 {max_depth}, "
+        f"阻塞 {stats['stalled']} 次, 最大并行 {max_active}"
+    )
+    print(f"  各分片处理量: {loads}")
+    print(f"  分片0 热点会话: {stats['shards'][0]['hot_keys']}")
+
+
+# (CQ码字符串, 期望的 OneBot12 消息段)
+CQ_GOLDEN_CASES = [
+    ("纯文本", [{"type": "text", "data": {"text": "纯文本"}}]),
+    ("A&amp;B &#91;不是CQ码&#93;", [{"type": "text", "data": {"text": "A&B [不是CQ码]"}}]),
+    (
+        "看图[CQ:image,file=a.jpg,url=https://e.com/a?x=1&amp;y=2&#44;3]结束",
+        [
+            {"type": "text", "data": {"text": "看图"}},
+            {"type": "image", "data": {"file": "a.jpg", "url": "https://e.com/a?x=1&y=2,3", "cache": "1"}},
+            {"type": "text", "data": {"text": "结束"}},
+        ],
+    ),
+    (
+        "[CQ:reply,id=42][CQ:at,qq=123,name=A&#91;1&#93;] 你好",
+        [
+            {"type": "reply", "data": {"message_id": "42", "user_id": ""}},
+            {"type": "mention", "data": {"user_id": "123", "user_name": "A[1]"}},
+            {"type": "text", "data": {"text": " 你好"}},
+        ],
+    ),
+    (
+        "[CQ:face,id=1][CQ:record,file=v.amr,magic=1]",
+        [
+            {"type": "face", "data": {"id": "1"}},
+            {"type": "audio", "data": {"file": "v.amr", "url": None, "magic": "1"}},
+        ],
+    ),
+    (
+        "[CQ:json,data={\"app\":\"a\"&#44;\"v\":1}]",
+        [{"type": "onebot11_json", "data": {"data": '{"app":"a","v":1}'}}],
+    ),
+    (
+        "[CQ:shake]",
+        [{"type": "onebot11_shake", "data": {}}],
+    ),
+    (
+        "未闭合[CQ:image,file=a.jpg",
+        [{"type": "text", "data": {"text": "未闭合[CQ:image,file=a.jpg"}}],
+    ),
+]
+
+
+def _baseline_parse_cq_code(message: str) -> List[Dict]:
+    """对照组：原先基于 find/split 逐个切分、再按类型逐个转换的CQ码解析（不处理转义）"""
+    segments = []
+    last_pos = 0
+    while True:
+        cq_start = message.find("[CQ:", last_pos)
+        if cq_start == -1:
+            if last_pos < len(message):
+                text = message[last_pos:]
+                if text:
+                    segments.append({"type": "text", "data": {"text": text}})
+            break
+        if cq_start > last_pos:
+            text = message[last_pos:cq_start]
+            if text:
+                segments.append({"type": "text", "data": {"text": text}})
+        cq_end = message.find("]", cq_start)
+        if cq_end == -1:
+            segments.append({"type": "text", "data": {"text": message[cq_start:]}})
+            break
+        cq_content = message[cq_start + 4:cq_end]
+        parts = cq_content.split(",", 1)
+        cq_type = parts[0]
+        cq_data = {}
+        if len(parts) > 1:
+            for part in parts[1].split(","):
+                if "=" in part:
+                    key, value = part.split("=", 1)
+                    cq_data[key] = value
+        if cq_type == "text":
+            segments.append({"type": "text", "data": {"text": cq_data.get("text", "")}})
+        elif cq_type == "image":
+            segments.append({"type": "image", "data": {
+                "file": cq_data.get("file"),
+                "url": cq_data.get("url"),
+                "cache": cq_data.get("cache", "1"),
+            }})
+        elif cq_type == "record":
+            segments.append({"type": "audio", "data": {
+                "file": cq_data.get("file"),
+                "url": cq_data.get("url"),
+                "magic": cq_data.get("magic", "0"),
+            }})
+        elif cq_type == "at":
+            segments.append({"type": "mention", "data": {
+                "user_id": cq_data.get("qq"),
+                "user_name": cq_data.get("name", ""),
+            }})
+        elif cq_type == "face":
+            segments.append({"type": "face", "data": {"id": cq_data.get("id")}})
+        elif cq_type == "reply":
+            segments.append({"type": "reply", "data": {
+                "message_id": cq_data.get("id"),
+                "user_id": cq_data.get("qq", ""),
+            }})
+        else:
+            segments.append({"type": f"onebot11_{cq_type}", "data": cq_data})
+        last_pos = cq_end + 1
+    return segments
+
+
+def _compare_timings(funcs: Dict[str, Callable[[], Any]], rounds: int, repeat: int = 30) -> Dict[str, float]:
+    """交替计时多个函数（关闭 GC），各取最快一轮，返回单次调用的平均秒数"""
+    best = {label: float("inf") for label in funcs}
+    per_repeat = max(1, rounds // repeat)
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for label, func in funcs.items():
+                start = time.perf_counter()
+                for _ in range(per_repeat):
+                    func()
+                best[label] = min(best[label], time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return {label: elapsed / per_repeat for label, elapsed in best.items()}
+
+
+async def bench_cq_code(config: BenchConfig):
+    """CQ码解析：转义还原的正确性，以及多消息段长消息与原解析器的耗时对比"""
+    converter = OneBot11Converter()
+    for message, expected in CQ_GOLDEN_CASES:
+        result = converter._parse_cq_code(message)
+        assert result == expected, f"解析结果不符: {message!r}\n  {result}\n  {expected}"
+    print(f"  {len(CQ_GOLDEN_CASES)} 个标准用例通过")
+
+    units = {
+        "重复的@/表情/图片": lambda i: (
+            "[CQ:at,qq=2694611137] 早上好 [CQ:face,id=14][CQ:image,file=a.jpg,url=https://e.com/a.jpg] "
+        ),
+        "各不相同的回复/图片": lambda i: (
+            f"[CQ:reply,id={1846120900 + i}]看看这个[CQ:image,file={i:032X}.jpg,"
+            f"url=https://multimedia.nt.qq.com.cn/download?appid=1407&amp;fileid={i},summary=,sub_type=0] "
+            f"[CQ:at,qq={2694611137 + i}] "
+        ),
+    }
+    for label, unit in units.items():
+        for count in (10, 100):
+            message = "".join(unit(i) for i in range(count))
+            segments = len(_baseline_parse_cq_code(message))
+            timings = _compare_timings({
+                "原解析器": lambda: _baseline_parse_cq_code(message),
+                "单次扫描": lambda: converter._parse_cq_code(message),
+            }, config.cq_rounds)
+            print(
+                f"  {label}，{segments} 个消息段: "
+                + ", ".join(f"{name} {seconds * 1e6:.1f}us" for name, seconds in timings.items())
+            )
+            assert timings["单次扫描"] <= timings["原解析器"], timings
+
+
+async def bench_segments(config: BenchConfig):
+    """消息段转换：查表耗时不随已注册类型数量增长"""
+    registry = SegmentRegistry()
+
+    ob12 = [
+        {"type": "text", "data": {"text": "你好"}},
+        {"type": "mention", "data": {"user_id": 123}},
+        {"type": "file", "data": {"file": "https://e.com/a.docx", "file_name": "a.docx"}},
+        {"type": "onebot11_mface", "data": {"emoji_id": "x"}},
+    ]
+    assert registry.convert_to_ob11(ob12) == [
+        {"type": "text", "data": {"text": "你好"}},
+        {"type": "at", "data": {"qq": "123"}},
+        {"type": "file", "data": {"file": "https://e.com/a.docx", "name": "a.docx"}},
+        {"type": "mface", "data": {"emoji_id": "x"}},
+    ]
+
+    rounds = config.segment_rounds
+    segment = {"type": "vendor_last", "data": {"v": 1}}
+    for extra in (0, 100, 1000):
+        registry = SegmentRegistry()
+        chain = []
+        for i in range(extra):
+            convert = (lambda t: lambda d: {"type": t, "data": d})(f"vendor_{i}")
+            registry.register(f"vendor_{i}", to_ob12=convert)
+            chain.append((f"vendor_{i}", convert))
+        convert = lambda d: {"type": "onebot11_vendor_last", "data": d}  # noqa: E731
+        registry.register("vendor_last", to_ob12=convert)
+        chain.append(("vendor_last", convert))
+
+        def linear(seg):
+            # 对照组：逐个比较类型（相当于 if/elif 链）
+            for seg_type, fn in chain:
+                if seg["type"] == seg_type:
+                    return fn(seg["data"])
+
+        timings = {}
+        for label, fn in (("查表", registry.to_ob12), ("逐个比较", linear)):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                fn(segment)
+            timings[label] = (time.perf_counter() - start) / rounds * 1e9
+        print(
+            f"  已注册 {extra + 7} 种类型: "
+            + ", ".join(f"{label} {ns:.0f}ns/段" for label, ns in timings.items())
+        )
+
+
+def _buffer_events(converter: OneBot11Converter, frames: List[bytes], codec) -> int:
+    """解析并转换全部帧后保留转换结果，返回占用的内存字节数"""
+    gc.collect()
+    tracemalloc.start()
+    events = [converter.convert(codec.loads(frame)) for frame in frames]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(events) == len(frames)
+    return current
+
+
+async def bench_drop_raw_events(config: BenchConfig):
+    """不保留原始数据：缓存大量事件时的内存占用（这是丢弃数据，不是压缩）"""
+    codec = CODECS["json"]()
+    n = config.buffered_events
+    frames = []
+    for i in range(n):
+        if i % 4 == 3:
+            raw = dict(SAMPLE_NOTICE, user_id=2694611137 + i % 500, group_id=1056208134 + i % 50)
+        else:
+            raw = make_group_message(i, group_id=1056208134 + i % 50)
+        frames.append(codec.dumps_bytes(raw))
+
+    variants = (
+        ("默认", OneBot11Converter()),
+        ("丢弃 onebot11_raw（驻留 ID、共用 self）", OneBot11Converter(keep_raw=False)),
+    )
+    baseline = None
+    for label, converter in variants:
+        size = _buffer_events(converter, frames, codec)
+        baseline = baseline or size
+        saved = f"，比默认少 {1 - size / baseline:.0%}" if size is not baseline else ""
+        print(f"  {label}: {n} 个事件共 {size / 1024 / 1024:.1f}MB, {size / n:.0f}B/事件{saved}")
+
+
+CONVERT_SAMPLES = {
+    "群消息": make_group_message(1),
+    "入群通知": SAMPLE_NOTICE,
+    "戳一戳": {
+        "time": 1755801512, "self_id": 10000, "post_type": "notice", "notice_type": "notify",
+        "sub_type": "poke", "group_id": 1056208134, "user_id": 2694611137, "target_id": 10000,
+    },
+    "好友请求": {
+        "time": 1755801512, "self_id": 10000, "post_type": "request", "request_type": "friend",
+        "user_id": 2694611137, "comment": "你好", "flag": "1755801512000",
+    },
+    "心跳": {
+        "time": 1755801512, "self_id": 10000, "post_type": "meta_event",
+        "meta_event_type": "heartbeat", "status": {"online": True, "good": True}, "interval": 5000,
+    },
+}
+
+
+async def bench_convert_dispatch(config: BenchConfig):
+    """事件转换分发：各类事件经处理表查找后的转换吞吐"""
+    converter = OneBot11Converter()
+
+    # 厂商扩展事件注册后优先于通用处理
+    def emoji_like(raw_event, base_event):
+        base_event["detail_type"] = "onebot11_group_msg_emoji_like"
+        return base_event
+
+    converter.register_handler(emoji_like, "notice", "group_msg_emoji_like")
+    event = converter.convert(dict(SAMPLE_NOTICE, notice_type="group_msg_emoji_like"))
+    assert event["detail_type"] == "onebot11_group_msg_emoji_like"
+    assert converter.convert({"post_type": "unknown", "self_id": 10000}) is None
+
+    rounds = config.convert_rounds
+    for label, raw in CONVERT_SAMPLES.items():
+        assert converter.convert(raw) is not None
+        us = _best_of(lambda: converter.convert(raw), rounds) * 1e6
+        print(f"  {label}: {us:.2f}us/事件, {1e6 / us:,.0f} 事件/秒")
+
+
+async def bench_event_ids(config: BenchConfig):
+    """事件 ID：多线程、多实例下的唯一性与有序性，以及与 uuid4 的生成耗时对比"""
+    generators = [EventIdGenerator(), EventIdGenerator()]
+    per_thread = config.ids_per_thread
+    results: List[List[str]] = []
+
+    def worker(generator):
+        ids = [generator.next() for _ in range(per_thread)]
+        results.append(ids)
+
+    threads = [threading.Thread(target=worker, args=(g,)) for g in generators * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_ids = [i for ids in results for i in ids]
+    assert len(set(all_ids)) == len(all_ids), "事件 ID 出现重复"
+    for ids in results:
+        assert ids == sorted(ids), "同一线程内生成的事件 ID 未按顺序递增"
+    print(f"  {len(threads)} 个线程 / {len(generators)} 个实例共 {len(all_ids)} 个 ID 无重复")
+
+    # 消息事件 ID 可由 self_id + message_id 复现
+    raw = dict(SAMPLE_GROUP_MESSAGE)
+    assert OneBot11Converter().convert(raw)["id"] == OneBot11Converter().convert(raw)["id"]
+    notice = OneBot11Converter().convert(dict(SAMPLE_NOTICE))
+    assert notice["id"] != OneBot11Converter().convert(dict(SAMPLE_NOTICE))["id"]
+
+    rounds = config.segment_rounds
+    generator = EventIdGenerator()
+    timings = {
+        "计数器": _best_of(generator.next, rounds),
+        "推导": _best_of(lambda: generator.derive(10000, 1846120912), rounds),
+        "uuid4": _best_of(lambda: str(uuid.uuid4()), rounds),
+    }
+    print("  " + ", ".join(f"{label} {t * 1e9:.0f}ns/个" for label, t in timings.items()))
+
+
+async def bench_rate_limit(config: BenchConfig):
+    """发送限速：全局/单群令牌桶下的实际发送速率、排队耗时与拒绝计数"""
+    adapter = make_adapter(
+        rate_limit_global=200, rate_limit_global_burst=10,
+        rate_limit_group=20, rate_limit_group_burst=2,
+    )
+    sent_at: Dict[str, List[float]] = {}
+    connection = adapter.connections["default"]
+    send_str = connection.send_str
+
+    async def record(data):
+        group_id = str(adapter.codec.loads(data)["params"]["group_id"])
+        sent_at.setdefault(group_id, []).append(time.perf_counter())
+        await send_str(data)
+
+    connection.send_str = record
+
+    n = config.rate_limited_sends
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        adapter.call_api("send_msg", message_type="group", group_id=1000 + i % 20, message="x")
+        for i in range(n)
+    ))
+    elapsed = time.perf_counter() - start
+    assert all(r["status"] == "ok" for r in results), "限速时消息不应被丢弃"
+
+    # 单群的持续速率不得超过 20 条/秒（允许 2 条突发）
+    worst = max(
+        (len(times) - 2) / (times[-1] - times[0]) for times in sent_at.values()
+    )
+    stats = adapter.send_stats()["default"]
+    print(
+        f"  {n} 条 / 20 个群: 耗时 {elapsed:.2f}s ({n / elapsed:.0f} 条/秒, 上限 200), "
+        f"单群最高 {worst:.1f} 条/秒 (上限 20)"
+    )
+    print(
+        f"  排队 {stats['delayed']} 条, 平均等待 {stats['wait_avg_ms']:.0f}ms, "
+        f"最长 {stats['wait_max_ms']:.0f}ms"
+    )
+    assert n / elapsed <= 200 * 1.05 + 10 and worst <= 20 * 1.05
+
+    # 排队上限：超出部分立即拒绝并计数
+    adapter = make_adapter(rate_limit_group=1, rate_limit_group_burst=1, send_queue_limit=5)
+    tasks = [
+        asyncio.create_task(
+            adapter.call_api("send_msg", message_type="group", group_id=1, message="x")
+        )
+        for _ in range(10)
+    ]
+    await asyncio.sleep(0.05)
+    stats = adapter.send_stats()["default"]
+    # 第 1 条直接发出，其后 5 条排队，剩余 4 条被拒绝
+    assert stats["sent"] == 1 and stats["queued"] == 5 and stats["rejected"] == 4, stats
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    print(f"  排队上限 5: 10 条中直接发出 1 条, 排队 5 条, 拒绝 {stats['rejected']} 条")
+
+    # 等待上限：按所有层级中最长的等待立即拒绝，并归还本次预约过的全部令牌
+    limiter = SendRateLimiter(
+        global_rate=1, global_burst=1, group_rate=4, group_burst=1, max_wait=0.5,
+    )
+    assert await limiter.acquire("group", 1)
+    start = time.perf_counter()
+    # 群桶只需等 0.25s，全局桶需要 1s：超出上限，不应先等群桶再拒绝
+    assert not await limiter.acquire("group", 1)
+    rejected_after = time.perf_counter() - start
+    group_bucket = limiter._buckets[("group", "1")]
+    assert rejected_after < 0.05, f"拒绝前等待了 {rejected_after * 1000:.0f}ms"
+    assert group_bucket.tokens > -0.1 and limiter._global.tokens > -0.1, "拒绝后令牌未归还"
+    print(f"  等待上限 0.5s: {rejected_after * 1000:.1f}ms 内拒绝, 群桶与全局桶令牌均已归还")
+
+
+class ConcurrentImplConnection(FakeConnection):
+    """
+    模拟并发处理请求的 OneBot 实现端：每个请求随机耗时 1~5ms，
+    消息按处理完成的先后“送达”，因此同时在途的多条消息可能乱序
+    """
+
+    def __init__(self, adapter: OneBotAdapter, account_name: str):
+        super().__init__(adapter, account_name)
+        self.delivered: Dict[str, List[str]] = {}
+
+    async def send_str(self, data: str):
+        request = self.adapter.codec.loads(data)
+        delay = random.uniform(0.001, 0.005)
+        asyncio.get_running_loop().call_later(delay, self._process, request)
+
+    def _process(self, request: Dict):
+        params = request["params"]
+        text = params["message"][0]["data"]["text"]
+        self.delivered.setdefault(str(params["group_id"]), []).append(text)
+        self._deliver({"status": "ok", "retcode": 0, "data": None, "echo": request["echo"]})
+
+
+async def bench_send_lanes(config: BenchConfig):
+    """有序发送：连续发出不等待时同一目标按调用顺序送达，不同目标并行"""
+    targets, per_target = config.lane_targets, config.lane_messages
+    expected = [str(i) for i in range(per_target)]
+
+    def make():
+        adapter = make_adapter()
+        connection = ConcurrentImplConnection(adapter, "default")
+        adapter.connections["default"] = connection
+        return adapter, connection
+
+    # 对照组：每条消息各自直接调用 call_api
+    adapter, connection = make()
+    await asyncio.gather(*(
+        adapter.call_api(
+            "send_msg", message_type="group", group_id=t,
+            message=[{"type": "text", "data": {"text": str(i)}}],
+        )
+        for i in range(per_target) for t in range(targets)
+    ))
+    scrambled = sum(texts != expected for texts in connection.delivered.values())
+
+    # 分道发送：不等待地连续调用 Send
+    adapter, connection = make()
+    start = time.perf_counter()
+    tasks = [
+        adapter.Send.To("group", t).Text(str(i))
+        for i in range(per_target) for t in range(targets)
+    ]
+    results = await asyncio.gather(*tasks)
+    laned = time.perf_counter() - start
+    assert all(r["status"] == "ok" for r in results)
+    assert all(texts == expected for texts in connection.delivered.values()), "分道发送出现乱序"
+    assert len(adapter.send_lanes) == 0
+
+    # 逐条等待（原先保证顺序的唯一方式）
+    adapter, connection = make()
+    start = time.perf_counter()
+    for t in range(targets):
+        for i in range(per_target):
+            await adapter.Send.To("group", t).Text(str(i))
+    serial = time.perf_counter() - start
+
+    total = targets * per_target
+    print(f"  直接调用: {scrambled}/{targets} 个目标出现乱序; 分道发送: 全部有序")
+    print(
+        f"  {total} 条 / {targets} 个目标: 分道发送 {laned:.2f}s ({total / laned:.0f} 条/秒), "
+        f"逐条等待 {serial:.2f}s ({total / serial:.0f} 条/秒)"
+    )
+
+
+class RecordingConnection(FakeConnection):
+    """记录收到的每个请求，并为 send_msg 分配递增的 message_id"""
+
+    def __init__(self, adapter: OneBotAdapter, account_name: str):
+        super().__init__(adapter, account_name)
+        self.requests: List[Dict] = []
+
+    async def send_str(self, data: str):
+        request = self.adapter.codec.loads(data)
+        self.requests.append(request)
+        message_id = len(self.requests)
+        response = {
+            "status": "ok", "retcode": 0, "data": {"message_id": message_id},
+            "message_id": message_id, "echo": request["echo"],
+        }
+        asyncio.get_running_loop().call_later(0.002, self._deliver, response)
+
+
+async def bench_coalesce(config: BenchConfig):
+    """发送合并：同一事件触发的多条短消息合并为一次 send_msg，各调用方拿到同一 message_id"""
+    adapter = make_adapter(send_coalesce_ms=5)
+    connection = RecordingConnection(adapter, "default")
+    adapter.connections["default"] = connection
+
+    send = adapter.Send.To("group", 123)
+    tasks = [
+        send.Text("插件A"),
+        send.Text("插件B"),
+        adapter.Send.To("group", 123).At(10001).Text("插件C"),
+        send.Image("https://example.com/a.png"),
+        send.Recall(42),  # 不可合并的调用会截断批次
+        send.Text("插件D"),
+        send.Voice("https://example.com/a.amr"),  # 语音必须单独发送
+    ]
+    results = await asyncio.gather(*tasks)
+    actions = [(r["action"], r["params"].get("message")) for r in connection.requests]
+    assert actions == [
+        ("send_msg", [
+            {"type": "text", "data": {"text": "插件A"}},
+            {"type": "text", "data": {"text": " "}},
+            {"type": "text", "data": {"text": "插件B"}},
+            {"type": "text", "data": {"text": " "}},
+            {"type": "at", "data": {"qq": "10001"}},
+            {"type": "text", "data": {"text": " "}},
+            {"type": "text", "data": {"text": "插件C"}},
+            {"type": "image", "data": {"file": "https://example.com/a.png"}},
+        ]),
+        ("delete_msg", None),
+        ("send_msg", [{"type": "text", "data": {"text": "插件D"}}]),
+        ("send_msg", [{"type": "record", "data": {"file": "https://example.com/a.amr"}}]),
+    ], actions
+    assert [r["message_id"] for r in results] == ["1", "1", "1", "1", "2", "3", "4"]
+    assert not adapter._send_batches
+
+    # 吞吐：每个事件触发 5 条短消息，分布在 20 个群
+    rounds = 20
+    for label, window in (("不合并", 0), ("合并窗口 5ms", 5)):
+        adapter = make_adapter(send_coalesce_ms=window)
+        connection = RecordingConnection(adapter, "default")
+        adapter.connections["default"] = connection
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await asyncio.gather(*(
+                adapter.Send.To("group", g).Text(f"插件{p}")
+                for g in range(20) for p in range(5)
+            ))
+        elapsed = time.perf_counter() - start
+        print(
+            f"  {label}: {rounds * 100} 条消息 → {len(connection.requests)} 次 send_msg, "
+            f"耗时 {elapsed:.2f}s"
+        )
+
+
+async def bench_batch(config: BenchConfig):
+    """批量发送：同一消息发往大量目标（真实 WebSocket 连接到本地替身服务）"""
+    server = FakeOneBotServer()
+    await server.start()
+    n = config.batch_targets
+    targets = list(range(100000, 100000 + n))
+    message = [
+        {"type": "text", "data": {"text": "【公告】今晚 22:00 至 23:00 进行维护，期间服务暂停。" * 4}},
+        {"type": "image", "data": {"file": "https://example.com/notice.png"}},
+    ]
+
+    adapter = await connect_client_adapter(server)
+    try:
+        send = adapter.Send.To("group", 0)
+
+        # 逐个通过 Raw_ob12 发送（每个目标各自转换、编码一次）
+        server.requests = 0
+        start = time.perf_counter()
+        await asyncio.gather(*(adapter.Send.To("group", t).Raw_ob12(message) for t in targets))
+        naive = time.perf_counter() - start
+
+        server.requests, server.targets = 0, []
+        start = time.perf_counter()
+        results = await send.Batch(targets, message, concurrency=64)
+        batched = time.perf_counter() - start
+        assert len(results) == n and all(r["status"] == "ok" for r in results)
+        assert sorted(server.targets) == targets and server.requests == n
+
+        # bytes 媒体与本地文件：批次开始前只处理一次，各目标共用
+        # （实现端在本机，本地文件以 file:// 路径传递；bytes 媒体编码为 base64://）
+        image = random.randbytes(64 * 1024)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "notice.png"
+            path.write_bytes(random.randbytes(64 * 1024))
+            expected = {"base64://" + base64.b64encode(image).decode(), path.resolve().as_uri()}
+            media_message = [
+                message[0],
+                {"type": "image", "data": {"file": image}},
+                {"type": "image", "data": {"file": path}},
+            ]
+            media_targets = targets[:500]
+            server.requests, server.targets, server.files = 0, [], []
+            misses = adapter.media.cache.misses
+            start = time.perf_counter()
+            results = await send.Batch(media_targets, media_message, concurrency=64)
+            media_batched = time.perf_counter() - start
+        assert all(r["status"] == "ok" for r in results)
+        assert sorted(server.targets) == media_targets
+        assert set(server.files) == expected and len(server.files) == 1000
+        assert adapter.media.cache.misses - misses == 1
+
+        # 异步迭代 + 批次限速
+        done = 0
+        start = time.perf_counter()
+        async for target_id, result in send.Batch(targets[:200], message, rate=1000):
+            assert result["status"] == "ok"
+            done += 1
+        paced = time.perf_counter() - start
+        assert done == 200 and paced >= 0.15
+
+        print(
+            f"  {n} 个目标: Batch {batched:.2f}s ({n / batched:.0f} 条/秒), "
+            f"逐个 Raw_ob12 {naive:.2f}s ({n / naive:.0f} 条/秒)"
+        )
+        print(f"  含 2 个 64KB bytes/本地文件媒体发往 500 个目标: Batch {media_batched:.2f}s (bytes 媒体编码 1 次)")
+        print(f"  限速 1000 条/秒迭代 200 个目标: {paced:.2f}s")
+    finally:
+        await adapter.shutdown()
+        await server.stop()
+
+
+class MediaSinkSocket(FakeSocket):
+    """接收大帧的模拟连接：只从帧尾取出 echo，不解析整帧，避免替身本身阻塞事件循环"""
+
+    def __init__(self, adapter: OneBotAdapter):
+        super().__init__(adapter)
+        self.frame_sizes: List[int] = []
+
+    async def send_frame(self, data: bytes, opcode):
+        self.frame_sizes.append(len(data))
+        tail = data[data.rfind(b'"echo":'):]
+        echo = json.loads(b"{" + tail)["echo"]
+        self.feed({"status": "ok", "retcode": 0, "data": None, "echo": echo})
+
+
+async def _send_media_under_load(adapter: OneBotAdapter, send) -> Dict[str, float]:
+    """持续推送事件的同时执行 send()，返回发送耗时、事件循环最长停顿与事件最大延迟"""
+    socket = MediaSinkSocket(adapter)
+    adapter.connections["default"] = socket
+    fed_at: Dict[int, float] = {}
+    event_latency = [0.0]
+
+    async def emit(event):
+        raw = event["onebot11_raw"]
+        event_latency[0] = max(event_latency[0], time.perf_counter() - fed_at[raw["message_id"]])
+
+    adapter.adapter.emit = emit
+    listener = asyncio.create_task(adapter._listen("default"))
+    running = True
+    max_gap = [0.0]
+
+    async def produce():
+        seq = 0
+        last = time.perf_counter()
+        while running:
+            now = time.perf_counter()
+            max_gap[0] = max(max_gap[0], now - last)
+            last = now
+            seq += 1
+            fed_at[seq] = now
+            socket.feed(make_group_message(seq))
+            await asyncio.sleep(0.001)
+
+    producer = asyncio.create_task(produce())
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    result = await send()
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.05)
+    running = False
+    await producer
+    await socket.close()
+    await listener
+    await adapter.shutdown()
+    assert result["status"] == "ok", result
+    return {"elapsed": elapsed, "max_gap": max_gap[0], "event_latency": event_latency[0]}
+
+
+async def bench_media(config: BenchConfig):
+    """bytes 媒体发送：发送大视频期间事件处理不停顿"""
+    video = bytes(range(256)) * (config.media_mb * 4096)
+
+    # 编码结果与标准库一致
+    adapter = make_adapter()
+    prepared = await adapter.media.prepare(
+        adapter.codec, "send_msg",
+        {"message_type": "group", "group_id": 1, "message": [
+            {"type": "video", "data": {"file": video[:1000003]}},
+            {"type": "text", "data": {"text": "说明"}},
+        ]},
+    )
+    request = json.loads(prepared.template.render(None, "ob11:1"))
+    assert request["params"]["message"][0]["data"]["file"] == (
+        "base64://" + base64.b64encode(video[:1000003]).decode()
+    )
+
+    def caller_encoded(adapter):
+        # 对照组：调用方自行编码为 base64 字符串，再整体经过 JSON 序列化
+        encoded = "base64://" + base64.b64encode(video).decode()
+        return adapter.Send.To("group", 1).Video(encoded)
+
+    variants = (
+        ("调用方编码 + JSON", {}, caller_encoded),
+        ("适配器编码（事件循环内）", {"threshold": len(video) + 1},
+         lambda adapter: adapter.Send.To("group", 1).Video(video)),
+        ("适配器编码（线程池）", {}, lambda adapter: adapter.Send.To("group", 1).Video(video)),
+    )
+    for label, media_config, send in variants:
+        adapter = make_adapter()
+        for key, value in media_config.items():
+            setattr(adapter.media, key, value)
+        result = await _send_media_under_load(adapter, lambda: send(adapter))
+        print(
+            f"  {label}: 发送 {config.media_mb}MB 耗时 {result['elapsed'] * 1000:.0f}ms, "
+            f"事件循环最长停顿 {result['max_gap'] * 1000:.1f}ms, "
+            f"事件最大延迟 {result['event_latency'] * 1000:.1f}ms"
+        )
+
+
+class MediaImplConnection(FakeConnection):
+    """
+    模拟保存收到图片的实现端：get_msg 返回的图片 file 字段可在之后的发送中直接引用
+
+    reject_refs 为 True 时模拟缓存被清理，所有引用都会发送失败；
+    drop_lookups 为 True 时 get_msg 永不响应。
+    """
+
+    def __init__(self, adapter: OneBotAdapter, account_name: str):
+        super().__init__(adapter, account_name)
+        self.bytes_received = 0
+        self.requests: List[str] = []
+        self.reject_refs = False
+        self.drop_sends = False
+        self.drop_lookups = False
+        self._messages: Dict[int, List[Dict]] = {}
+
+    async def send_str(self, data: str):
+        self.bytes_received += len(data)
+        request = self.adapter.codec.loads(data)
+        self.requests.append(request["action"])
+        params, retcode, result = request["params"], 0, None
+        if request["action"] == "send_msg":
+            message = params["message"]
+            if self.drop_sends:
+                return
+            if self.reject_refs and any(
+                not seg["data"]["file"].startswith("base64://")
+                for seg in message if seg["type"] == "image"
+            ):
+                retcode = 100
+            else:
+                message_id = len(self._messages) + 1
+                self._messages[message_id] = message
+                result = {"message_id": message_id}
+        elif request["action"] == "get_msg":
+            if self.drop_lookups:
+                return
+            message = [
+                {"type": "image", "data": {
+                    "file": f"{self.adapter.media.cache.digest(seg['data']['file'].encode())}.image"
+                }}
+                if seg["type"] == "image" else seg
+                for seg in self._messages[params["message_id"]]
+            ]
+            result = {"message_id": params["message_id"], "message": message}
+        response = {"status": "ok" if retcode == 0 else "failed", "retcode": retcode,
+                    "data": result, "echo": request["echo"]}
+        asyncio.get_running_loop().call_soon(self._deliver, response)
+
+
+async def bench_media_cache(config: BenchConfig):
+    """媒体缓存：重复发送同一图片时复用实现端的文件引用，不再传输内容"""
+    sticker = bytes(range(256)) * 800  # 200KB
+    n = config.media_cache_sends
+
+    for label, enabled in (("关闭缓存", False), ("开启缓存", True)):
+        adapter = make_adapter()
+        if not enabled:
+            adapter.media.cache = None
+        connection = MediaImplConnection(adapter, "default")
+        adapter.connections["default"] = connection
+        send = adapter.Send.To("group", 1)
+        start = time.perf_counter()
+        for _ in range(n):
+            result = await send.Image(sticker)
+            assert result["status"] == "ok"
+            await asyncio.sleep(0)  # 让后台的引用查询完成
+        elapsed = time.perf_counter() - start
+        print(
+            f"  {label}: {n} 次发送共传输 {connection.bytes_received / 1024 / 1024:.1f}MB, "
+            f"耗时 {elapsed * 1000:.0f}ms, 统计 {adapter.media_stats()}"
+        )
+        if not enabled:
+            await adapter.shutdown()
+
+    stats = adapter.media_stats()
+    # 引用查询在后台进行，查询返回前的几次发送复用已编码数据；同一内容只查询一次
+    assert stats["misses"] == 1 and stats["hits"] >= n - 5, stats
+    assert stats["hits"] + stats["encoded_hits"] == n - 1, stats
+    assert connection.requests.count("get_msg") == 1
+
+    # 本地超时：请求可能已被实现端执行，不作废引用也不重发
+    connection.drop_sends = True
+    sends = connection.requests.count("send_msg")
+    result = await adapter.call_api(
+        "send_msg", message_type="group", group_id=1,
+        message=[{"type": "image", "data": {"file": sticker}}], _timeout=0.05,
+    )
+    assert result["retcode"] == 33001 and connection.requests.count("send_msg") == sends + 1
+    assert adapter.media_stats()["stale"] == 0
+    connection.drop_sends = False
+
+    # 引用失效：作废后完整重发，不再重复学习
+    connection.reject_refs = True
+    result = await adapter.Send.To("group", 1).Image(sticker)
+    assert result["status"] == "ok" and adapter.media_stats()["stale"] == 1
+    result = await adapter.Send.To("group", 1).Image(sticker)
+    assert result["status"] == "ok" and connection.requests.count("get_msg") == 1
+    print(f"  引用失效后回退完整发送: 统计 {adapter.media_stats()}")
+    await adapter.shutdown()
+
+    # 关闭时取消仍在进行的引用查询，不留下游离任务
+    adapter = make_adapter()
+    connection = MediaImplConnection(adapter, "default")
+    connection.drop_lookups = True
+    adapter.connections["default"] = connection
+    for _ in range(2):  # 第二次发送同一内容时开始查询引用
+        assert (await adapter.Send.To("group", 1).Image(sticker))["status"] == "ok"
+    lookups = list(adapter._background_tasks)
+    assert len(lookups) == 1 and not lookups[0].done()
+    await adapter.shutdown()
+    assert lookups[0].cancelled() and not adapter._background_tasks
+    print("  关闭时取消未完成的引用查询: 1 个")
+
+    # 按条目数与编码数据大小淘汰
+    cache = MediaCache(max_entries=10, max_bytes=1024 * 1024)
+    for i in range(20):
+        digest = cache.digest(bytes([i]) * 100)
+        cache.lookup(digest)
+        cache.store_encoded(digest, [b"x" * 200 * 1024])
+    assert len(cache) <= 10 and cache.stats["bytes"] <= 1024 * 1024, cache.stats
+    print(f"  淘汰: 20 个内容写入后 {cache.stats}")
+
+
+class FrameCaptureSocket(MediaSinkSocket):
+    """保留最近一次发出的请求帧"""
+
+    def __init__(self, adapter: OneBotAdapter):
+        super().__init__(adapter)
+        self.last_frame = b""
+
+    async def send_frame(self, data: bytes, opcode):
+        self.last_frame = data
+        await super().send_frame(data, opcode)
+
+
+async def _send_with_socket(adapter: OneBotAdapter, send) -> FrameCaptureSocket:
+    """通过读取循环收发一次请求，返回记录了请求帧的连接"""
+    socket = FrameCaptureSocket(adapter)
+    adapter.connections["default"] = socket
+    listener = asyncio.create_task(adapter._listen("default"))
+    try:
+        result = await send()
+        assert result["status"] == "ok", result
+    finally:
+        await socket.close()
+        await listener
+    return socket
+
+
+async def bench_local_file(config: BenchConfig):
+    """本地文件发送：同机直通路径，异机映射文件编码，不在内存中整体复制文件"""
+    size = config.local_file_mb * 1024 * 1024
+    headers = {
+        "image": b"\x89PNG\r\n\x1a\n",
+        "video": b"\x00\x00\x00\x18ftypmp42",
+        "record": b"ID3\x03",
+        "file": b"plain data",
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "clip.mp4"
+        with open(path, "wb") as f:
+            f.write(headers["video"])
+            chunk = bytes(range(256)) * 4096
+            for _ in range(size // len(chunk)):
+                f.write(chunk)
+
+        # 实现端在本机：只传路径
+        adapter = make_adapter(local_file_passthrough=True)
+        socket = await _send_with_socket(
+            adapter, lambda: adapter.Send.To("group", 1).Video(path.as_uri())
+        )
+        request = json.loads(socket.last_frame)
+        assert request["params"]["message"][0]["data"]["file"] == path.resolve().as_uri()
+        print(f"  同机直通: 请求帧 {len(socket.last_frame)} 字节")
+        await adapter.shutdown()
+
+        # 实现端在其他主机：与先读入 bytes 再发送的请求帧一致，但不持有文件副本
+        frames = {}
+        for label, make_file in (
+            ("读入 bytes", lambda: path.read_bytes()),
+            ("Path", lambda: path),
+        ):
+            adapter = make_adapter(local_file_passthrough=False)
+            adapter.media.cache = None
+            adapter.uploader.threshold = 0
+            gc.collect()
+            tracemalloc.start()
+            start = time.perf_counter()
+            socket = await _send_with_socket(
+                adapter, lambda: adapter.Send.To("group", 1).Video(make_file(), filename=path.name)
+            )
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            frame = socket.last_frame
+            frames[label] = hashlib.blake2b(frame[:frame.rfind(b'"echo":')]).hexdigest()
+            del socket
+            print(
+                f"  异机 {label}: 发送 {config.local_file_mb}MB 耗时 {elapsed * 1000:.0f}ms, "
+                f"Python 内存峰值 {peak / 1024 / 1024:.1f}MB"
+            )
+            await adapter.shutdown()
+        assert len(set(frames.values())) == 1, "请求帧不一致"
+
+        # File() 按文件头自动选择消息段类型
+        adapter = make_adapter(local_file_passthrough=True)
+        send = adapter.Send.To("group", 1)
+        for expected, header in headers.items():
+            sample = Path(tmp) / f"sample_{expected}"
+            sample.write_bytes(header + bytes(300))
+            assert send._get_msg_type_by_filetype(sample) == expected, expected
+            assert send._get_msg_type_by_filetype(sample.read_bytes()) == expected, expected
+            socket = await _send_with_socket(adapter, lambda: send.File(sample))
+            segment = json.loads(socket.last_frame)["params"]["message"][0]
+            assert segment["type"] == expected, segment
+        print(f"  File() 类型识别: {', '.join(headers)} 均正确")
+        await adapter.shutdown()
+
+
+class UploadServer(FakeOneBotServer):
+    """
+    支持 upload_file_stream 的实现端替身
+
+    分块按序号依次计入哈希，不保存文件内容；超大的单帧请求只从帧尾取出 echo，
+    避免替身与适配器同在一个事件循环时解析大帧造成额外停顿。
+    """
+
+    def __init__(self, supported: bool = True):
+        super().__init__()
+        self.supported = supported
+        self.actions: List[str] = []
+        self.largest_frame = 0
+        self.uploaded: Dict[str, str] = {}  # 文件路径 -> sha256
+        self.uploaded_names: List[str] = []
+        self.last_message: List[Dict] = []
+        self._streams: Dict[str, Dict[str, Any]] = {}
+
+    def _upload(self, params: Dict) -> Dict:
+        if params["stream_id"] not in self._streams and not params.get("is_complete"):
+            self.uploaded_names.append(params["filename"])
+        stream = self._streams.setdefault(
+            params["stream_id"], {"hash": hashlib.sha256(), "next": 0, "chunks": {}}
+        )
+        if params.get("is_complete"):
+            del self._streams[params["stream_id"]]
+            path = f"/var/onebot/upload/{params['stream_id']}"
+            self.uploaded[path] = stream["hash"].hexdigest()
+            return {"status": "file_complete", "file_path": path}
+        stream["chunks"][params["chunk_index"]] = base64.b64decode(params["chunk_data"])
+        while stream["next"] in stream["chunks"]:
+            stream["hash"].update(stream["chunks"].pop(stream["next"]))
+            stream["next"] += 1
+        return {"status": "chunk_received", "received_chunks": stream["next"]}
+
+    async def _handler(self, request):
+        ws = await self._accept(request, max_msg_size=0)
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                continue
+            self.largest_frame = max(self.largest_frame, len(msg.data))
+            if len(msg.data) > 1024 * 1024 and '"upload_file_stream"' not in msg.data[:100]:
+                tail = msg.data[msg.data.rfind('"echo":'):]
+                data = {"action": "send_msg", "params": {}, **json.loads("{" + tail)}
+            else:
+                data = json.loads(msg.data)
+            action = data["action"]
+            self.actions.append(action)
+            retcode, result = 0, None
+            if action == "upload_file_stream":
+                if self.supported:
+                    result = self._upload(data["params"])
+                else:
+                    retcode = 1404
+            elif action == "send_msg":
+                self.last_message = data["params"].get("message", [])
+                result = {"message_id": len(self.actions)}
+            await ws.send_str(json.dumps({
+                "status": "ok" if retcode == 0 else "failed", "retcode": retcode,
+                "data": result, "echo": data["echo"],
+            }))
+        return ws
+
+
+async def bench_upload(config: BenchConfig):
+    """分块上传：发送大文件期间同一连接上的其他 API 调用照常往返"""
+    size = config.upload_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "record.mp4"
+        with open(path, "wb") as f:
+            chunk = bytes(range(256)) * 4096
+            for _ in range(size // len(chunk)):
+                f.write(chunk)
+        expected = hashlib.sha256(path.read_bytes()).hexdigest()
+
+        for label, threshold in (("单帧发送", 0), ("分块上传", 1024 * 1024)):
+            server = UploadServer()
+            await server.start()
+            adapter = await connect_client_adapter(server, local_file_passthrough=False)
+            adapter.uploader.threshold = threshold
+            adapter.media.cache = None
+            progress: List[int] = []
+            latencies: List[float] = []
+            try:
+                sending = True
+
+                async def ping():
+                    while sending:
+                        start = time.perf_counter()
+                        result = await adapter.call_api("get_status")
+                        assert result["status"] == "ok"
+                        latencies.append(time.perf_counter() - start)
+                        await asyncio.sleep(0.005)
+
+                pinger = asyncio.create_task(ping())
+                await asyncio.sleep(0.05)
+                gc.collect()
+                tracemalloc.start()
+                start = time.perf_counter()
+                result = await adapter.Send.To("group", 1).Video(
+                    path, progress=lambda done, total: progress.append(done)
+                )
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                sending = False
+                await pinger
+                assert result["status"] == "ok", result
+                print(
+                    f"  {label}: {config.upload_mb}MB 耗时 {elapsed:.2f}s, 最大帧 "
+                    f"{server.largest_frame / 1024 / 1024:.1f}MB, 其间 {len(latencies)} 次 API 调用, "
+                    f"最大延迟 {max(latencies) * 1000:.0f}ms, 进程内存峰值 {peak / 1024 / 1024:.0f}MB"
+                )
+                if threshold:
+                    file = server.last_message[0]["data"]["file"]
+                    assert server.uploaded[file[len("file://"):]] == expected
+                    assert progress[-1] == size and progress == sorted(progress)
+                    # 上传的文件名：本地文件取文件名，bytes 取调用方传入的文件名
+                    clip = bytes(range(256)) * 8192
+                    result = await adapter.Send.To("group", 1).Video(clip, filename="clip.mp4")
+                    assert result["status"] == "ok", result
+                    assert server.uploaded_names == ["record.mp4", "clip.mp4"], server.uploaded_names
+                    print(f"  进度回调 {len(progress)} 次, 上传文件名 {server.uploaded_names}, 统计 {adapter.upload_stats()}")
+            finally:
+                await adapter.shutdown()
+                await server.stop()
+
+        # 实现端不支持时回退为单帧发送，且只尝试一次
+        server = UploadServer(supported=False)
+        await server.start()
+        adapter = await connect_client_adapter(server, local_file_passthrough=False)
+        adapter.uploader.threshold = 1024
+        try:
+            small = Path(tmp) / "small.bin"
+            small.write_bytes(bytes(4096))
+            for _ in range(2):
+                result = await adapter.Send.To("group", 1).File(small)
+                assert result["status"] == "ok", result
+            assert server.actions == ["upload_file_stream", "send_msg", "send_msg"], server.actions
+            print("  实现端不支持时: 回退为单帧发送，之后不再尝试")
+        finally:
+            await adapter.shutdown()
+            await server.stop()
+
+
+class FlappingServer(FakeOneBotServer):
+    """握手成功后立即关闭连接的实现端替身（模拟鉴权失败或反复崩溃）"""
+
+    async def _handler(self, request):
+        ws = await self._accept(request)
+        await ws.close()
+        return ws
+
+
+async def bench_reconnect(config: BenchConfig):
+    """断线重连：实现端快速重启后的恢复时间、退避与熔断、大量账户重连时错开"""
+    # 实现端重启 300ms 后恢复（连接建立即算稳定，只看重启后的恢复速度）
+    server = FakeOneBotServer()
+    await server.start()
+    adapter = await connect_client_adapter(server, reconnect_stable_after=0)
+    try:
+        for _ in range(3):
+            await server.stop()
+            await asyncio.sleep(0.3)
+            await server.start()
+            while not adapter.connection_stats()["default"]["connected"] or "default" not in adapter.connections:
+                await asyncio.sleep(0.005)
+            result = await adapter.call_api("get_status")
+            assert result["status"] == "ok"
+        stats = adapter.connection_stats()["default"]
+        assert stats["reconnects"] == 3 and stats["circuit"] == "closed", stats
+        print(
+            f"  实现端重启 300ms: 断线 {stats['last_downtime_ms']:.0f}ms 后恢复"
+            f"（原实现固定等待 30s 后重试）, 统计 {stats}"
+        )
+    finally:
+        await adapter.shutdown()
+        await server.stop()
+
+    # 退避与熔断：实现端持续不可用
+    server = FakeOneBotServer()
+    await server.start()
+    adapter = await connect_client_adapter(
+        server, circuit_failure_threshold=6, circuit_open_seconds=0.5, reconnect_stable_after=0
+    )
+    try:
+        supervisor = adapter.supervisors["default"]
+        attempts: List[float] = []
+        record_attempt = supervisor.record_attempt
+
+        def timed_attempt():
+            attempts.append(time.perf_counter())
+            record_attempt()
+
+        supervisor.record_attempt = timed_attempt
+        down_at = time.perf_counter()
+        await server.stop()
+        while supervisor.state != "open":
+            await asyncio.sleep(0.005)
+        opened_at = time.perf_counter()
+        gaps = [b - a for a, b in zip([down_at] + attempts, attempts)]
+        assert gaps[0] < 0.05, gaps  # 断线后立即重连
+        assert all(b > a for a, b in zip(gaps[1:], gaps[2:])), gaps  # 间隔递增
+        print(
+            f"  持续不可用: 重连间隔 {', '.join(f'{g * 1000:.0f}ms' for g in gaps)}，"
+            f"第 {len(attempts)} 次失败后熔断"
+        )
+        await server.start()
+        while not supervisor.connected.is_set():
+            await asyncio.sleep(0.005)
+        recovered = time.perf_counter() - opened_at
+        assert 0.45 <= recovered < 1.0 and supervisor.state == "closed", recovered
+        print(f"  熔断冷却 0.5s 后试探连接成功（{recovered * 1000:.0f}ms）, 状态 {supervisor.state}")
+    finally:
+        await adapter.shutdown()
+        await server.stop()
+
+    # 接受连接后立即关闭的实现端（鉴权失败、崩溃循环）：握手成功也按失败退避并熔断
+    server = FlappingServer()
+    await server.start()
+    for label, stable_after in (("握手成功即算稳定", 0), ("保持 1s 才算稳定", 1.0)):
+        server.connected_at.clear()
+        adapter = await connect_client_adapter(
+            server, circuit_failure_threshold=3, circuit_open_seconds=5.0,
+            reconnect_stable_after=stable_after,
+        )
+        await asyncio.sleep(1.5)
+        stats = adapter.connection_stats()["default"]
+        await adapter.shutdown()
+        print(f"  立即断开的实现端（{label}）: 1.5s 内连接 {len(server.connected_at)} 次，熔断状态 {stats['circuit']}")
+        if stable_after:
+            assert len(server.connected_at) <= 4 and stats["circuit"] == "open", stats
+        else:
+            assert len(server.connected_at) > 10, len(server.connected_at)
+    await server.stop()
+
+    # connect() 不会无限等待：未运行或账户已禁用时直接返回，监管任务先结束时抛出 ConnectionError
+    adapter = OneBotAdapter(_StubSDK({
+        "default": {"bot_id": "10000", "mode": "client", "client_url": "ws://127.0.0.1:1/"}
+    }))
+    await asyncio.wait_for(adapter.connect("default"), 1.0)
+    adapter._is_running = True
+    adapter.accounts["default"].enabled = False
+    await asyncio.wait_for(adapter.connect("default"), 1.0)
+    adapter.accounts["default"].enabled = True
+    waiting = asyncio.create_task(adapter.connect("default"))
+    await asyncio.sleep(0.1)
+    await adapter.shutdown()
+    try:
+        await asyncio.wait_for(waiting, 1.0)
+        raise AssertionError("监管任务结束后 connect() 应当抛出 ConnectionError")
+    except ConnectionError:
+        pass
+    print("  未运行/账户禁用时 connect() 直接返回，关闭适配器时等待中的 connect() 抛出 ConnectionError")
+
+    # 大量账户同时重连：发起连接的时间被错开
+    names = [f"bot{i}" for i in range(50)]
+    for label, rate in (("不限", 1e9), ("每秒 100 个", 100.0)):
+        server = FakeOneBotServer()
+        await server.start()
+        adapter = OneBotAdapter(_StubSDK({
+            name: {"bot_id": str(10000 + i), "mode": "client", "client_url": server.url}
+            for i, name in enumerate(names)
+        }))
+        adapter._connect_gate = TokenBucket(rate, 5, time.monotonic())
+        adapter._is_running = True
+        try:
+            await asyncio.gather(*(adapter.connect(name) for name in names))
+            server.connected_at.clear()
+            await server.stop()
+            await server.start()
+            while len(server.connected_at) < len(names):
+                await asyncio.sleep(0.005)
+            spread = max(server.connected_at) - min(server.connected_at)
+            print(f"  50 个账户同时断线，重连节奏{label}: 连接在 {spread * 1000:.0f}ms 内陆续到达")
+        finally:
+            await adapter.shutdown()
+            await server.stop()
+
+
+class HeartbeatServer(FakeOneBotServer):
+    """
+    按固定间隔发送心跳、响应带固定延迟的实现端替身
+
+    silence() 之后当前连接既不发心跳也不回复请求，但 TCP 连接保持打开，模拟半开连接；
+    之后新建立的连接照常工作。
+    """
+
+    def __init__(self, interval_ms: int = 100, latency: float = 0.002):
+        super().__init__()
+        self.interval_ms = interval_ms
+        self.latency = latency
+        self._sockets: List[web.WebSocketResponse] = []
+        self._silenced: set = set()
+
+    def silence(self):
+        self._silenced.update(id(ws) for ws in self._sockets)
+
+    async def _heartbeat(self, ws: web.WebSocketResponse):
+        while not ws.closed:
+            if id(ws) not in self._silenced:
+                await ws.send_str(json.dumps({
+                    "time": int(time.time()), "self_id": 10000, "post_type": "meta_event",
+                    "meta_event_type": "heartbeat", "status": {"online": True, "good": True},
+                    "interval": self.interval_ms,
+                }))
+            await asyncio.sleep(self.interval_ms / 1000)
+
+    async def _reply(self, ws: web.WebSocketResponse, echo: Any):
+        await asyncio.sleep(self.latency)
+        if id(ws) not in self._silenced and not ws.closed:
+            await ws.send_str(json.dumps({"status": "ok", "retcode": 0, "data": {}, "echo": echo}))
+
+    async def _handler(self, request):
+        ws = await self._accept(request)
+        self._sockets.append(ws)
+        heartbeat = asyncio.create_task(self._heartbeat(ws))
+        try:
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    data = json.loads(msg.data)
+                    self.requests += 1
+                    self.targets.append(data.get("params", {}).get("group_id"))
+                    asyncio.create_task(self._reply(ws, data["echo"]))
+        finally:
+            heartbeat.cancel()
+        return ws
+
+
+async def bench_liveness(config: BenchConfig):
+    """半开连接：心跳超时后等待中的调用立即失败并重连，探测得到往返延迟"""
+    # 对照组：不检测存活，等待中的调用只能各自超时
+    server = HeartbeatServer()
+    await server.start()
+    adapter = await connect_client_adapter(server, heartbeat_timeout_factor=0, probe_interval=0)
+    adapter.default_timeout = 1.5
+    try:
+        await asyncio.sleep(0.3)
+        server.silence()
+        start = time.perf_counter()
+        results = await asyncio.gather(*(adapter.call_api("get_status") for _ in range(20)))
+        waited = time.perf_counter() - start
+        assert all(r["retcode"] == 33001 for r in results)
+        print(
+            f"  不检测存活: 20 个调用在半开连接上等待 {waited * 1000:.0f}ms 后超时（默认超时 30s），"
+            f"连接仍被视为可用: {'default' in adapter.connections}"
+        )
+    finally:
+        await adapter.shutdown()
+        await server.stop()
+
+    server = HeartbeatServer(interval_ms=100, latency=0.002)
+    await server.start()
+    adapter = await connect_client_adapter(server, probe_interval=0.1, probe_timeout=0.5)
+    try:
+        await asyncio.sleep(1.0)
+        stats = adapter.liveness_stats()["default"]
+        assert stats["alive"] and stats["heartbeats"] >= 5 and stats["probes"] >= 5, stats
+        print(
+            f"  心跳间隔 {stats['heartbeat_interval_ms']:.0f}ms，{stats['probes']} 次探测: "
+            f"往返延迟 {stats['rtt_ms']:.2f}ms ± {stats['rtt_var_ms']:.2f}ms"
+            f"（最小 {stats['rtt_min_ms']:.2f}ms，实现端处理 2ms）"
+        )
+
+        server.silence()
+        silenced_at = time.perf_counter()
+        calls = [
+            asyncio.create_task(adapter.call_api("get_status", _replay=False)) for _ in range(20)
+        ]
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        failed_at = time.perf_counter()
+        assert all(isinstance(r, ConnectionError) for r in results), results
+        while "default" not in adapter.connections:
+            await asyncio.sleep(0.005)
+        reconnected_at = time.perf_counter()
+        result = await adapter.call_api("get_status")
+        assert result["status"] == "ok" and len(server.connected_at) == 2
+        print(
+            f"  半开连接（心跳超时 3 × 100ms）: {(failed_at - silenced_at) * 1000:.0f}ms 后 "
+            f"20 个等待中的调用以 ConnectionError 结束，"
+            f"{(reconnected_at - silenced_at) * 1000:.0f}ms 后重连成功"
+        )
+    finally:
+        await adapter.shutdown()
+        await server.stop()
+
+
+async def bench_replay(config: BenchConfig):
+    """断线：等待中的调用立即失败，可重放的调用在重连后按序发出"""
+    server = HeartbeatServer(latency=5.0)
+    await server.start()
+    adapter = await connect_client_adapter(server, replay_queue_size=64, replay_max_wait=5.0)
+    try:
+        # 实现端迟迟不回复时断线：不可重放的调用立即失败，可重放的调用等待重连后重新发送
+        sends = [
+            asyncio.create_task(adapter.call_api("send_msg", group_id=i, message="x"))
+            for i in range(20)
+        ]
+        reads = [asyncio.create_task(adapter.call_api("get_status")) for _ in range(20)]
+        await asyncio.sleep(0.05)
+        down_at = time.perf_counter()
+        await server.stop()
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        failed = time.perf_counter() - down_at
+        assert all(isinstance(r, ConnectionLostError) for r in results), results
+        print(
+            f"  断线: 20 个等待响应的 send_msg 在 {failed * 1000:.1f}ms 后以 ConnectionLostError 结束"
+            f"（原实现等待 30s 超时）"
+        )
+
+        # 断线期间：只读 API 与显式 _replay=True 的调用暂存，其他调用立即失败
+        server.latency = 0.001
+        server.targets.clear()
+        ordered = [
+            asyncio.create_task(adapter.call_api("send_msg", group_id=i, message="x", _replay=True))
+            for i in range(1, 31)
+        ]
+        await asyncio.sleep(0.01)
+        try:
+            await adapter.call_api("send_msg", group_id=999, message="x")
+            raise AssertionError("未连接时不可重放的调用应立即失败")
+        except ConnectionError as e:
+            assert not isinstance(e, ConnectionLostError)
+        overflow = [asyncio.create_task(adapter.call_api("get_status")) for _ in range(20)]
+        await asyncio.sleep(0.01)
+        rejected = sum(t.done() and isinstance(t.exception(), ConnectionError) for t in overflow)
+        held = adapter.replay_stats()["default"]["held"]
+        assert held == 64 and rejected == 20 + 30 + 20 - 64, (held, rejected)
+
+        await asyncio.sleep(0.2)
+        await server.start()
+        await asyncio.gather(*overflow, return_exceptions=True)
+        results = await asyncio.gather(*reads, *ordered)
+        assert all(r["status"] == "ok" for r in results)
+        sent = [t for t in server.targets if t is not None]
+        assert sent == list(range(1, 31)), sent
+        stats = adapter.replay_stats()["default"]
+        print(
+            f"  重连后: 断线时在途的 20 个 get_status 与断线期间的 30 个 send_msg(_replay=True) 全部成功，"
+            f"send_msg 按调用顺序送达; 暂存上限 64 时另外 {rejected} 个调用被拒绝（暂存 {held} 个）, 统计 {stats}"
+        )
+    finally:
+        await adapter.shutdown()
+        await server.stop()
+
+
+class HoldingConnection(FakeConnection):
+    """只记录请求、不回复的模拟连接，由测试按需投递响应"""
+
+    def __init__(self, adapter: OneBotAdapter, account_name: str):
+        super().__init__(adapter, account_name)
+        self.echoes: List[str] = []
+
+    async def send_str(self, data: str):
+        self.sent += 1
+        self.echoes.append(self.adapter.codec.loads(data)["echo"])
+
+    def reply_all(self):
+        for echo in self.echoes:
+            self._deliver({"status": "ok", "retcode": 0, "data": None, "echo": echo})
+        self.echoes.clear()
+
+
+async def _park_calls(n: int, shared: bool, trace: bool = False) -> Dict[str, float]:
+    """n 个等待响应的调用：每个调用各自 wait_for，或共用等待表的定时器"""
+    loop = asyncio.get_running_loop()
+    pending = PendingCalls()
+    echoes: List[str] = []
+
+    async def call():
+        if shared:
+            echo, future = pending.create(30)
+            echoes.append(echo)
+            await future
+        else:
+            echo, future = pending.create()
+            echoes.append(echo)
+            await asyncio.wait_for(future, 30)
+
+    gc.collect()
+    # 之前的用例可能在事件循环中留有定时器，只统计本次新增的
+    baseline = len(loop._scheduled)
+    if trace:
+        tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(call()) for _ in range(n)]
+    while len(echoes) < n:
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    parked = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0] - before if trace else 0
+    timers = len(loop._scheduled) - baseline
+
+    start = time.perf_counter()
+    for echo in echoes:
+        pending.resolve(echo, {})
+    await asyncio.gather(*tasks)
+    resolved = time.perf_counter() - start
+    if trace:
+        tracemalloc.stop()
+    return {"parked": parked, "resolved": resolved, "memory": memory, "timers": timers}
+
+
+async def bench_timeouts(config: BenchConfig):
+    """超时管理：5k 个在途调用下共用定时器与逐个 wait_for 的开销，以及截止时间的准确度"""
+    n = 5000
+    results = {}
+    for label, shared in (("逐个 wait_for", False), ("共用定时器", True)):
+        rounds = [await _park_calls(n, shared) for _ in range(5)]
+        results[label] = {k: min(r[k] for r in rounds) for k in rounds[0]}
+        results[label]["memory"] = (await _park_calls(n, shared, trace=True))["memory"]
+    for label, r in results.items():
+        print(
+            f"  {n} 个在途调用（{label}）: 发起 {r['parked'] * 1000:.1f}ms，"
+            f"全部完成 {r['resolved'] * 1000:.1f}ms，额外内存 {r['memory'] / 1024:.0f}KB，"
+            f"事件循环中的定时器 {r['timers']} 个"
+        )
+    assert results["共用定时器"]["timers"] <= 1
+
+    # 端到端：混合 API 的 5k 个在途调用，各按 API 取超时
+    adapter = make_adapter()
+    connection = adapter.connections["default"] = HoldingConnection(adapter, "default")
+    endpoints = ["send_msg", "get_group_member_list", "upload_group_file", "get_status"]
+    baseline = len(asyncio.get_running_loop()._scheduled)
+    start = time.perf_counter()
+    calls = [
+        asyncio.create_task(adapter.call_api(endpoints[i % 4], group_id=i, _replay=False))
+        for i in range(n)
+    ]
+    while len(connection.echoes) < n:
+        await asyncio.sleep(0)
+    timers = len(asyncio.get_running_loop()._scheduled) - baseline
+    connection.reply_all()
+    responses = await asyncio.gather(*calls)
+    elapsed = time.perf_counter() - start
+    assert all(r["status"] == "ok" for r in responses) and timers <= 1, timers
+    print(
+        f"  call_api 端到端: {n} 个混合 API 调用在途时定时器 {timers} 个，"
+        f"发起到全部完成 {elapsed * 1000:.0f}ms; 超时 "
+        + ", ".join(f"{e}={adapter.api_timeouts.get(e, adapter.default_timeout)}s" for e in endpoints)
+    )
+
+    # 截止时间准确度：调用方指定 _timeout，实现端不回复
+    deadlines = [random.uniform(0.05, 0.25) for _ in range(500)]
+
+    async def timed(timeout: float) -> float:
+        started = time.perf_counter()
+        response = await adapter.call_api("get_status", _timeout=timeout, _replay=False)
+        assert response["retcode"] == 33001
+        return time.perf_counter() - started - timeout
+
+    lateness = sorted(await asyncio.gather(*(timed(t) for t in deadlines)))
+    assert lateness[0] >= -0.002 and lateness[-1] < 0.05, (lateness[0], lateness[-1])
+    stats = adapter._api_response_futures["default"]
+    print(
+        f"  500 个调用方自定超时（50-250ms）: 实际超时晚于截止时间 "
+        f"p50 {lateness[len(lateness) // 2] * 1000:.2f}ms / 最大 {lateness[-1] * 1000:.2f}ms，"
+        f"超时计数 {stats.timeouts}"
+    )
+
+
+class ChannelServer(FakeOneBotServer):
+    """
+    提供 /（通用）、/api、/event 三种连接的实现端替身
+
+    flood 期间向接收事件的连接（/ 与 /event）持续推送群消息事件；
+    /api 连接按建立顺序取 api_latency 中的延迟回复请求。
+    """
+
+    def __init__(self, events_per_tick: int = 100, api_latency: Optional[List[float]] = None):
+        super().__init__()
+        self.events_per_tick = events_per_tick
+        self.api_latency = api_latency or []
+        self.flooding = False
+        self._api_sockets = 0
+
+    def _add_routes(self, app: web.Application):
+        app.router.add_get("/", self._universal)
+        app.router.add_get("/api", self._api)
+        app.router.add_get("/event", self._event)
+
+    async def _flood(self, ws: web.WebSocketResponse):
+        seq = 0
+        while not ws.closed:
+            if self.flooding:
+                for _ in range(self.events_per_tick):
+                    seq += 1
+                    await ws.send_str(json.dumps(make_group_message(seq, group_id=seq % 50)))
+            await asyncio.sleep(0.01)
+
+    async def _serve_api(self, ws: web.WebSocketResponse, latency: float):
+        async def reply(echo):
+            if latency:
+                await asyncio.sleep(latency)
+            if not ws.closed:
+                await ws.send_str(json.dumps({"status": "ok", "retcode": 0, "data": {}, "echo": echo}))
+
+        async for msg in ws:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                self.requests += 1
+                asyncio.create_task(reply(json.loads(msg.data)["echo"]))
+
+    async def _universal(self, request):
+        ws = await self._accept(request)
+        flood = asyncio.create_task(self._flood(ws))
+        try:
+            await self._serve_api(ws, 0.0)
+        finally:
+            flood.cancel()
+        return ws
+
+    async def _api(self, request):
+        ws = await self._accept(request)
+        index = self._api_sockets
+        self._api_sockets += 1
+        latency = self.api_latency[index] if index < len(self.api_latency) else 0.0
+        await self._serve_api(ws, latency)
+        return ws
+
+    async def _event(self, request):
+        ws = await self._accept(request)
+        flood = asyncio.create_task(self._flood(ws))
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            flood.cancel()
+        return ws
+
+
+async def bench_channels(config: BenchConfig):
+    """分离通道：事件积压时 API 响应不再排在事件之后，多个 API 连接按在途调用数分配"""
+
+    async def slow_emit(event):
+        # 模拟事件处理器的 CPU 开销，事件处理跟不上推送速度
+        deadline = time.perf_counter() + 0.0002
+        while time.perf_counter() < deadline:
+            pass
+        await asyncio.sleep(0)
+
+    for label, channels in (("单连接", "universal"), ("分离通道", "split")):
+        server = ChannelServer(events_per_tick=400)
+        await server.start()
+        adapter = await connect_client_adapter(
+            server, client_channels=channels, dispatch_workers=4, dispatch_queue_size=500,
+            heartbeat_timeout_factor=0, probe_interval=0,
+        )
+        adapter.adapter.emit = slow_emit
+        try:
+            server.flooding = True
+            await asyncio.sleep(0.5)
+            latencies = []
+            for _ in range(10):
+                start = time.perf_counter()
+                response = await adapter.call_api("get_status")
+                latencies.append(time.perf_counter() - start)
+                assert response["status"] == "ok"
+            latencies.sort()
+            print(
+                f"  事件积压时 get_status 延迟（{label}）: 中位 {latencies[5] * 1000:.1f}ms / "
+                f"最大 {latencies[-1] * 1000:.1f}ms"
+            )
+        finally:
+            server.flooding = False
+            await adapter.shutdown()
+            await server.stop()
+
+    # 4 个 API 连接，其中第一个响应慢
+    server = ChannelServer(api_latency=[0.02, 0.001, 0.001, 0.001])
+    await server.start()
+    adapter = await connect_client_adapter(
+        server, client_channels="split", api_pool_size=4,
+        heartbeat_timeout_factor=0, probe_interval=0,
+    )
+    try:
+        calls = 0
+        stop_at = time.perf_counter() + 0.5
+
+        async def worker():
+            nonlocal calls
+            while time.perf_counter() < stop_at:
+                response = await adapter.call_api("get_status")
+                assert response["status"] == "ok"
+                calls += 1
+
+        await asyncio.gather(*(worker() for _ in range(32)))
+        pool = adapter.connection_stats()["default"]["api_pool"]
+        requests = pool["requests"]
+        assert requests[0] < min(requests[1:]), requests
+        print(
+            f"  4 个 API 连接（第 1 个响应慢 20ms），32 个并发调用方: 0.5s 内完成 {calls} 次调用，"
+            f"各连接分得 {requests}"
+        )
+    finally:
+        await adapter.shutdown()
+        await server.stop()
+
+
+class HttpApiServer(FakeOneBotServer):
+    """
+    同时提供 HTTP API（POST /<action>）与通用 WebSocket（/）的实现端替身
+
+    记录 HTTP 请求来自多少条不同的 TCP 连接。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.peers = set()
+
+    def _add_routes(self, app: web.Application):
+        super()._add_routes(app)
+        app.router.add_post("/{action}", self._http_api)
+
+    async def _http_api(self, request: web.Request) -> web.Response:
+        params = await request.json()
+        self.requests += 1
+        self.peers.add(request.transport.get_extra_info("peername"))
+        return web.json_response({
+            "status": "ok", "retcode": 0,
+            "data": {"action": request.match_info["action"], "params": params},
+        })
+
+
+class _ConnectPerRequestTransport(HttpTransport):
+    """对照组：每次调用新建连接，不复用"""
+
+    async def post(self, url, body, token="", timeout=None):
+        self.requests += 1
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(force_close=True)
+        ) as session:
+            async with session.post(
+                url, data=body, headers={"Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as response:
+                return response.status, await response.read()
+
+
+def _post_request(path: str, body: bytes, headers: Dict[str, str]):
+    """构造一个 Starlette/FastAPI 的 POST 请求对象"""
+    from starlette.requests import Request
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+    delivered = False
+
+    async def receive():
+        nonlocal delivered
+        if delivered:
+            return {"type": "http.disconnect"}
+        delivered = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request(scope, receive)
+
+
+async def bench_http(config: BenchConfig):
+    """HTTP 模式：keep-alive 连接池（非管线化）下的 API 吞吐（对比每次新建连接与 WebSocket）与 POST 上报的接收速度"""
+    server = HttpApiServer()
+    await server.start()
+    http_url = f"http://127.0.0.1:{server.port}"
+
+    async def run_calls(adapter: OneBotAdapter) -> float:
+        calls = iter(range(config.http_calls))
+
+        async def worker():
+            for i in calls:
+                response = await adapter.call_api("get_status", seq=i)
+                assert response["status"] == "ok", response
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(config.http_concurrency)))
+        return config.http_calls / (time.perf_counter() - start)
+
+    pooled, per_request = "HTTP keep-alive 连接池（每连接一次一个请求）", "HTTP 每次新建连接"
+    try:
+        results = {}
+        for label, transport in (
+            (per_request, _ConnectPerRequestTransport()),
+            (pooled, None),
+        ):
+            adapter = OneBotAdapter(_StubSDK({
+                "default": {"bot_id": "10000", "mode": "http", "http_url": http_url}
+            }))
+            if transport is not None:
+                adapter.http = transport
+            server.peers.clear()
+            try:
+                results[label] = await run_calls(adapter)
+                print(
+                    f"  {label}: {results[label]:,.0f} 次/秒（{config.http_concurrency} 个并发调用方，"
+                    f"使用 {len(server.peers)} 条 TCP 连接）"
+                )
+            finally:
+                await adapter.shutdown()
+
+        adapter = await connect_client_adapter(
+            server, heartbeat_timeout_factor=0, probe_interval=0
+        )
+        try:
+            ws_rate = await run_calls(adapter)
+            print(f"  WebSocket 单连接: {ws_rate:,.0f} 次/秒")
+        finally:
+            await adapter.shutdown()
+        assert results[pooled] > results[per_request], results
+
+        # 不支持的 API
+        adapter = OneBotAdapter(_StubSDK({
+            "default": {"bot_id": "10000", "mode": "http", "http_url": http_url + "/missing"}
+        }))
+        try:
+            response = await adapter.call_api("get_status")
+            assert response["retcode"] == 1404, response
+        finally:
+            await adapter.shutdown()
+    finally:
+        await server.stop()
+
+    # 实现端已退出
+    adapter = OneBotAdapter(_StubSDK({
+        "default": {"bot_id": "10000", "mode": "http", "http_url": http_url}
+    }))
+    try:
+        await adapter.call_api("get_status")
+        raise AssertionError("实现端退出后调用应抛出 ConnectionError")
+    except ConnectionError:
+        pass
+    finally:
+        await adapter.shutdown()
+
+    # 事件上报：签名校验 + 解析 + 投递分发器
+    secret = "bench-secret"
+    adapter = OneBotAdapter(_StubSDK({
+        "default": {"bot_id": "10000", "mode": "http", "http_secret": secret}
+    }))
+    adapter._is_running = True
+    try:
+        bodies = [
+            json.dumps(make_group_message(i, group_id=i % 50)).encode()
+            for i in range(config.http_events)
+        ]
+        requests = [
+            _post_request("/event", body, {"X-Signature": sign(secret, body)}) for body in bodies
+        ]
+        start = time.perf_counter()
+        for request in requests:
+            response = await adapter._http_event_handler(request, "default")
+            assert response.status_code == 204
+        await adapter.dispatchers["default"].join()
+        elapsed = time.perf_counter() - start
+
+        forged = _post_request("/event", bodies[0], {"X-Signature": sign("wrong", bodies[0])})
+        unsigned = _post_request("/event", bodies[0], {})
+        assert (await adapter._http_event_handler(forged, "default")).status_code == 403
+        assert (await adapter._http_event_handler(unsigned, "default")).status_code == 403
+        events = len(adapter.adapter.events)
+        assert events == config.http_events, events
+        print(
+            f"  POST 上报（HMAC-SHA1 校验）: {config.http_events / elapsed:,.0f} 事件/秒，"
+            f"伪造与缺失签名均返回 403"
+        )
+    finally:
+        await adapter.shutdown()
+
+
+class _SlowPathAdapter(OneBotAdapter):
+    """对照组：API响应与事件一起进入分发队列，由工作协程完成Future"""
+
+    async def _route_frame(self, dispatcher, raw_msg, account_name):
+        data = self.codec.loads(raw_msg)
+        await dispatcher.put(data, self._conversation_key(data))
+
+    async def _handle_message(self, data, account_name):
+        if "post_type" not in data:
+            self._api_response_futures[account_name].resolve(data["echo"], data)
+            return
+        await super()._handle_message(data, account_name)
+
+
+async def _measure_call_latency(adapter_class, calls: int) -> List[float]:
+    adapter = make_adapter(adapter_class=adapter_class, dispatch_workers=4)
+    socket = FakeSocket(adapter)
+    adapter.connections["default"] = socket
+
+    async def slow_emit(event):
+        # 模拟事件处理器的 CPU 开销
+        deadline = time.perf_counter() + 0.00005
+        while time.perf_counter() < deadline:
+            pass
+        await asyncio.sleep(0)
+
+    adapter.adapter.emit = slow_emit
+    listener = asyncio.create_task(adapter._listen("default"))
+    running = True
+
+    async def produce():
+        seq = 0
+        while running:
+            # 未读帧过多时暂停推送，模拟 TCP 窗口填满后的背压
+            if socket.pending_frames < 64:
+                for _ in range(20):
+                    seq += 1
+                    socket.feed(make_group_message(seq, group_id=seq % 50))
+            await asyncio.sleep(0.001)
+
+    producer = asyncio.create_task(produce())
+    await asyncio.sleep(0.05)
+
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await adapter.call_api("get_status", account_id="default")
+        latencies.append(time.perf_counter() - start)
+
+    running = False
+    await producer
+    await socket.close()
+    await listener
+    await adapter.shutdown()
+    return sorted(latencies)
+
+
+async def _backpressure_calls(events: int, **account) -> Tuple[List[float], Dict]:
+    """
+    分发队列已满时，事件处理器发出的 send_msg 能否及时拿到响应
+
+    响应排在已注入的事件之后，读取循环若因队列满而停止读取，处理器只能等到超时。
+    """
+    adapter = make_adapter(dispatch_workers=1, dispatch_queue_size=2, **account)
+    socket = FakeSocket(adapter)
+    adapter.connections["default"] = socket
+    latencies: List[float] = []
+
+    async def reply(event):
+        start = time.perf_counter()
+        result = await adapter.call_api(
+            "send_msg", message_type="group", group_id=1, message="收到", _timeout=2.0
+        )
+        latencies.append(time.perf_counter() - start)
+        assert result["status"] == "ok", result
+
+    adapter.adapter.emit = reply
+    listener = asyncio.create_task(adapter._listen("default"))
+    for seq in range(events):
+        socket.feed(make_group_message(seq + 1, group_id=1))
+    deadline = time.perf_counter() + 5.0
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+        stats = adapter.dispatch_stats()["default"]
+        if len(latencies) + stats["shed"] >= events:
+            break
+    await socket.close()
+    await listener
+    await adapter.shutdown()
+    return latencies, stats
+
+
+async def bench_response_fastpath(config: BenchConfig):
+    """事件负载下的 call_api 延迟：响应快速通道 vs 响应进入分发队列"""
+    for label, adapter_class in (("快速通道", OneBotAdapter), ("进入队列", _SlowPathAdapter)):
+        latencies = await _measure_call_latency(adapter_class, config.latency_calls)
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        print(f"  {label}: p50 {p50:.2f}ms, p99 {p99:.2f}ms")
+
+    # 回归：队列满（1 个分片、容量 2）时读取循环不能停下，否则处理器发出的调用要等到超时
+    latencies, stats = await _backpressure_calls(6)
+    assert len(latencies) == 6 and max(latencies) < 0.5, latencies
+    assert stats["spilled"] > 0 and stats["shed"] == 0, stats
+    print(
+        f"  队列满时处理器发出 6 个 send_msg: 最慢 {max(latencies) * 1000:.1f}ms 拿到响应"
+        f"（超时 2s），暂存 {stats['spilled']} 个事件"
+    )
+
+    # 溢出区也满时丢弃新事件并计数，已接收事件的调用仍能及时拿到响应
+    latencies, stats = await _backpressure_calls(6, dispatch_overflow_size=1)
+    assert stats["shed"] > 0 and len(latencies) + stats["shed"] == 6, stats
+    assert max(latencies) < 0.5, latencies
+    print(f"  溢出区上限 1: 丢弃 {stats['shed']} 个事件，其余调用最慢 {max(latencies) * 1000:.1f}ms")
+
+
+CASES: Dict[str, Callable[[BenchConfig], Any]] = {
+    "pending": bench_pending,
+    "codec": bench_codec,
+    "dispatch": bench_dispatch,
+    "fastpath": bench_response_fastpath,
+    "cqcode": bench_cq_code,
+    "segments": bench_segments,
+    "dropraw": bench_drop_raw_events,
+    "convert": bench_convert_dispatch,
+    "ids": bench_event_ids,
+    "ratelimit": bench_rate_limit,
+    "lanes": bench_send_lanes,
+    "coalesce": bench_coalesce,
+    "batch": bench_batch,
+    "media": bench_media,
+    "mediacache": bench_media_cache,
+    "localfile": bench_local_file,
+    "upload": bench_upload,
+    "reconnect": bench_reconnect,
+    "liveness": bench_liveness,
+    "replay": bench_replay,
+    "timeouts": bench_timeouts,
+    "channels": bench_channels,
+    "http": bench_http,
+}
+
+
+async def main(names: List[str]):
+    config = BenchConfig()
+    for name in names or list(CASES):
+        print(f"[{name}] {CASES[name].__doc__}")
+        await CASES[name](config)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))